@@ -0,0 +1,150 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+# Stages every application goes through, in order
+activity_stages = [
+    "Application Submitted",
+    "Verification Started",
+    "Initial Review Completed",
+    "Request for Additional Information",
+    "User Responded with Additional Information",
+    "Final Review Completed",
+    "Verification Completed",
+    "Notification Sent to User"
+]
+
+stage_dtype = pd.CategoricalDtype(activity_stages, ordered=True)
+
+event_columns = ["Applicant ID", "Stage", "Timestamp"]
+
+# Pending appended events are merged into the sorted table once there are this many
+_merge_threshold = 10_000
+
+
+def activity_path_for(snapshot_path):
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(snapshot_path.stem + ".activity.parquet")
+
+
+def empty_events():
+    return pd.DataFrame({
+        "Applicant ID": pd.Series(dtype=str),
+        "Stage": pd.Series(dtype=stage_dtype),
+        "Timestamp": pd.Series(dtype="datetime64[ns]"),
+    })
+
+
+# Turn the legacy "Activity Feed" text ("Stage - YYYY-MM-DD HH:MM" or "Stage - N/A"
+# per line) into one event row per reached stage
+def parse_activity_feed(applicant_ids, feeds):
+    lines = pd.DataFrame({
+        "Applicant ID": np.asarray(applicant_ids),
+        "Line": pd.Series(np.asarray(feeds, dtype=object), dtype=str).fillna("").str.split("\n").to_numpy(),
+    }).explode("Line")
+    line = lines["Line"].astype(str)
+
+    # Unreached stages ("N/A") are not events
+    reached = ~line.str.endswith(" - N/A")
+    line, applicant_ids = line[reached], lines["Applicant ID"][reached]
+    timestamp_width = len("YYYY-MM-DD HH:MM")
+    events = pd.DataFrame({
+        "Applicant ID": applicant_ids.to_numpy(),
+        "Stage": pd.Categorical(line.str.slice(0, -(timestamp_width + len(" - "))).to_numpy(), dtype=stage_dtype),
+        "Timestamp": pd.to_datetime(line.str.slice(-timestamp_width).to_numpy(), format="%Y-%m-%d %H:%M", errors="coerce"),
+    })
+    # Lines that do not follow the format are dropped as well
+    events = events[events["Stage"].notna() & events["Timestamp"].notna()]
+    return events.reset_index(drop=True)
+
+
+# Activity events grouped by applicant, so a timeline is a slice lookup and
+# stage statistics are group-bys over typed columns
+class ActivityLog:
+    def __init__(self, events):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._set_events(events)
+
+    def _set_events(self, events):
+        events = events[event_columns].sort_values(["Applicant ID", "Stage"], kind="stable").reset_index(drop=True)
+        applicant_ids = events["Applicant ID"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, applicant_ids[1:] != applicant_ids[:-1]]) if len(events) else np.empty(0, dtype=int)
+        stops = np.r_[starts[1:], len(events)]
+        self.events = events
+        self._slices = dict(zip(applicant_ids[starts], zip(starts.tolist(), stops.tolist())))
+        self._current_stage_counts = None
+
+    def __len__(self):
+        return len(self.events) + sum(len(events) for events in self._pending)
+
+    def append(self, events):
+        with self._lock:
+            self._pending.append(events[event_columns])
+            self._current_stage_counts = None
+            if sum(len(events) for events in self._pending) >= _merge_threshold:
+                self._set_events(pd.concat([self.events, *self._pending], ignore_index=True))
+                self._pending = []
+
+    # Every event, including the ones not merged into the sorted table yet
+    def all_events(self):
+        with self._lock:
+            return pd.concat([self.events, *self._pending], ignore_index=True) if self._pending else self.events
+
+    def events_for(self, applicant_id):
+        with self._lock:
+            events, pending = self.events, list(self._pending)
+            start, stop = self._slices.get(applicant_id, (0, 0))
+        parts = [events.iloc[start:stop]]
+        parts += [frame[frame["Applicant ID"] == applicant_id] for frame in pending]
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat(parts, ignore_index=True).sort_values("Stage", kind="stable")
+
+    # Every stage for one applicant as (stage, state, timestamp), where state is
+    # "completed", "in_progress" (the latest reached stage) or "not_reached"
+    @timed("lookup.activity")
+    def timeline(self, applicant_id):
+        events = self.events_for(applicant_id)
+        reached = dict(zip(events["Stage"].astype(str), events["Timestamp"]))
+        latest = str(events["Stage"].max()) if len(events) else None
+
+        timeline = []
+        for stage in activity_stages:
+            if stage not in reached:
+                timeline.append((stage, "not_reached", "N/A"))
+            elif stage == latest and stage != activity_stages[-1]:
+                timeline.append((stage, "in_progress", reached[stage].strftime('%Y-%m-%d %H:%M')))
+            else:
+                timeline.append((stage, "completed", reached[stage].strftime('%Y-%m-%d %H:%M')))
+        return timeline
+
+    # Number of applicants whose latest reached stage is each stage, e.g. how many
+    # are waiting at "Request for Additional Information"
+    @timed("count.activity")
+    def current_stage_counts(self):
+        with self._lock:
+            if self._current_stage_counts is None:
+                events = pd.concat([self.events, *self._pending], ignore_index=True) if self._pending else self.events
+                latest = events.groupby("Applicant ID", sort=False, observed=True)["Stage"].max()
+                self._current_stage_counts = latest.value_counts().reindex(activity_stages, fill_value=0)
+            return self._current_stage_counts
+
+    # Number of applicants that have reached each stage
+    def reached_stage_counts(self):
+        with self._lock:
+            stages = pd.concat([self.events["Stage"], *[events["Stage"] for events in self._pending]])
+        return stages.value_counts().reindex(activity_stages, fill_value=0)
+
+
+def load_activity(snapshot_path):
+    path = activity_path_for(snapshot_path)
+    if not path.exists():
+        return ActivityLog(empty_events())
+    events = pd.read_parquet(path)
+    events["Stage"] = events["Stage"].astype(stage_dtype)
+    return ActivityLog(events)
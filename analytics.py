@@ -0,0 +1,152 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Numeric columns the Analytics page describes
+analytics_columns = [
+    "Annual Income (RM)", "Net Worth (RM)", "Rating Score",
+    "Compliance Probability", "PHOTO MATCHED", "IC VERIFIED"
+]
+
+# Columns the numeric columns are broken down by
+group_columns = ["Risk Level", "Status"]
+
+# Quantiles reported for every numeric column
+summary_quantiles = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+histogram_bins = 20
+
+# Rows converted to float and processed at a time, so a large table is never
+# copied whole just to compute a sum
+analytics_chunk_size = 250_000
+
+
+def _chunks(frame, columns):
+    for start in range(0, len(frame), analytics_chunk_size):
+        chunk = frame.iloc[start:start + analytics_chunk_size]
+        yield start, np.column_stack([chunk[column].to_numpy(dtype=float, na_value=np.nan) for column in columns])
+
+
+def _group_codes(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), [str(category) for category in values.cat.categories]
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, [str(value) for value in uniques]
+
+
+# Count, mean, spread and quantiles of each column
+def summarize(frame, columns=analytics_columns):
+    rows = {}
+    for column in columns:
+        values = frame[column].to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            rows[column] = {"Count": 0}
+            continue
+        quantiles = np.quantile(values, summary_quantiles)
+        rows[column] = {
+            "Count": len(values),
+            "Mean": values.mean(),
+            "Std": values.std(),
+            "Min": values.min(),
+            **{f"P{round(q * 100)}": value for q, value in zip(summary_quantiles, quantiles)},
+            "Max": values.max(),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("Column").round(2)
+
+
+# Histogram of one column with `bins` equal-width bins between its min and max
+def histogram(frame, column, bins=histogram_bins):
+    low, high = np.inf, -np.inf
+    for _, chunk in _chunks(frame, [column]):
+        values = chunk[:, 0]
+        values = values[~np.isnan(values)]
+        if len(values):
+            low, high = min(low, values.min()), max(high, values.max())
+    if low > high:
+        return pd.DataFrame({"From": [], "To": [], "Applicants": []})
+
+    edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for _, chunk in _chunks(frame, [column]):
+        counts += np.histogram(chunk[:, 0], bins=edges)[0]
+    return pd.DataFrame({"From": edges[:-1].round(2), "To": edges[1:].round(2), "Applicants": counts})
+
+
+# Pearson correlations between the columns over rows where all of them are
+# present, from sums and cross-products accumulated chunk by chunk
+def correlations(frame, columns=analytics_columns):
+    n = 0
+    sums = np.zeros(len(columns))
+    products = np.zeros((len(columns), len(columns)))
+    for _, chunk in _chunks(frame, columns):
+        chunk = chunk[~np.isnan(chunk).any(axis=1)]
+        n += len(chunk)
+        sums += chunk.sum(axis=0)
+        products += chunk.T @ chunk
+
+    if n < 2:
+        return pd.DataFrame(np.nan, index=columns, columns=columns)
+    covariance = (products - np.outer(sums, sums) / n) / (n - 1)
+    scale = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = covariance / np.outer(scale, scale)
+    return pd.DataFrame(matrix, index=pd.Index(columns, name="Column"), columns=columns).round(3)
+
+
+# Mean of each numeric column per value of `group_column` (for the 0/1 columns
+# this is the share of applicants with a match), plus the number of applicants
+def group_means(frame, group_column, columns=analytics_columns):
+    codes, labels = _group_codes(frame[group_column])
+    grouped = codes >= 0
+    sizes = np.bincount(codes[grouped], minlength=len(labels))
+    sums = np.zeros((len(labels), len(columns)))
+    counts = np.zeros((len(labels), len(columns)))
+    for start, chunk in _chunks(frame, columns):
+        chunk_codes = codes[start:start + len(chunk)]
+        for i in range(len(columns)):
+            valid = (chunk_codes >= 0) & ~np.isnan(chunk[:, i])
+            sums[:, i] += np.bincount(chunk_codes[valid], weights=chunk[valid, i], minlength=len(labels))
+            counts[:, i] += np.bincount(chunk_codes[valid], minlength=len(labels))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+    table = pd.DataFrame(means, index=pd.Index(labels, name=group_column), columns=[f"Mean {column}" for column in columns])
+    table.insert(0, "Applicants", sizes)
+    return table[table["Applicants"] > 0].round(2)
+
+
+# Analytics results for one version of the applicant table, each computed on
+# first use and then kept. A new version starts from the results of the previous
+# one that do not read any column the change touched.
+class Analytics:
+    def __init__(self, frame, results=None):
+        self._frame = frame
+        self._results = dict(results or {})
+        self._lock = threading.Lock()
+
+    def _cached(self, key, inputs, compute):
+        with self._lock:
+            if key in self._results:
+                return self._results[key][1]
+        value = compute()
+        with self._lock:
+            return self._results.setdefault(key, (frozenset(inputs), value))[1]
+
+    def carry_over(self, frame, changed_columns):
+        with self._lock:
+            kept = {key: result for key, result in self._results.items() if not result[0] & set(changed_columns)}
+        return Analytics(frame, kept)
+
+    def summary(self):
+        return self._cached(("summary",), analytics_columns, lambda: summarize(self._frame))
+
+    def histogram(self, column):
+        return self._cached(("histogram", column), [column], lambda: histogram(self._frame, column))
+
+    def correlations(self):
+        return self._cached(("correlations",), analytics_columns, lambda: correlations(self._frame))
+
+    def group_means(self, group_column):
+        return self._cached(("group_means", group_column), [group_column, *analytics_columns], lambda: group_means(self._frame, group_column))
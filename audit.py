@@ -0,0 +1,401 @@
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+# Fields of every audit record. "Sequence" numbers the records of a trail in
+# the order they were written.
+audit_columns = ["Timestamp", "Applicant ID", "Previous Status", "Status", "Previous Comment", "Comment", "Reviewer", "Sequence"]
+
+# Records written to the active segment before it is sealed into a Parquet segment
+segment_max_records = 100_000
+
+# Sealed segments whose newest record is older than this are deleted
+audit_retention_days = 7 * 365
+
+# Rows per Parquet row group in a sealed segment; segments are sorted by
+# applicant, so a history lookup reads one or two small groups
+audit_row_group_size = 16_384
+
+_active_name = "active.jsonl"
+_sealing_name = "sealing.jsonl"
+
+# One encoder for every record; json.dumps with `default` would build a new one per call
+_encoder = json.JSONEncoder(default=str)
+
+
+def _segment_name(number):
+    return f"segment-{number:06d}.parquet"
+
+
+def _to_frame(records):
+    frame = pd.DataFrame(records, columns=audit_columns)
+    frame["Timestamp"] = pd.to_datetime(frame["Timestamp"], format="ISO8601")
+    frame["Sequence"] = frame["Sequence"].astype("int64")
+    return frame
+
+
+# A sealed, read-only segment: a Parquet file sorted by applicant and time,
+# with the applicants it covers, its time range and its last sequence number
+# kept in memory. A segment sealed before records were numbered has no
+# sequence numbers (`last_sequence` is None).
+class _Segment:
+    def __init__(self, path):
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        self.path = Path(path)
+        self.number = int(self.path.stem.split("-")[1])
+        columns = [column for column in ["Applicant ID", "Timestamp", "Sequence"] if column in pq.read_schema(self.path).names]
+        table = pq.read_table(self.path, columns=columns)
+        self.rows = table.num_rows
+        self.applicant_ids = np.sort(np.asarray(pc.unique(table.column("Applicant ID")).to_pylist(), dtype=object))
+        self.first, self.last = None, None
+        self.last_sequence = pc.max(table.column("Sequence")).as_py() or 0 if "Sequence" in columns else None
+        if table.num_rows:
+            bounds = pc.min_max(table.column("Timestamp"))
+            self.first, self.last = pd.Timestamp(bounds["min"].as_py()), pd.Timestamp(bounds["max"].as_py())
+
+    def covers(self, applicant_id):
+        i = np.searchsorted(self.applicant_ids, applicant_id)
+        return i < len(self.applicant_ids) and self.applicant_ids[i] == applicant_id
+
+    def overlaps(self, start, end):
+        return self.first is not None and (end is None or self.first <= end) and (start is None or self.last >= start)
+
+    def read(self, filters=None):
+        return pd.read_parquet(self.path, filters=filters)
+
+
+def _read_records(path):
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash during a write; that decision never completed
+                continue
+
+
+# Write `records` as a Parquet segment sorted by applicant and time
+def _write_segment(path, records):
+    _write_frame(path, _to_frame(records))
+
+
+def _write_frame(path, frame):
+    tmp_path = path.with_name(path.name + ".tmp")
+    frame = frame.sort_values(["Applicant ID", "Timestamp"], kind="stable")
+    frame.to_parquet(tmp_path, index=False, row_group_size=audit_row_group_size)
+    os.replace(tmp_path, path)
+
+
+# Number the records of a segment sealed before records were numbered, in time
+# order from `first`
+def _number_segment(segment, first):
+    frame = segment.read()
+    order = np.argsort(frame["Timestamp"].to_numpy(), kind="stable")
+    sequence = np.empty(len(frame), dtype=np.int64)
+    sequence[order] = np.arange(first, first + len(frame))
+    frame["Sequence"] = sequence
+    _write_frame(segment.path, frame)
+    return _Segment(segment.path)
+
+
+# Append-only record of every reviewer decision: who changed which applicant
+# from what to what, when, and with which comment. New records go to an
+# fsynced JSON-lines segment, indexed in memory by applicant. A full segment
+# is sealed into a Parquet file sorted by applicant, so per-applicant history
+# and time-range queries read only the segments (and row groups) that match.
+# Sealing runs in a background thread, so recording never waits for it.
+# The records of the latest call stay in the active segment until the next
+# one, so they can still be discarded if the decision they describe fails.
+# With `read_only`, nothing in the directory is written or deleted (for
+# querying a trail an app may be writing to).
+class AuditTrail:
+    def __init__(self, directory, read_only=False):
+        self.directory = Path(directory)
+        self.active_path = self.directory / _active_name
+        # A full active segment is renamed to this while it is being sealed
+        self.sealing_path = self.directory / _sealing_name
+        self._lock = threading.Lock()
+        self._segments = [_Segment(path) for path in sorted(self.directory.glob("segment-*.parquet"))]
+        self._active, self._active_index = [], {}
+        self._sealing, self._sealing_index = [], {}
+        self._seal_thread = None
+        self._file = None
+
+        # A trail written before records were numbered is numbered in the
+        # order it was written: segments once, on disk, and JSON-lines records
+        # as they are read (a read-only trail only numbers them in memory)
+        sealed_until = 0
+        for i, segment in enumerate(self._segments):
+            if segment.last_sequence is None:
+                if not read_only:
+                    self._segments[i] = segment = _number_segment(segment, sealed_until + 1)
+                else:
+                    segment.last_sequence = sealed_until + segment.rows
+            sealed_until = segment.last_sequence
+        sealed_last = self._segments[-1].last if self._segments else None
+        numbered = sealed_until
+
+        # Records up to the newest sealed one are left over from a crash between
+        # sealing a segment and deleting its JSON-lines file. They are told
+        # apart by sequence number, since clocks can step back.
+        def unsealed(path):
+            nonlocal numbered
+            records = []
+            for record in _read_records(path):
+                if "Sequence" not in record:
+                    if sealed_last is not None and pd.Timestamp(record["Timestamp"]) <= sealed_last:
+                        continue
+                    numbered += 1
+                    record["Sequence"] = numbered
+                if record["Sequence"] > sealed_until:
+                    numbered = max(numbered, record["Sequence"])
+                    records.append(record)
+            return records
+
+        if read_only:
+            for record in unsealed(self.sealing_path) + unsealed(self.active_path):
+                self._index(record)
+            self._next_sequence = self._last_sequence() + 1
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Finish a seal a crash interrupted
+        leftover = unsealed(self.sealing_path)
+        if leftover:
+            path = self.directory / _segment_name(self._next_segment_number())
+            _write_segment(path, leftover)
+            self._segments.append(_Segment(path))
+        self.sealing_path.unlink(missing_ok=True)
+
+        for record in unsealed(self.active_path):
+            self._index(record)
+        self._next_sequence = self._last_sequence() + 1
+        self._file = open(self.active_path, "a", encoding="utf-8")
+        self._end_torn_line()
+        self.remove_expired()
+
+    # End a torn last line left by a crash, so the next record starts on a line of its own
+    def _end_torn_line(self):
+        if self.active_path.stat().st_size == 0:
+            return
+        with open(self.active_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                self._file.write("\n")
+                self._file.flush()
+
+    # Sequence number of the newest record
+    @property
+    def last_sequence(self):
+        return self._next_sequence - 1
+
+    def _last_sequence(self):
+        if self._active:
+            return self._active[-1]["Sequence"]
+        return self._segments[-1].last_sequence if self._segments else 0
+
+    def _next_segment_number(self):
+        return self._segments[-1].number + 1 if self._segments else 1
+
+    def _index(self, record):
+        self._active_index.setdefault(record["Applicant ID"], []).append(len(self._active))
+        self._active.append(record)
+
+    # Record one decision for each applicant. `previous_statuses` and
+    # `previous_comments` line up with `applicant_ids`. All records are written
+    # and fsynced together. Returns the sequence number of the last record.
+    def record(self, applicant_ids, previous_statuses, previous_comments, status, comment, reviewer=None, timestamp=None):
+        timestamp = (timestamp or datetime.now()).isoformat(timespec="microseconds")
+        records = [
+            {
+                "Timestamp": timestamp,
+                "Applicant ID": applicant_id,
+                "Previous Status": None if pd.isna(previous_status) else str(previous_status),
+                "Status": status,
+                "Previous Comment": None if pd.isna(previous_comment) else str(previous_comment),
+                "Comment": comment,
+                "Reviewer": reviewer,
+            }
+            for applicant_id, previous_status, previous_comment in zip(applicant_ids, previous_statuses, previous_comments)
+        ]
+        with self._lock:
+            if len(self._active) >= segment_max_records and self._seal_thread is None:
+                self._start_seal()
+            for record in records:
+                record["Sequence"] = self._next_sequence
+                self._next_sequence += 1
+            lines = "".join(_encoder.encode(record) + "\n" for record in records)
+            try:
+                self._file.write(lines)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception:
+                # Do not leave part of the records behind for the next ones to be glued to
+                self._rewrite_active()
+                raise
+            for record in records:
+                self._index(record)
+        return self._next_sequence - 1
+
+    # Remove the records after `sequence` from the active segment: their
+    # decision was not committed. Returns how many were removed.
+    def discard_after(self, sequence):
+        with self._lock:
+            kept = [record for record in self._active if record["Sequence"] <= sequence]
+            discarded = len(self._active) - len(kept)
+            if discarded:
+                self._active, self._active_index = [], {}
+                for record in kept:
+                    self._index(record)
+                self._rewrite_active()
+            return discarded
+
+    # Replace the active segment's file with the records held in memory
+    def _rewrite_active(self):
+        tmp_path = self.active_path.with_name(self.active_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(_encoder.encode(record) + "\n" for record in self._active))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.active_path)
+        self._file = open(self.active_path, "a", encoding="utf-8")
+
+    # Set the full active segment aside and start a new one; the set-aside
+    # records stay queryable from memory until their Parquet segment is written
+    def _start_seal(self):
+        self._file.close()
+        os.replace(self.active_path, self.sealing_path)
+        self._file = open(self.active_path, "a", encoding="utf-8")
+        self._sealing, self._sealing_index = self._active, self._active_index
+        self._active, self._active_index = [], {}
+        self._seal_thread = threading.Thread(target=self._seal, args=(self._next_segment_number(),), name="audit-seal", daemon=True)
+        self._seal_thread.start()
+
+    # Write the set-aside records as the next Parquet segment
+    def _seal(self, number):
+        path = self.directory / _segment_name(number)
+        try:
+            _write_segment(path, self._sealing)
+            segment = _Segment(path)
+        except Exception as e:
+            # The records stay in sealing.jsonl and in memory; the next start seals them
+            print(f"Sealing audit segment {number} failed: {e}")
+            return
+        with self._lock:
+            self._segments.append(segment)
+            self._sealing, self._sealing_index = [], {}
+            self.sealing_path.unlink(missing_ok=True)
+            self._seal_thread = None
+
+    # Delete sealed segments past the retention period. The newest segment is
+    # kept, so sequence numbers carry on from it.
+    def remove_expired(self, now=None):
+        cutoff = pd.Timestamp((now or datetime.now()) - timedelta(days=audit_retention_days))
+        with self._lock:
+            expired = [segment for segment in self._segments[:-1] if segment.last is not None and segment.last < cutoff]
+            self._segments = [segment for segment in self._segments if segment not in expired]
+        for segment in expired:
+            segment.path.unlink(missing_ok=True)
+        return len(expired)
+
+    # Every recorded decision for one applicant, oldest first
+    @timed("lookup.audit")
+    def history(self, applicant_id):
+        with self._lock:
+            segments = [segment for segment in self._segments if segment.covers(applicant_id)]
+            active = [self._sealing[i] for i in self._sealing_index.get(applicant_id, [])]
+            active += [self._active[i] for i in self._active_index.get(applicant_id, [])]
+        parts = [segment.read([("Applicant ID", "==", applicant_id)]) for segment in segments]
+        parts.append(_to_frame(active))
+        return pd.concat([part for part in parts if len(part)] or [_to_frame([])], ignore_index=True)
+
+    # Every decision recorded from `start` up to (not including) `end`, in time
+    # order; either bound may be None
+    @timed("audit.range")
+    def between(self, start=None, end=None):
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        filters = []
+        if start is not None:
+            filters.append(("Timestamp", ">=", start))
+        if end is not None:
+            filters.append(("Timestamp", "<", end))
+        with self._lock:
+            segments = [segment for segment in self._segments if segment.overlaps(start, end)]
+            active = _to_frame(self._sealing + self._active)
+        parts = [segment.read(filters or None) for segment in segments]
+        if start is not None:
+            active = active[active["Timestamp"] >= start]
+        if end is not None:
+            active = active[active["Timestamp"] < end]
+        parts.append(active)
+        frame = pd.concat([part for part in parts if len(part)] or [_to_frame([])], ignore_index=True)
+        return frame.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+
+    # The most recent decision for every applicant in the trail, indexed by
+    # applicant ID; with `until`, only records up to that sequence number count
+    def latest(self, until=None):
+        frame = self.between().sort_values("Sequence", kind="stable")
+        if until is not None:
+            frame = frame[frame["Sequence"] <= until]
+        return frame.drop_duplicates("Applicant ID", keep="last").set_index("Applicant ID")
+
+    def __len__(self):
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            return sum(pq.read_metadata(segment.path).num_rows for segment in self._segments) + len(self._sealing) + len(self._active)
+
+    # Wait for a seal in progress, then close the active segment
+    def close(self):
+        with self._lock:
+            seal_thread = self._seal_thread
+        if seal_thread is not None:
+            seal_thread.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the decision audit trail.")
+    parser.add_argument("-d", "--directory", default="audit", help="audit trail directory (default: audit)")
+    parser.add_argument("--applicant", help="history of one applicant")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="first time to include, e.g. 2024-11-01T00:00")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="time to stop before")
+    parser.add_argument("-o", "--output", help="write the records to this CSV file instead of printing them")
+    args = parser.parse_args(argv)
+
+    trail = AuditTrail(args.directory, read_only=True)
+    if args.applicant:
+        records = trail.history(args.applicant)
+        if args.since is not None:
+            records = records[records["Timestamp"] >= args.since]
+        if args.until is not None:
+            records = records[records["Timestamp"] < args.until]
+    else:
+        records = trail.between(args.since, args.until)
+    trail.close()
+
+    if args.output:
+        records.to_csv(args.output, index=False)
+        print(f"{len(records)} audit records written to '{args.output}'.")
+    else:
+        print(records.to_string(index=False) if len(records) else "No audit records.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from snapshot import snapshot_path_for
+
+# Table sizes benchmarked by default
+benchmark_sizes = [10_000, 100_000, 1_000_000]
+
+# Generated data is cached here, one snapshot per size
+benchmark_data_directory = Path(".benchmark-data")
+
+# Baseline results, kept in the repository so a regression shows up as a diff
+baseline_path = Path("benchmarks") / "baseline.json"
+
+# Data generation settings; fixed so every run measures the same table
+benchmark_seed = 7
+benchmark_as_of = datetime(2024, 11, 1, 12, 0)
+
+# Calls timed per stage (the first few are discarded as warm-up)
+stage_repeats = {
+    "filter": 50,
+    "sort": 24,
+    "paginate": 200,
+    "count": 30,
+    "lookup": 200,
+    "analytics": 5,
+    "decision": 50,
+    "save": 3,
+}
+warmup_calls = 2
+
+# Search box inputs, as typed one keystroke at a time
+filter_queries = ["t", "ta", "tan", "app0", "app00", "rejected", "siti", "zzz"]
+
+# A stage whose p50 is this many times its baseline p50 is reported as a regression
+regression_threshold = 1.25
+
+# Percentiles reported for every stage
+latency_percentiles = [50, 95, 99]
+
+
+def data_paths(rows):
+    workbook = benchmark_data_directory / f"applicants_{rows}.xlsx"
+    return workbook, snapshot_path_for(workbook)
+
+
+# Generate (once) a snapshot of `rows` applicants with generate_data.py
+def ensure_data(rows):
+    from generate_data import generate_chunks, write_chunks
+
+    workbook, snapshot_path = data_paths(rows)
+    if not snapshot_path.exists():
+        benchmark_data_directory.mkdir(parents=True, exist_ok=True)
+        write_chunks(generate_chunks(rows, benchmark_seed, as_of=benchmark_as_of), "native", snapshot_path)
+    return workbook, snapshot_path
+
+
+# Copy the snapshot at `snapshot_path` into `directory`, since decisions and
+# saves change the data; returns the workbook and journal paths to load it with
+def copy_data(snapshot_path, directory):
+    directory = Path(directory)
+    for path in snapshot_path.parent.glob(snapshot_path.stem + ".*"):
+        shutil.copy(path, directory / path.name.replace(snapshot_path.stem, "applicants"))
+    return directory / "applicants.xlsx", directory / "decisions.journal"
+
+
+# Peak resident memory of this process. On Linux this is VmHWM, since ru_maxrss
+# also counts the parent the worker process was started from.
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Time `call(i)` `repeats` times, then run it once more under tracemalloc for
+# the peak memory it allocates (Python and NumPy allocations only)
+def measure(call, repeats):
+    for i in range(warmup_calls):
+        call(i)
+    durations = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        call(i)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        call(repeats)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return durations, peak
+
+
+def summarize(durations, peak_bytes):
+    values = np.percentile(durations, latency_percentiles) * 1000
+    result = {f"p{p}_ms": round(float(value), 3) for p, value in zip(latency_percentiles, values)}
+    result["max_ms"] = round(max(durations) * 1000, 3)
+    result["calls"] = len(durations)
+    result["peak_mb"] = round(peak_bytes / 2**20, 1)
+    return result
+
+
+# Every stage at one table size, in a fresh process so its peak memory is its own
+def run_size(rows):
+    from analytics import Analytics
+    from data_service import ApplicantService, sortable_columns
+    from reporting import report_dimensions
+
+    _, snapshot_path = ensure_data(rows)
+    rng = np.random.default_rng(benchmark_seed)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as directory:
+        workbook, journal = copy_data(snapshot_path, directory)
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        service = ApplicantService(workbook, journal)
+        results["load"] = {"p50_ms": round((time.perf_counter() - start) * 1000, 3), "calls": 1, "peak_mb": round(_peak_rss_mb() - rss_before, 1)}
+
+        snapshot = service.snapshot()
+        applicant_ids = snapshot.frame['Applicant ID'].to_numpy()
+        sorts = [(column, ascending) for column in sortable_columns for ascending in (True, False)]
+        everyone = snapshot.filter("", True)
+        dimensions = list(report_dimensions)
+
+        stages = {
+            "filter": lambda i: snapshot.filter(filter_queries[i % len(filter_queries)], i % 2 == 0),
+            "sort": lambda i: snapshot.filter("", True, *sorts[i % len(sorts)]),
+            "paginate": lambda i: snapshot.fetch_page(everyone, int(rng.integers(len(everyone) // 10)), 10),
+            "count": lambda i: (service.reporting.view().counts(dimensions[i % len(dimensions)]), service.activity_log.reached_stage_counts()),
+            "lookup": lambda i: snapshot.applicant(applicant_ids[rng.integers(len(applicant_ids))]),
+            "analytics": lambda i: Analytics(snapshot.frame).summary(),
+            "decision": lambda i: service.record_decision(applicant_ids[rng.integers(len(applicant_ids))], "Approved" if i % 2 else "Rejected", "benchmark"),
+            "save": lambda i: service.save(),
+        }
+        for name, call in stages.items():
+            results[name] = summarize(*measure(call, stage_repeats[name]))
+        service.journal.close()
+    return {"rows": rows, "peak_rss_mb": round(_peak_rss_mb(), 1), "stages": results}
+
+
+def run(sizes):
+    # Generate missing data first, outside the measured processes
+    for rows in sizes:
+        ensure_data(rows)
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for rows in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[str(rows)] = pool.submit(run_size, rows).result()
+    return results
+
+
+def print_results(results, baseline=None):
+    baseline = baseline or {}
+    regressions = []
+    for size, result in results.items():
+        print(f"\n{int(size):,} applicants (peak RSS {result['peak_rss_mb']} MB)")
+        print(f"  {'stage':<10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak MB':>8}  vs baseline p50")
+        for stage, values in result["stages"].items():
+            base = baseline.get(size, {}).get("stages", {}).get(stage)
+            change = ""
+            if base and base.get("p50_ms"):
+                ratio = values["p50_ms"] / base["p50_ms"]
+                change = f"{ratio:.2f}x"
+                if ratio > regression_threshold:
+                    change += " REGRESSION"
+                    regressions.append((size, stage, ratio))
+            print(f"  {stage:<10} {values['p50_ms']:>10} {values.get('p95_ms', ''):>10} {values.get('p99_ms', ''):>10} {values['peak_mb']:>8}  {change}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the applicant data paths at growing table sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=benchmark_sizes, help="table sizes to run (default: 10000 100000 1000000)")
+    parser.add_argument("--baseline", type=Path, default=baseline_path, help=f"baseline results to compare with (default: {baseline_path})")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    results = run(args.sizes)
+    regressions = print_results(results, baseline)
+
+    for path in [args.output, args.baseline if args.update_baseline else None]:
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Stable formatting, so baselines diff line by line
+            path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            print(f"Results written to '{path}'.")
+    if regressions and not args.update_baseline:
+        print(f"\n{len(regressions)} stage(s) slower than {regression_threshold}x their baseline.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
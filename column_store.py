@@ -0,0 +1,169 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from snapshot import align_rows, mutable_columns, row_group_size, save_snapshot_meta
+
+# Columns kept in memory in lazy mode: everything the list, search, sorting,
+# analytics and decisions read for every applicant. The rest (address, date of
+# birth, occupation, ...) is only shown for one applicant at a time and is read
+# from the snapshot file when it is.
+resident_columns = [
+    "Applicant ID", "Application Date", "Full Name", "Status", "Details",
+    "Rating Score", "Compliance Probability", "Annual Income (RM)", "Net Worth (RM)",
+    "PHOTO MATCHED", "IC VERIFIED", "Risk Level"
+]
+
+# Snapshot row groups kept decoded, so paging through neighbouring applicants
+# does not read the same group again
+cached_row_groups = 8
+
+# Text columns with at most this share of distinct values are stored as categoricals
+_categorical_ratio = 0.05
+
+
+# Store resident columns in the smallest dtypes that hold them: integers are
+# downcast and repetitive text (e.g. names) becomes categorical
+def compact_frame(frame):
+    frame = frame.copy(deep=False)
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_integer_dtype(values.dtype):
+            frame[column] = pd.to_numeric(values, downcast="integer")
+        elif column not in mutable_columns and pd.api.types.is_string_dtype(values.dtype) and len(values):
+            if values.nunique() <= _categorical_ratio * len(values):
+                frame[column] = values.astype("category")
+    return frame
+
+
+# The non-resident columns of the applicant table. Rows that are in the
+# snapshot file are read one row group at a time; rows appended since the
+# file was written are kept in memory until the next save.
+class ColdColumns:
+    def __init__(self, snapshot_path, columns, table_columns):
+        self.snapshot_path = Path(snapshot_path)
+        self.columns = list(columns)
+        self.table_columns = list(table_columns)
+        self._lock = threading.Lock()
+        self._open()
+        self._appended = self._empty
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        self._file = pq.ParquetFile(self.snapshot_path, memory_map=True)
+        sizes = [self._file.metadata.row_group(i).num_rows for i in range(self._file.num_row_groups)]
+        self._starts = np.cumsum([0] + sizes)
+        self._cache = OrderedDict()
+        # No rows, but the file's dtypes; appended rows are aligned to it
+        self._empty = self._file.schema_arrow.empty_table().select(self.columns).to_pandas()
+
+    def __len__(self):
+        return int(self._starts[-1]) + len(self._appended)
+
+    # Storage types of the cold columns
+    @property
+    def dtypes(self):
+        return self._empty.dtypes
+
+    def _row_group(self, index):
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+            file = self._file
+        group = file.read_row_group(index, columns=self.columns).to_pandas()
+        with self._lock:
+            if file is self._file:
+                self._cache[index] = group
+                if len(self._cache) > cached_row_groups:
+                    self._cache.popitem(last=False)
+        return group
+
+    # The cold columns of the applicant at `position`
+    def row(self, position):
+        with self._lock:
+            disk_rows, appended = int(self._starts[-1]), self._appended
+            starts = self._starts
+        if position >= disk_rows:
+            return appended.iloc[position - disk_rows]
+        index = int(np.searchsorted(starts, position, side="right")) - 1
+        return self._row_group(index).iloc[position - starts[index]]
+
+    # The cold columns of rows `start` to `stop`, read in row-group-sized pieces
+    def chunks(self, start=0, stop=None):
+        with self._lock:
+            file, starts, appended = self._file, self._starts, self._appended
+        stop = len(self) if stop is None else stop
+        disk_rows = int(starts[-1])
+        for index in range(file.num_row_groups):
+            group_start, group_stop = int(starts[index]), int(starts[index + 1])
+            if group_stop <= start or group_start >= stop:
+                continue
+            group = file.read_row_group(index, columns=self.columns).to_pandas()
+            yield group.iloc[max(start - group_start, 0):min(stop, group_stop) - group_start]
+        if stop > disk_rows:
+            yield appended.iloc[max(start - disk_rows, 0):stop - disk_rows]
+
+    # The cold columns of the rows at `positions`, in that order. Row groups are
+    # read directly rather than through the cache, so a bulk read (an export)
+    # does not push out the groups interactive lookups are using.
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        with self._lock:
+            file, starts, appended, empty = self._file, self._starts, self._appended, self._empty
+        disk_rows = int(starts[-1])
+        groups = np.searchsorted(starts, positions, side="right") - 1
+        pieces, order = [], []
+        for index in np.unique(groups):
+            selected = np.flatnonzero(groups == index)
+            if index >= file.num_row_groups:
+                piece = appended.iloc[positions[selected] - disk_rows]
+            else:
+                piece = file.read_row_group(index, columns=self.columns).to_pandas().iloc[positions[selected] - starts[index]]
+            pieces.append(piece.reset_index(drop=True))
+            order.append(selected)
+        if not pieces:
+            return empty
+        frame = pd.concat(pieces, ignore_index=True)
+        return frame.iloc[np.argsort(np.concatenate(order), kind="stable")].reset_index(drop=True)
+
+    def append(self, rows):
+        with self._lock:
+            appended, rows = align_rows(rows.reset_index(drop=True), self._appended)
+            self._appended = pd.concat([appended, rows], ignore_index=True)
+
+    # Write the full table (the resident `frame` joined with the cold columns of
+    # the same rows) as the new snapshot, one row group at a time
+    def save(self, frame, fingerprint, audit_sequence=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        writer = None
+        try:
+            start = 0
+            for cold in self.chunks(0, len(frame)):
+                for offset in range(0, len(cold), row_group_size):
+                    piece = cold.iloc[offset:offset + row_group_size].reset_index(drop=True)
+                    hot = frame.iloc[start:start + len(piece)].reset_index(drop=True)
+                    start += len(piece)
+                    table = pa.Table.from_pandas(pd.concat([hot, piece], axis=1)[self.table_columns], preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp_path, self.snapshot_path)
+        save_snapshot_meta(self.snapshot_path, fingerprint, audit_sequence)
+
+        # The saved rows are on disk now; rows appended after `frame` was taken stay in memory
+        with self._lock:
+            saved_appended = len(frame) - int(self._starts[-1])
+            self._appended = self._appended.iloc[saved_appended:].reset_index(drop=True)
+            self._open()
@@ -0,0 +1,420 @@
+import argparse
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from multiprocessing.managers import BaseManager
+
+from data_service import paginate, patch_positions
+from indexes import SortedOrder
+from metrics import timed
+
+# Snapshots the server keeps for workers still reading an older version. Row
+# positions stay valid across versions (rows are only ever appended), so a
+# request for a version that has been dropped is answered from the latest one.
+retained_versions = 8
+
+# How long (in seconds) a worker waits for a new version before asking again
+follow_timeout_seconds = 1.0
+
+# Workers find the data server through these environment variables
+address_variable = "DATA_SERVER"
+authkey_variable = "DATA_SERVER_KEY"
+
+# Defaults for `python data_server.py`
+default_server_port = 8700
+default_worker_port = 8765
+
+# Results a worker can ask a snapshot's reports and analytics for
+_result_methods = {
+    "reports": {"counts", "rates", "distribution"},
+    "analytics": {"summary", "histogram", "correlations", "group_means"},
+}
+
+# What a worker knows about a version without asking again: its number, when it
+# was published, its row count and its status counts
+VersionInfo = namedtuple("VersionInfo", ["version", "updated_at", "rows", "status_counts"])
+
+
+def _version_info(snapshot):
+    return VersionInfo(snapshot.version, snapshot.updated_at, len(snapshot), snapshot.status_counts)
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class _Manager(BaseManager):
+    pass
+
+
+# The one copy of the applicant table, served to every worker process. Each
+# call names the version it reads, so a worker sees the same consistent
+# snapshot a single-process session does. Decisions are applied here, by the
+# service's single writer; workers never change the table themselves.
+class DataServer:
+    def __init__(self, service):
+        self.service = service
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()
+        self._keep(service.snapshot())
+        service.subscribe(self._keep)
+
+    def _keep(self, snapshot):
+        with self._lock:
+            self._snapshots[snapshot.version] = snapshot
+            while len(self._snapshots) > retained_versions:
+                self._snapshots.popitem(last=False)
+
+    def _snapshot(self, version):
+        with self._lock:
+            snapshot = self._snapshots.get(version)
+            if snapshot is None:
+                snapshot = next(reversed(self._snapshots.values()))
+            return snapshot
+
+    def latest(self):
+        return _version_info(self.service.snapshot())
+
+    def wait_for_version(self, version, timeout=None):
+        return _version_info(self.service.wait_for_version(version, timeout))
+
+    def changes_since(self, version, until=None):
+        return self.service.changes_since(version, until)
+
+    def filter(self, version, filter_text, include_approved, sort_by, ascending):
+        return self._snapshot(version).filter(filter_text, include_approved, sort_by, ascending)
+
+    def match_changed(self, version, changes, filter_text, include_approved):
+        return self._snapshot(version).match_changed(changes, filter_text, include_approved)
+
+    def sort_keys(self, version, column, start):
+        return self._snapshot(version).sort_keys(column, start)
+
+    def list_rows(self, version, positions):
+        return self._snapshot(version).list_rows(positions)
+
+    def applicant(self, version, applicant_id):
+        return self._snapshot(version).applicant(applicant_id)
+
+    def applicant_ids(self, version, positions):
+        return self._snapshot(version).applicant_ids(positions)
+
+    def columns(self, version):
+        return self._snapshot(version).columns
+
+    def rows(self, version, positions):
+        return self._snapshot(version).rows(positions)
+
+    def triage_rule(self, version, applicant_id):
+        return self._snapshot(version).triage_rule(applicant_id)
+
+    # `kind` is "reports" or "analytics"; `name` one of its methods in `_result_methods`
+    def result(self, version, kind, name, args):
+        if name not in _result_methods.get(kind, ()):
+            raise ValueError(f"Unknown {kind} result: {name}")
+        return getattr(getattr(self._snapshot(version), kind), name)(*args)
+
+    def record_decisions(self, applicant_ids, status, comments, reviewer=None):
+        return _version_info(self.service.record_decisions(applicant_ids, status, comments, reviewer))
+
+    def history(self, applicant_id):
+        return self.service.audit.history(applicant_id)
+
+    def timeline(self, applicant_id):
+        return self.service.activity_log.timeline(applicant_id)
+
+    def current_stage_counts(self):
+        return self.service.activity_log.current_stage_counts()
+
+    def triage_summary(self):
+        return self.service.triage_summary
+
+    def rule_name(self, index):
+        return self.service.triage.rule_name(index)
+
+    def queue(self, index):
+        return self.service.triage.queue(index)
+
+
+# A server for `service`, listening at `address` (a (host, port) pair) from the
+# moment it is returned; call its serve_forever() to answer workers
+def create_server(service, address, authkey):
+    store = DataServer(service)
+    _Manager.register("store", callable=lambda: store)
+    return _Manager(address=address, authkey=authkey).get_server()
+
+
+# Reports or analytics of one remote version. Each result is fetched once per
+# worker and version, however many sessions show it.
+class _RemoteResults:
+    def __init__(self, store, version, kind):
+        self._store = store
+        self._version = version
+        self._kind = kind
+        self._cache = {}
+
+    def _get(self, name, *args):
+        key = (name, args)
+        if key not in self._cache:
+            self._cache[key] = self._store.result(self._version, self._kind, name, args)
+        return self._cache[key]
+
+
+class _RemoteReports(_RemoteResults):
+    def counts(self, dimension):
+        return self._get("counts", dimension)
+
+    def rates(self, dimension):
+        return self._get("rates", dimension)
+
+    def distribution(self, dimension):
+        return self._get("distribution", dimension)
+
+
+class _RemoteAnalytics(_RemoteResults):
+    def summary(self):
+        return self._get("summary")
+
+    def histogram(self, column):
+        return self._get("histogram", column)
+
+    def correlations(self):
+        return self._get("correlations")
+
+    def group_means(self, column):
+        return self._get("group_means", column)
+
+
+# The row orders of the sortable columns, kept in a worker so that sessions
+# patch their filter results here and the data server only reports which
+# changed rows match. A row's sort keys never change once it is in the table
+# (decisions change its status and comments), so each order is built once from
+# the server's keys and then extended with the keys of appended rows. Each order
+# holds the keys, their order and ranks: 24 bytes a row, 24 MB per column at 1M.
+class _RemoteOrders:
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._orders = {}
+
+    # The order of `column`, covering at least the first `rows` rows of `version`
+    def get(self, column, version, rows):
+        with self._lock:
+            order = self._orders.get(column)
+            if order is None or len(order) < rows:
+                keys = self._store.sort_keys(version, column, 0 if order is None else len(order))
+                if order is not None and keys.dtype == order.keys.dtype:
+                    order = order.insert(keys)
+                else:
+                    if order is not None:
+                        # The column was widened (e.g. integers with a missing value); sort it again
+                        keys = self._store.sort_keys(version, column, 0)
+                    order = SortedOrder(keys)
+                self._orders[column] = order
+            return order
+
+
+# Stands in for a TableSnapshot in a worker process. Holds no table data:
+# every read is sent to the data server for this version. A filter returns
+# the positions of every matching row, so a broad one moves 8 bytes a row.
+class RemoteSnapshot:
+    def __init__(self, store, info, orders):
+        self._store = store
+        self._orders = orders
+        self.version, self.updated_at, self._rows, self.status_counts = info
+        self.reports = _RemoteReports(store, self.version, "reports")
+        self.analytics = _RemoteAnalytics(store, self.version, "analytics")
+        self._columns = None
+
+    def __len__(self):
+        return self._rows
+
+    @timed("filter")
+    def filter(self, filter_text, include_approved, sort_by="Application Date", ascending=True):
+        return self._store.filter(self.version, filter_text, include_approved, sort_by, ascending)
+
+    # Only the changed rows' match flags come from the data server; `positions` stays here
+    @timed("filter.patch")
+    def patch_filter(self, positions, changes, filter_text, include_approved, sort_by="Application Date", ascending=True):
+        rows, matches = self._store.match_changed(self.version, changes, filter_text, include_approved)
+        if len(rows) == 0:
+            return positions
+        return patch_positions(self._orders.get(sort_by, self.version, self._rows), positions, rows, matches, ascending)
+
+    @timed("paginate")
+    def fetch_page(self, positions, page, page_size):
+        return paginate(positions, page, page_size, lambda page_positions: self._store.list_rows(self.version, page_positions))
+
+    @timed("lookup")
+    def applicant(self, applicant_id):
+        return self._store.applicant(self.version, applicant_id)
+
+    def applicant_ids(self, positions):
+        return self._store.applicant_ids(self.version, positions)
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = self._store.columns(self.version)
+        return self._columns
+
+    def rows(self, positions):
+        return self._store.rows(self.version, positions)
+
+    def triage_rule(self, applicant_id):
+        return self._store.triage_rule(self.version, applicant_id)
+
+
+class _RemoteAudit:
+    def __init__(self, store):
+        self._store = store
+
+    def history(self, applicant_id):
+        return self._store.history(applicant_id)
+
+
+class _RemoteActivity:
+    def __init__(self, store):
+        self._store = store
+
+    def timeline(self, applicant_id):
+        return self._store.timeline(applicant_id)
+
+    def current_stage_counts(self):
+        return self._store.current_stage_counts()
+
+
+class _RemoteTriage:
+    def __init__(self, store):
+        self._store = store
+
+    def rule_name(self, index):
+        return self._store.rule_name(index)
+
+    def queue(self, index):
+        return self._store.queue(index)
+
+
+# The parts of ApplicantService that sol.py uses, answered by the data server.
+# One thread per worker follows new versions, so sessions wait for them
+# locally just as they do on an ApplicantService.
+class RemoteService:
+    def __init__(self, store):
+        self._store = store
+        self.audit = _RemoteAudit(store)
+        self.activity_log = _RemoteActivity(store)
+        self.triage = _RemoteTriage(store)
+        self._version_changed = threading.Condition()
+        self._orders = _RemoteOrders(store)
+        self._snapshot = RemoteSnapshot(store, store.latest(), self._orders)
+        threading.Thread(target=self._follow, name="data-server-follower", daemon=True).start()
+
+    def _follow(self):
+        while True:
+            try:
+                info = self._store.wait_for_version(self._snapshot.version, follow_timeout_seconds)
+            except (OSError, EOFError) as e:
+                print(f"Lost the connection to the data server: {e}")
+                return
+            if info.version != self._snapshot.version:
+                with self._version_changed:
+                    self._snapshot = RemoteSnapshot(self._store, info, self._orders)
+                    self._version_changed.notify_all()
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        return self._snapshot
+
+    def wait_for_version(self, version, timeout=None):
+        with self._version_changed:
+            self._version_changed.wait_for(lambda: self._snapshot.version > version, timeout)
+            return self._snapshot
+
+    def changes_since(self, version, until=None):
+        return self._store.changes_since(version, until)
+
+    @property
+    def triage_summary(self):
+        return self._store.triage_summary()
+
+    def record_decision(self, applicant_id, status, comments, reviewer=None):
+        return self.record_decisions([applicant_id], status, comments, reviewer)
+
+    # Progress is only reported at the end, since the decision is applied in the data server
+    def record_decisions(self, applicant_ids, status, comments, reviewer=None, on_progress=None):
+        info = self._store.record_decisions(list(applicant_ids), status, comments, reviewer)
+        if on_progress is not None:
+            on_progress(1.0)
+        return info
+
+
+# Connect to the data server at `address` ("host:port")
+def connect(address, authkey):
+    _Manager.register("store")
+    manager = _Manager(address=parse_address(address), authkey=authkey)
+    manager.connect()
+    return RemoteService(manager.store())
+
+
+# Start `workers` Solara processes on consecutive ports from `port`, each
+# connected to the data server at `address`
+def start_workers(workers, port, host, address, authkey, production=True):
+    env = dict(os.environ, **{address_variable: address, authkey_variable: authkey.hex()})
+    processes = []
+    for i in range(workers):
+        command = [sys.executable, "-m", "solara", "run", "sol.py", "--port", str(port + i), "--host", host, "--no-open"]
+        if production:
+            command.append("--production")
+        processes.append(subprocess.Popen(command, env=env))
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the app as several Solara worker processes sharing one data server.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Solara worker processes (default: one per CPU)")
+    parser.add_argument("--port", type=int, default=default_worker_port, help=f"port of the first worker; the others follow (default: {default_worker_port})")
+    parser.add_argument("--host", default="localhost", help="host the workers listen on (default: localhost)")
+    parser.add_argument("--server-port", type=int, default=default_server_port, help=f"port of the data server, on 127.0.0.1 (default: {default_server_port})")
+    args = parser.parse_args(argv)
+
+    # The data server owns the table, the journal and the ingest directory,
+    # configured as in sol.py
+    from data_service import ApplicantService
+    from ingest import Ingestor
+    from triage import load_rules
+
+    triage_rules_path = os.environ.get("TRIAGE_RULES")
+    service = ApplicantService(
+        "applicant_data.xlsx", "decisions.journal", float(os.environ.get("JOURNAL_COMPACTION_INTERVAL", 300)),
+        load_rules(triage_rules_path) if triage_rules_path else None, os.environ.get("LAZY_COLUMNS") == "1"
+    )
+    Ingestor(service, os.environ.get("INGEST_DIRECTORY", "incoming")).start()
+
+    address = f"127.0.0.1:{args.server_port}"
+    authkey = secrets.token_bytes(16)
+    server = create_server(service, parse_address(address), authkey)
+    workers = start_workers(args.workers, args.port, args.host, address, authkey)
+    print(f"Data server on {address}; {args.workers} worker(s) on ports {args.port}-{args.port + args.workers - 1}.")
+
+    # serve_forever() returns by raising SystemExit, on Ctrl+C or (with this handler) SIGTERM
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+if __name__ == "__main__":
+    # Run from the imported module, so what the server sends workers (such as
+    # VersionInfo) is pickled under "data_server" rather than "__main__"
+    from data_server import main
+
+    main()
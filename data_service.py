@@ -0,0 +1,591 @@
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from activity import load_activity
+from analytics import Analytics
+from audit import AuditTrail
+from column_store import ColdColumns, compact_frame, resident_columns
+from indexes import IdIndex, SortedOrder, StatusCounts
+from journal import DecisionJournal, apply_decisions, start_compactor
+from metrics import metrics, timed
+from reporting import ReportingEngine, report_dimensions
+from search_index import SearchIndex
+from snapshot import align_rows, incompatible_columns, load_applicants, mutable_columns, read_snapshot_meta, save_activity, save_snapshot, save_snapshot_meta, snapshot_path_for, split_activity
+from triage import TriageRules
+
+# Columns every applicant table must have
+required_columns = ["Applicant ID", "Application Date", "Full Name", "Status", "Details"]
+
+# Columns the application table can be sorted by, each with its row order computed once
+sortable_columns = ["Application Date", "Rating Score", "Compliance Probability"]
+
+# Columns that tell whether an applicant ID still belongs to the same person
+# when the workbook is rebuilt (a regenerated workbook reuses IDs)
+identity_columns = ["Full Name", "Date of Birth"]
+
+# Columns shown in the applicant list
+list_columns = ["Applicant ID", "Full Name", "Status"]
+
+# One page of the applicant list, with the number of matching applicants and pages
+ApplicantPage = namedtuple("ApplicantPage", ["rows", "total", "page", "page_count"])
+
+# One published decision: the applicants it changed, their new status, and the
+# version it produced. Sessions patch their views from these instead of reloading.
+Change = namedtuple("Change", ["version", "applicant_ids", "status", "timestamp"])
+
+# Outcome of appending new applicants: the version they are in, how many were
+# added, and the IDs of rows that were turned away (missing or duplicate ID)
+AppendResult = namedtuple("AppendResult", ["snapshot", "accepted", "rejected"])
+
+# Rows per block of a text column that decisions rewrite (see _replace_values)
+mutable_block_size = 16_384
+
+# Status given to new applicants that arrive without one
+default_status = "In Progress"
+
+# How many recent changes are kept for sessions that fell behind; a session
+# further behind than this refilters from scratch
+change_feed_size = 1000
+
+
+def _format_dates(dates):
+    return dates.dt.strftime('%Y-%m-%d %H:%M').to_numpy()
+
+
+# One page of `positions`. Only the rows on the page are read, with `read_rows(page_positions)`.
+def paginate(positions, page, page_size, read_rows):
+    total = len(positions)
+    page_count = max((total - 1) // page_size + 1, 1)
+    page = min(max(page, 0), page_count - 1)
+    page_positions = positions[page * page_size:(page + 1) * page_size]
+    return ApplicantPage(read_rows(page_positions), total, page, page_count)
+
+
+# Update a filter result `positions`, ordered by `order`, for the changed
+# `rows`: drop the ones that no longer match and merge in the ones that now do
+def patch_positions(order, positions, rows, matches, ascending=True):
+    if len(rows) == 0:
+        return positions
+    present = np.isin(rows, positions)
+    return order.patch(positions, rows[matches & ~present], rows[~matches & present], ascending)
+
+
+# Split an Arrow column into blocks of at most `mutable_block_size` rows. Long
+# chunks are sliced (without copying); runs of short ones, such as appended
+# batches, are merged so the number of blocks stays in proportion to the rows.
+def _blocks(chunked):
+    import pyarrow as pa
+
+    blocks, run = [], []
+
+    def end_run():
+        if run:
+            blocks.append(run[0] if len(run) == 1 else pa.concat_arrays(run))
+            run.clear()
+
+    for chunk in chunked.chunks:
+        for start in range(0, len(chunk), mutable_block_size):
+            piece = chunk.slice(start, mutable_block_size)
+            if len(piece) == mutable_block_size:
+                end_run()
+                blocks.append(piece)
+            else:
+                run.append(piece)
+                if sum(map(len, run)) >= mutable_block_size:
+                    end_run()
+    end_run()
+    return blocks
+
+
+def _is_arrow_text(values):
+    return isinstance(values.dtype, pd.StringDtype) and values.dtype.storage == "pyarrow"
+
+
+# Which of `chunks` each of `positions` is in, and where each chunk starts
+def _locate(chunks, positions):
+    starts = np.cumsum([0] + [len(chunk) for chunk in chunks])
+    return np.searchsorted(starts, positions, side="right") - 1, starts
+
+
+# The values of one column at `positions`, as a NumPy array. Arrow-backed text
+# is read from just the chunks the positions are in: a take on the whole
+# chunked array would first join every chunk into one.
+def _values_at(values, positions):
+    positions = np.asarray(positions, dtype=np.int64)
+    if not _is_arrow_text(values):
+        return values.iloc[positions].to_numpy()
+    chunks = values.array.__arrow_array__().chunks
+    owners, starts = _locate(chunks, positions)
+    result = np.empty(len(positions), dtype=object)
+    for index in np.unique(owners):
+        selected = owners == index
+        result[selected] = chunks[index].take(positions[selected] - starts[index]).to_numpy(zero_copy_only=False)
+    return result
+
+
+# Copy one column, change some of its values and put it into `frame`. Only that
+# column is duplicated; every other column stays shared with earlier versions.
+# Arrow-backed text (Details) is copied only in the blocks `positions` fall in,
+# so a decision costs the same however long the table is. Other columns (the
+# categorical Status) are one byte per row and copied whole.
+def _replace_values(frame, column, positions, value):
+    values = frame[column]
+    if not _is_arrow_text(values):
+        values = values.copy()
+        values.iloc[positions] = value
+        frame[column] = values
+        return
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    chunked = values.array.__arrow_array__()
+    blocks = _blocks(chunked)
+    positions = np.unique(np.asarray(positions, dtype=np.int64))
+    owners, starts = _locate(blocks, positions)
+    for index in np.unique(owners):
+        block = blocks[index]
+        mask = np.zeros(len(block), dtype=bool)
+        mask[positions[owners == index] - starts[index]] = True
+        blocks[index] = pc.replace_with_mask(block, pa.array(mask), pa.array([value] * int(mask.sum()), type=block.type))
+    frame[column] = pd.Series(pd.array(pa.chunked_array(blocks, type=chunked.type), dtype=values.dtype), index=values.index)
+
+
+# An immutable view of the applicant table at one version. Every render works
+# on one of these, so it never sees a decision half-applied.
+class TableSnapshot:
+    def __init__(self, version, frame, search, sort_orders, status_counts, reports, analytics, triage_matches, date_labels, id_index, updated_at, cold=None):
+        self.version = version
+        self.updated_at = updated_at
+        self.frame = frame
+        self.search = search
+        self.sort_orders = sort_orders
+        self.status_counts = status_counts
+        self.reports = reports
+        self.analytics = analytics
+        self.triage_matches = triage_matches
+        self.date_labels = date_labels
+        self._id_index = id_index
+        self._cold = cold
+
+    def __len__(self):
+        return len(self.frame)
+
+    # Row positions matching the search box and checkbox, in the presorted order of `sort_by`
+    def filter(self, filter_text, include_approved, sort_by="Application Date", ascending=True):
+        with metrics.timer("filter"):
+            matches = self.search.match(filter_text)
+            if not include_approved:
+                matches &= (self.frame['Status'] != "Approved").to_numpy()
+        with metrics.timer("sort"):
+            return self.sort_orders[sort_by].positions(matches, ascending)
+
+    # Bring the result of `filter` on an older version up to this one, given the
+    # changes in between. Only the changed rows are checked against the filter.
+    @timed("filter.patch")
+    def patch_filter(self, positions, changes, filter_text, include_approved, sort_by="Application Date", ascending=True):
+        rows, matches = self.match_changed(changes, filter_text, include_approved)
+        return patch_positions(self.sort_orders[sort_by], positions, rows, matches, ascending)
+
+    # The positions of the rows `changes` touched, and whether each of them
+    # now matches the search box and checkbox
+    def match_changed(self, changes, filter_text, include_approved):
+        applicant_ids = {applicant_id for change in changes for applicant_id in change.applicant_ids}
+        rows = np.array([position for position in map(self.position, applicant_ids) if position is not None], dtype=np.intp)
+        if len(rows) == 0:
+            return rows, np.zeros(0, dtype=bool)
+        matches = self.search.match_rows(filter_text, rows)
+        if not include_approved:
+            matches &= (self.frame['Status'].iloc[rows] != "Approved").to_numpy()
+        return rows, matches
+
+    # Sort keys of `column` from row `start` on
+    def sort_keys(self, column, start=0):
+        return self.sort_orders[column].keys[start:]
+
+    @timed("paginate")
+    def fetch_page(self, positions, page, page_size):
+        return paginate(positions, page, page_size, self.list_rows)
+
+    # The applicant list's columns for the rows at `positions`, as records. Each
+    # column is read at just those positions, so a page costs the same however
+    # long the table is.
+    def list_rows(self, positions):
+        columns = {column: _values_at(self.frame[column], positions).tolist() for column in list_columns}
+        columns['Application Date'] = self.date_labels[positions].tolist()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    def position(self, applicant_id):
+        position = self._id_index.position(applicant_id)
+        # The ID index is shared with newer versions, which may have more rows
+        if position is None or position >= len(self.frame):
+            return None
+        return position
+
+    # One applicant's row, looked up through the ID index. In lazy mode the
+    # columns that are not resident are read from the snapshot file.
+    @timed("lookup")
+    def applicant(self, applicant_id):
+        position = self.position(applicant_id)
+        if position is None:
+            raise KeyError(f"Unknown applicant ID: {applicant_id}")
+        row = self.frame.iloc[position]
+        if self._cold is None:
+            return row
+        return pd.concat([row, self._cold.row(position)]).reindex(self._cold.table_columns)
+
+    # Every column of the table, in order
+    @property
+    def columns(self):
+        return list(self.frame.columns) if self._cold is None else self._cold.table_columns
+
+    # Applicant IDs of the rows at `positions`
+    def applicant_ids(self, positions):
+        return self.frame['Applicant ID'].to_numpy()[positions]
+
+    # Whole rows at `positions`, in that order
+    def rows(self, positions):
+        rows = self.frame.iloc[positions].reset_index(drop=True)
+        if self._cold is None:
+            return rows
+        return pd.concat([rows, self._cold.take(positions)], axis=1)[self._cold.table_columns]
+
+    # Index of the triage rule that routed an applicant, or -1 if none matched
+    def triage_rule(self, applicant_id):
+        position = self.position(applicant_id)
+        return -1 if position is None else int(self.triage_matches[position])
+
+
+# Owns the applicant table for the whole process. Sessions read immutable
+# snapshots; writes are serialized by one lock and publish a new snapshot that
+# shares every untouched column with the previous one.
+# With `lazy_columns`, only `resident_columns` are kept in memory (in compact
+# dtypes) and the rest of an applicant's row is read from the snapshot on demand.
+class ApplicantService:
+    def __init__(self, excel_path, journal_path, compaction_interval=None, triage_rules=None, lazy_columns=False, audit_directory=None):
+        self.triage = TriageRules(triage_rules)
+
+        # Load data from the columnar snapshot, rebuilt from the Excel file only when it changes.
+        # In lazy mode the columns only triage and reporting read are loaded too, and dropped once they are counted.
+        self.excel_path = excel_path
+        self.snapshot_path = snapshot_path_for(excel_path)
+        columns = None
+        if lazy_columns:
+            columns = set(resident_columns) | set(self.triage.columns) | {column for column, _ in report_dimensions.values()}
+        # Every decision is also kept, with what it replaced, in the audit trail (next to the journal by default)
+        self.audit = AuditTrail(Path(journal_path).parent / "audit" if audit_directory is None else audit_directory)
+
+        # Decisions are appended to a journal instead of rewriting the data on every click
+        self.journal = DecisionJournal(journal_path)
+
+        # A decision is committed by its journal entry, which names its last
+        # audit record; compaction records how far the saved snapshot goes.
+        # Audit records past both are from a decision that failed or crashed
+        # before it was journaled.
+        meta = read_snapshot_meta(self.snapshot_path)
+        committed = [sequence for sequence in (self.journal.last_audit_sequence(), meta.get("audit") if meta else None) if sequence is not None]
+        if committed:
+            discarded = self.audit.discard_after(max(committed))
+            if discarded:
+                print(f"Discarded {discarded} audit records of a decision that was never journaled.")
+
+        # A snapshot rebuilt from the workbook gets the decisions compaction
+        # had folded into the previous one back from the audit trail
+        def reapply_decisions(df):
+            decisions = self._folded_decisions(df, meta.get("audit") if meta else None)
+            reapplied = apply_decisions(df, decisions.rename(columns={"Comment": "Details"}))
+            if reapplied:
+                print(f"{excel_path} changed; reapplied the latest decision of {reapplied} applicants from the audit trail.")
+
+        df, self.source_fingerprint = load_applicants(excel_path, self.snapshot_path, columns, reapply_decisions)
+
+        # Ensure the DataFrame contains the expected columns
+        if not all(col in df.columns for col in required_columns):
+            raise ValueError(f"The Excel file must contain the following columns: {required_columns}")
+
+        # Activity events (one row per reached stage), indexed by applicant
+        self.activity_log = load_activity(self.snapshot_path)
+
+        self.journal.replay(df)
+        # Every audit record so far is committed from here on
+        self._audit_sequence = self.audit.last_sequence
+        if not committed:
+            save_snapshot_meta(self.snapshot_path, self.source_fingerprint, self._audit_sequence)
+
+        # Route applicants without a reviewer decision by the triage rules
+        self.triage_matches = self.triage.apply(df)
+        self.triage_summary = self.triage.summary(self.triage_matches)
+        self.reporting = ReportingEngine(df)
+
+        self.cold = None
+        if lazy_columns:
+            import pyarrow.parquet as pq
+
+            table_columns = [column for column in pq.read_schema(self.snapshot_path).names if column != "Activity Feed"]
+            hot = [column for column in table_columns if column in resident_columns]
+            self.cold = ColdColumns(self.snapshot_path, [column for column in table_columns if column not in hot], table_columns)
+            df = compact_frame(df[hot])
+
+        # Indexes and counters, built once here and kept current by each write
+        self.search_index = SearchIndex(df)
+        self.id_index = IdIndex(df['Applicant ID'])
+        self.status_counter = StatusCounts(df['Status'])
+        self.sort_orders = {column: SortedOrder(df[column]) for column in sortable_columns}
+        self.date_labels = _format_dates(df['Application Date'])
+
+        # Held while a decision is journaled and applied, so compaction never sees half of one
+        self.write_lock = threading.Lock()
+        self._version_changed = threading.Condition()
+        self._listeners = []
+        self._changes = deque(maxlen=change_feed_size)
+        self._activity_unsaved = False
+        self._snapshot = None
+        self._publish(df)
+
+        # Applicants ingested since the last compaction are only in the journal;
+        # append them again, with the decisions made on them since
+        appended = self.journal.appended_rows()
+        if appended is not None:
+            self.journal.replay(appended)
+            if "Activity Feed" in appended.columns:
+                # Their activity may already have been saved, by a compaction that ran while they arrived
+                saved = appended['Applicant ID'].isin(self.activity_log.all_events()['Applicant ID']).to_numpy()
+                appended.loc[saved, 'Activity Feed'] = None
+            self.append_applicants(appended, journal=False)
+
+        if compaction_interval:
+            start_compactor(self.journal, self.write_lock, lambda: self._snapshot.frame, self.save, compaction_interval)
+
+    # The latest audited decision of each applicant (up to `audit_sequence`)
+    # that the current snapshot holds, for applicants that are the same person
+    # in the workbook table `df`. Decisions on IDs the workbook gives to
+    # someone else, as a regenerated one does, are left out.
+    def _folded_decisions(self, df, audit_sequence):
+        import pyarrow.parquet as pq
+
+        decisions = self.audit.latest(audit_sequence)
+        if not self.snapshot_path.exists() or not len(decisions):
+            return decisions.iloc[:0]
+        identity = [column for column in identity_columns if column in df.columns and column in pq.read_schema(self.snapshot_path).names]
+        previous = pd.read_parquet(self.snapshot_path, columns=['Applicant ID', 'Status', 'Details'] + identity)
+        previous = previous.drop_duplicates('Applicant ID').set_index('Applicant ID')
+        workbook = df.drop_duplicates('Applicant ID').set_index('Applicant ID')
+        decisions = decisions[decisions.index.isin(previous.index) & decisions.index.isin(workbook.index)]
+        held = previous.loc[decisions.index]
+        # Decided in the trail and still so in the previous snapshot
+        keep = (held['Status'].astype(str) == decisions['Status'].astype(str)) & (held['Details'].fillna('').astype(str) == decisions['Comment'].fillna('').astype(str))
+        for column in identity:
+            keep &= held[column].astype(str) == workbook.loc[decisions.index, column].astype(str)
+        skipped = int((~keep).sum())
+        if skipped:
+            print(f"Not reapplying the audited decision of {skipped} applicants: the previous snapshot does not hold it, or the workbook has someone else under that ID.")
+        return decisions[keep]
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        return self._snapshot
+
+    # `changed_columns` are the columns that differ from the previous version;
+    # analytics over the other columns are carried over instead of recomputed
+    def _publish(self, frame, applicant_ids=(), status=None, changed_columns=None):
+        if self._snapshot is None:
+            version, analytics = 0, Analytics(frame)
+        else:
+            version = self._snapshot.version + 1
+            analytics = self._snapshot.analytics.carry_over(frame, frame.columns if changed_columns is None else changed_columns)
+        updated_at = datetime.now()
+        with metrics.timer("count"):
+            status_counts = self.status_counter.snapshot()
+        snapshot = TableSnapshot(
+            version, frame, self.search_index.view(), dict(self.sort_orders), status_counts,
+            self.reporting.view(), analytics, self.triage_matches, self.date_labels, self.id_index, updated_at, self.cold
+        )
+        with self._version_changed:
+            if version:
+                self._changes.append(Change(version, tuple(applicant_ids), status, updated_at))
+            self._snapshot = snapshot
+            self._version_changed.notify_all()
+        for listener in list(self._listeners):
+            listener(snapshot)
+        return snapshot
+
+    # Block until a version newer than `version` is published, or until `timeout`
+    # passes; returns the latest snapshot either way
+    def wait_for_version(self, version, timeout=None):
+        with self._version_changed:
+            self._version_changed.wait_for(lambda: self._snapshot.version > version, timeout)
+            return self._snapshot
+
+    # The changes that lead from `version` to `until` (default: the latest), or
+    # None when some of them have already dropped out of the change feed
+    def changes_since(self, version, until=None):
+        with self._version_changed:
+            until = self._snapshot.version if until is None else until
+            if version >= until:
+                return []
+            if not self._changes or self._changes[0].version > version + 1:
+                return None
+            return [change for change in self._changes if version < change.version <= until]
+
+    # Call `listener(snapshot)` after every new version; returns a function that unsubscribes
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    @timed("save")
+    def save(self, frame=None):
+        frame = self._snapshot.frame if frame is None else frame
+        # Every decision up to this audit record is in `frame` or still in the journal
+        audit_sequence = self._audit_sequence
+        if self.cold is None:
+            save_snapshot(frame, self.snapshot_path, self.source_fingerprint, audit_sequence)
+        else:
+            self.cold.save(frame, self.source_fingerprint, audit_sequence)
+        # Activity of appended applicants only exists in memory until it is saved
+        unsaved, self._activity_unsaved = self._activity_unsaved, False
+        if unsaved:
+            try:
+                save_activity(self.activity_log.all_events(), self.snapshot_path)
+            except Exception:
+                self._activity_unsaved = True
+                raise
+
+    # Raise ValueError if `rows` cannot be appended: a required column is
+    # missing, or a column holds values the table's column cannot store
+    def check_applicants(self, rows):
+        missing = [column for column in required_columns if column not in rows.columns]
+        if missing:
+            raise ValueError(f"New applicants must have the following columns: {missing}")
+        dtypes = self._snapshot.frame.dtypes
+        if self.cold is not None:
+            dtypes = pd.concat([dtypes, self.cold.dtypes])
+        incompatible = incompatible_columns(rows, dtypes)
+        if incompatible:
+            raise ValueError(f"New applicants have values of the wrong type in: {incompatible}")
+
+    # Add new applicants to the live table. Rows are checked, triaged and
+    # appended in one step, and every index and counter is extended rather
+    # than rebuilt. Raises ValueError (see check_applicants) before anything
+    # changes. The accepted rows are journaled, unless `journal` is False
+    # because they are being replayed from the journal.
+    @timed("append")
+    def append_applicants(self, rows, journal=True):
+        rows = rows.reset_index(drop=True)
+        with self.write_lock:
+            current = self._snapshot
+            self.check_applicants(rows)
+
+            # Turn away rows without an ID, or with an ID that is already taken
+            applicant_ids = rows['Applicant ID']
+            valid = (applicant_ids.notna() & ~applicant_ids.duplicated() & ~self.id_index.contains(applicant_ids)).to_numpy()
+            rejected = list(applicant_ids[~valid])
+            accepted = rows[valid]
+            if len(accepted) == 0:
+                return AppendResult(current, 0, rejected)
+
+            # Build the new version and its indexes first; nothing shared is
+            # changed until all of it has been built and journaled
+            new_rows, events = split_activity(accepted)
+            frame, aligned = align_rows(new_rows, current.frame)
+            cold_rows = None
+            if self.cold is not None:
+                # Triage and reporting still see the whole row; the cold columns go to the column store
+                cold_rows = new_rows.reindex(columns=self.cold.columns).set_axis(aligned.index)
+                aligned = pd.concat([aligned, cold_rows], axis=1)
+            new_rows = aligned
+            new_rows['Status'] = new_rows['Status'].fillna(default_status)
+            triage_matches = np.concatenate([self.triage_matches, self.triage.apply(new_rows)])
+            if self.cold is not None:
+                new_rows = new_rows[frame.columns]
+            frame = pd.concat([frame, new_rows], ignore_index=True)
+
+            sort_orders = dict(self.sort_orders)
+            for column in sortable_columns:
+                if frame[column].dtype == current.frame[column].dtype:
+                    sort_orders[column] = sort_orders[column].insert(new_rows[column])
+                else:
+                    # The column was widened (e.g. integers with a missing value); sort it again
+                    sort_orders[column] = SortedOrder(frame[column])
+            date_labels = np.concatenate([self.date_labels, _format_dates(new_rows['Application Date'])])
+            triage_summary = self.triage.summary(triage_matches)
+            new_ids = list(new_rows['Applicant ID'])
+            events = events[events['Applicant ID'].isin(new_ids)]
+
+            # Journal the rows so they survive a restart, then put them in place
+            if journal:
+                self.journal.append_rows(accepted)
+            self.search_index.append(new_rows)
+            self.reporting.append(aligned)
+            if self.cold is not None:
+                self.cold.append(cold_rows)
+            self.id_index.append(new_ids)
+            self.status_counter.add(new_rows['Status'])
+            self.sort_orders, self.date_labels = sort_orders, date_labels
+            self.triage_matches, self.triage_summary = triage_matches, triage_summary
+            if len(events):
+                self.activity_log.append(events)
+                self._activity_unsaved = True
+            return AppendResult(self._publish(frame, new_ids), len(new_rows), rejected)
+
+    def record_decision(self, applicant_id, status, comments, reviewer=None):
+        return self.record_decisions([applicant_id], status, comments, reviewer)
+
+    # Apply one status and comment to many applicants at once: all of them are
+    # checked before anything is written, the batch is one journal line, and the
+    # table changes in one vectorized update published as one version.
+    # `on_progress(fraction)` is called as each step finishes.
+    @timed("decision")
+    def record_decisions(self, applicant_ids, status, comments, reviewer=None, on_progress=None):
+        def progress(fraction):
+            if on_progress is not None:
+                on_progress(fraction)
+
+        applicant_ids = list(dict.fromkeys(applicant_ids))
+        with self.write_lock:
+            current = self._snapshot
+            positions = [current.position(applicant_id) for applicant_id in applicant_ids]
+            unknown = [applicant_id for applicant_id, position in zip(applicant_ids, positions) if position is None]
+            if unknown:
+                raise KeyError(f"Unknown applicant ID{'s' if len(unknown) > 1 else ''}: {', '.join(map(str, unknown[:10]))}")
+            if not positions:
+                return current
+            progress(0.25)
+
+            # Build the new version before journaling, so a failure up to here changes nothing
+            frame = current.frame.copy(deep=False)
+            old_statuses = _values_at(frame['Status'], positions)
+            old_comments = _values_at(frame['Details'], positions)
+            _replace_values(frame, 'Status', positions, status)
+            _replace_values(frame, 'Details', positions, comments)
+            progress(0.5)
+
+            # Audit, then journal the decision so it survives a crash, then publish
+            # it in a new version. The journal entry commits the decision: if it
+            # cannot be written, the audit records are taken back, and records
+            # a crash left without an entry are discarded on the next start.
+            audit_sequence = self.audit.record(applicant_ids, old_statuses, old_comments, status, comments, reviewer)
+            try:
+                if len(applicant_ids) == 1:
+                    self.journal.append(applicant_ids[0], status, comments, reviewer, audit_sequence)
+                else:
+                    self.journal.append_batch(applicant_ids, status, comments, reviewer, audit_sequence)
+            except Exception:
+                self.audit.discard_after(self._audit_sequence)
+                raise
+            self._audit_sequence = audit_sequence
+            progress(0.75)
+
+            self.status_counter.move(old_statuses, status)
+            self.reporting.move(positions, old_statuses, status)
+            self.search_index.update(positions, 'Status', status)
+            snapshot = self._publish(frame, applicant_ids, status, mutable_columns)
+        progress(1.0)
+        return snapshot
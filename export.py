@@ -0,0 +1,191 @@
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from metrics import metrics
+
+# Rows read from the table and written out at a time
+export_chunk_rows = 50_000
+
+# Exports running at once; further jobs wait for a free slot
+export_workers = 2
+
+# Finished exports are written under Solara's public directory, each in a
+# directory with a random name, so the download link is served as a plain
+# static file and cannot be guessed
+export_directory = Path("public") / "exports"
+export_url_prefix = "/static/public/exports/"
+
+# Exports older than this (in seconds) are deleted when a new one starts
+export_retention_seconds = 24 * 60 * 60
+
+# Most rows an xlsx sheet can hold, besides the header row
+max_xlsx_rows = 1_048_575
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# Uses openpyxl's write-only mode, which streams rows to the file instead of
+# keeping the sheet in memory
+class _XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Applicants")
+        self._header = True
+
+    def write(self, chunk):
+        if self._header:
+            self._sheet.append(list(chunk.columns))
+            self._header = False
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+export_formats = {"csv": _CsvWriter, "parquet": _ParquetWriter, "xlsx": _XlsxWriter}
+
+
+# One export of a set of rows from a table snapshot. `state` is "queued",
+# "running", "done", "failed" or "cancelled"; `url` is set once it is done.
+class ExportJob:
+    def __init__(self, snapshot, positions, file_format, filename):
+        self.id = secrets.token_urlsafe(16)
+        self.snapshot = snapshot
+        self.positions = positions
+        self.file_format = file_format
+        self.filename = filename
+        self.state = "queued"
+        self.rows_written = 0
+        self.error = None
+        self.url = None
+        self.created_at = datetime.now()
+        self._cancel = threading.Event()
+
+    @property
+    def total(self):
+        return len(self.positions)
+
+    @property
+    def progress(self):
+        return self.rows_written / self.total if self.total else 1.0
+
+    def cancel(self):
+        self._cancel.set()
+
+
+# Runs export jobs on a small thread pool. Each job reads its snapshot (which
+# later decisions never change) one chunk of rows at a time and appends the
+# chunk to the output file, so memory use does not grow with the export.
+class ExportManager:
+    def __init__(self, directory=export_directory, workers=export_workers):
+        self.directory = Path(directory)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+
+    # Export the rows at `positions` (in that order) of `snapshot`.
+    # `on_progress(job)` is called after every chunk and when the job ends.
+    def start(self, snapshot, positions, file_format, on_progress=None):
+        if file_format not in export_formats:
+            raise ValueError(f"Unknown export format: {file_format}")
+        if file_format == "xlsx" and len(positions) > max_xlsx_rows:
+            raise ValueError(f"xlsx exports are limited to {max_xlsx_rows} rows; use csv or parquet")
+        self.remove_expired()
+        filename = f"applicants-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{file_format}"
+        job = ExportJob(snapshot, positions, file_format, filename)
+        self._pool.submit(self._run, job, on_progress or (lambda job: None))
+        return job
+
+    def _run(self, job, on_progress):
+        job.state = "running"
+        on_progress(job)
+        directory = self.directory / job.id
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / job.filename
+        tmp_path = directory / (job.filename + ".tmp")
+        try:
+            with metrics.timer("export"):
+                writer = export_formats[job.file_format](tmp_path)
+                try:
+                    for start in range(0, job.total, export_chunk_rows):
+                        if job._cancel.is_set():
+                            job.state = "cancelled"
+                            break
+                        chunk = job.snapshot.rows(job.positions[start:start + export_chunk_rows])
+                        writer.write(chunk)
+                        job.rows_written += len(chunk)
+                        on_progress(job)
+                    else:
+                        if job.total == 0:
+                            writer.write(job.snapshot.rows(job.positions[:0]))
+                finally:
+                    writer.close()
+            if job.state == "cancelled":
+                tmp_path.unlink(missing_ok=True)
+                directory.rmdir()
+            else:
+                os.replace(tmp_path, path)
+                job.url = f"{export_url_prefix}{job.id}/{job.filename}"
+                job.state = "done"
+                metrics.increment("export.rows", job.rows_written)
+        except Exception as e:
+            job.state, job.error = "failed", e
+            tmp_path.unlink(missing_ok=True)
+            print(f"Export {job.filename} failed: {e}")
+        # The snapshot is only needed while the job runs
+        job.snapshot = None
+        on_progress(job)
+
+    # Delete exports older than `export_retention_seconds`
+    def remove_expired(self):
+        if not self.directory.exists():
+            return
+        cutoff = time.time() - export_retention_seconds
+        for directory in self.directory.iterdir():
+            try:
+                if directory.is_dir() and directory.stat().st_mtime < cutoff:
+                    for path in directory.iterdir():
+                        path.unlink()
+                    directory.rmdir()
+            except OSError as e:
+                print(f"Could not remove the old export {directory.name}: {e}")
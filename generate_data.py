@@ -1,6 +1,10 @@
+import argparse
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-import random
-from datetime import datetime, timedelta
+
+from activity import activity_stages
 
 # Constants
 statuses = ["Approved", "In Progress", "Alerts", "Pending Approval", "Rejected"]
@@ -9,113 +13,190 @@ nationalities = ["Malaysian", "Singaporean", "Indonesian", "Thai", "Vietnamese",
 occupations = ["Engineer", "Doctor", "Teacher", "Lawyer", "Artist", "Nurse", "Scientist", "Manager", "Accountant"]
 income_ranges = [(30000, 50000), (50001, 100000), (100001, 200000), (200001, 500000)]
 risk_levels = ["Low", "Medium", "High"]
+remarks = [
+    "All documents are complete.",
+    "Pending verification of income details.",
+    "Additional documents required.",
+    "Awaiting user response.",
+    "-"
+]
+genders = ["Male", "Female"]
+streets = ['Merdeka', 'Jaya', 'Setia', 'Pahlawan']
+cities = ['Kuala Lumpur', 'Bangkok', 'Hanoi', 'Jakarta', 'Manila']
+employment_statuses = ["Employed", "Unemployed", "Self-employed"]
+sources_of_funds = ["Savings", "Loan", "Gift", "Inheritance", "Income"]
 
 # List of realistic names from various Southeast Asian countries
-first_names = ["Ahmad", "Siti", "Mohamed", "Aishah", "Daniel", "Fatimah", 
-               "Ryan", "Nur", "Zain", "Rina", "Nguyen", "Tao", "Ayu", 
+first_names = ["Ahmad", "Siti", "Mohamed", "Aishah", "Daniel", "Fatimah",
+               "Ryan", "Nur", "Zain", "Rina", "Nguyen", "Tao", "Ayu",
                "Juan", "Maria", "Sophea", "Lai", "Khin"]
-last_names = ["Ali", "Chong", "Kumar", "Tan", "Abdullah", "Mohd", 
+last_names = ["Ali", "Chong", "Kumar", "Tan", "Abdullah", "Mohd",
               "Omar", "Lim", "Hernandez", "Santos", "Ng", "Yap", "Mala", "Soe"]
 
-# Possible activity stages
-activity_stages = [
-    "Application Submitted",
-    "Verification Started",
-    "Initial Review Completed",
-    "Request for Additional Information",
-    "User Responded with Additional Information",
-    "Final Review Completed",
-    "Verification Completed",
-    "Notification Sent to User"
-]
-
-# Function to create dummy data
-def create_dummy_data(num_rows):
-    data = []
-    for i in range(num_rows):
-        applicant_id = f"APP{i+1:03}"
-        applicant_date = datetime.now() - timedelta(days=random.randint(1, 30), hours=random.randint(0, 23), minutes=random.randint(0, 59))
-        full_name = f"{random.choice(first_names)} {random.choice(last_names)}"
-        status = random.choice(statuses)
-        rating_score = random.randint(1, 10)
-        additional_remarks = random.choice([
-            "All documents are complete.", 
-            "Pending verification of income details.", 
-            "Additional documents required.", 
-            "Awaiting user response.", 
-            "-"
-        ])
-        dob = datetime.now() - timedelta(days=random.randint(18 * 365, 65 * 365))
-        gender = random.choice(["Male", "Female"])
-        race = random.choice(races)
-        nationality = random.choice(nationalities)
-        address = f"{random.randint(1, 100)}, Jalan {random.choice(['Merdeka', 'Jaya', 'Setia', 'Pahlawan'])}, {random.choice(['Kuala Lumpur', 'Bangkok', 'Hanoi', 'Jakarta', 'Manila'])}"
-        employment_status = random.choice(["Employed", "Unemployed", "Self-employed"])
-        occupation = random.choice(occupations)
-        annual_income = random.randint(*random.choice(income_ranges))
-        net_worth = round(annual_income * random.uniform(1, 5))
-        attempts = random.randint(1, 5)
-        time_taken = random.randint(30, 120)
-        source_of_funds = random.choice(["Savings", "Loan", "Gift", "Inheritance", "Income"])
-        risk_level = random.choice(risk_levels)
-        compliance_probability = random.randint(0, 100)
-
-        # Randomly determine how far along the application is
-        current_stage_index = random.randint(0, len(activity_stages) - 1)
-        activity_feed = []
-        for stage_index in range(current_stage_index + 1):
-            timestamp = applicant_date + timedelta(hours=stage_index)
-            activity_feed.append(f"{activity_stages[stage_index]} - {timestamp.strftime('%Y-%m-%d %H:%M')}")
-
-        # Fill in the remaining stages as "N/A"
-        for stage in activity_stages[current_stage_index + 1:]:
-            activity_feed.append(f"{stage} - N/A")
-
-        # Randomly assign PHOTO MATCHED and IC VERIFIED
-        photo_matched = random.randint(0, 1)
-        ic_verified = random.randint(0, 1)
-
-        data.append([
-            applicant_id, 
-            applicant_date.strftime('%Y-%m-%d %H:%M'),
-            full_name, 
-            status, 
-            rating_score, 
-            additional_remarks, 
-            dob.strftime('%Y-%m-%d'),
-            gender, 
-            race, 
-            nationality, 
-            address, 
-            employment_status, 
-            occupation, 
-            annual_income, 
-            net_worth, 
-            attempts, 
-            time_taken, 
-            source_of_funds, 
-            risk_level, 
-            compliance_probability,
-            "\n".join(activity_feed),
-            photo_matched,
-            ic_verified
-        ])
-    
-    return data
-
-# Create DataFrame
 columns = [
     "Applicant ID", "Application Date", "Full Name", "Status", "Rating Score",
-    "Details", "Date of Birth", "Gender", "Race", "Nationality", 
-    "Address", "Employment Status", "Occupation", "Annual Income (RM)", 
-    "Net Worth (RM)", "Attempt of Application", "Time Taken (minutes)", 
-    "Source of Funds", "Risk Level", "Compliance Probability", 
+    "Details", "Date of Birth", "Gender", "Race", "Nationality",
+    "Address", "Employment Status", "Occupation", "Annual Income (RM)",
+    "Net Worth (RM)", "Attempt of Application", "Time Taken (minutes)",
+    "Source of Funds", "Risk Level", "Compliance Probability",
     "Activity Feed", "PHOTO MATCHED", "IC VERIFIED"
 ]
 
-dummy_data = create_dummy_data(50)
-df = pd.DataFrame(dummy_data, columns=columns)
+output_formats = ["xlsx", "csv", "parquet", "native"]
+
+# Excel sheets hold at most 1,048,576 rows, one of which is the header
+max_excel_rows = 1_048_575
+
+
+def _choice(rng, options, size):
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), size)]
+
+
+def _concat(*parts):
+    # Element-wise string concatenation of arrays and scalars
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add(result, part)
+    return result
+
+
+def _format_minutes(timestamps):
+    return np.char.replace(np.datetime_as_string(timestamps.astype("datetime64[m]"), unit="m"), "T", " ")
+
+
+# Function to create one chunk of dummy data, starting at applicant number `start`
+def create_dummy_data(num_rows, rng, start=0, as_of=None):
+    now = np.datetime64(as_of or datetime.now(), "m")
+    minutes_per_day = 24 * 60
+
+    applicant_ids = _concat("APP", np.char.zfill(np.arange(start + 1, start + num_rows + 1).astype(str), 3))
+    applicant_dates = now - (
+        rng.integers(1, 31, num_rows) * minutes_per_day
+        + rng.integers(0, 24, num_rows) * 60
+        + rng.integers(0, 60, num_rows)
+    ).astype("timedelta64[m]")
+    full_names = _concat(_choice(rng, first_names, num_rows).astype(str), " ", _choice(rng, last_names, num_rows).astype(str))
+    dates_of_birth = np.datetime_as_string(
+        (now - (rng.integers(18 * 365, 65 * 365 + 1, num_rows) * minutes_per_day).astype("timedelta64[m]")).astype("datetime64[D]")
+    )
+    addresses = _concat(
+        rng.integers(1, 101, num_rows).astype(str), ", Jalan ", _choice(rng, streets, num_rows).astype(str),
+        ", ", _choice(rng, cities, num_rows).astype(str)
+    )
+
+    income_bounds = np.asarray(income_ranges)[rng.integers(0, len(income_ranges), num_rows)]
+    annual_incomes = rng.integers(income_bounds[:, 0], income_bounds[:, 1] + 1)
+    net_worths = np.rint(annual_incomes * rng.uniform(1, 5, num_rows)).astype(np.int64)
+
+    # Randomly determine how far along each application is; later stages are "N/A"
+    current_stage_index = rng.integers(0, len(activity_stages), num_rows)
+    activity_feed = None
+    for stage_index, stage in enumerate(activity_stages):
+        reached = stage_index <= current_stage_index
+        stamps = np.where(reached, _format_minutes(applicant_dates + np.timedelta64(stage_index, "h")), "N/A")
+        entry = _concat(f"{stage} - ", stamps)
+        activity_feed = entry if activity_feed is None else _concat(activity_feed, "\n", entry)
+
+    data = {
+        "Applicant ID": applicant_ids,
+        "Application Date": _format_minutes(applicant_dates),
+        "Full Name": full_names,
+        "Status": _choice(rng, statuses, num_rows),
+        "Rating Score": rng.integers(1, 11, num_rows),
+        "Details": _choice(rng, remarks, num_rows),
+        "Date of Birth": dates_of_birth,
+        "Gender": _choice(rng, genders, num_rows),
+        "Race": _choice(rng, races, num_rows),
+        "Nationality": _choice(rng, nationalities, num_rows),
+        "Address": addresses,
+        "Employment Status": _choice(rng, employment_statuses, num_rows),
+        "Occupation": _choice(rng, occupations, num_rows),
+        "Annual Income (RM)": annual_incomes,
+        "Net Worth (RM)": net_worths,
+        "Attempt of Application": rng.integers(1, 6, num_rows),
+        "Time Taken (minutes)": rng.integers(30, 121, num_rows),
+        "Source of Funds": _choice(rng, sources_of_funds, num_rows),
+        "Risk Level": _choice(rng, risk_levels, num_rows),
+        "Compliance Probability": rng.integers(0, 101, num_rows),
+        "Activity Feed": activity_feed,
+        # Randomly assign PHOTO MATCHED and IC VERIFIED
+        "PHOTO MATCHED": rng.integers(0, 2, num_rows),
+        "IC VERIFIED": rng.integers(0, 2, num_rows),
+    }
+    return pd.DataFrame({column: data[column] for column in columns})
+
+
+# Generate `num_rows` applicants as a sequence of DataFrames of at most `chunk_size` rows.
+# The same seed, row count, chunk size and `as_of` time always give the same data.
+def generate_chunks(num_rows, seed=42, chunk_size=100_000, as_of=None):
+    rng = np.random.default_rng(seed)
+    as_of = as_of or datetime.now()
+    for start in range(0, num_rows, chunk_size):
+        yield create_dummy_data(min(chunk_size, num_rows - start), rng, start, as_of)
+
+
+def write_chunks(chunks, output_format, output_path):
+    if output_format == "native":
+        from snapshot import write_snapshot_chunks
+        return write_snapshot_chunks(chunks, output_path)
+
+    rows = 0
+    if output_format == "csv":
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+    elif output_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif output_format == "xlsx":
+        with pd.ExcelWriter(output_path) as writer:
+            for chunk in chunks:
+                chunk.to_excel(writer, index=False, header=rows == 0, startrow=0 if rows == 0 else rows + 1)
+                rows += len(chunk)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+    return rows
+
+
+def default_output_path(output_format):
+    if output_format == "native":
+        from snapshot import snapshot_path_for
+        return str(snapshot_path_for("applicant_data.xlsx"))
+    return f"applicant_data.{output_format}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate dummy applicants' data.")
+    parser.add_argument("-n", "--rows", type=int, default=50, help="number of applicants to generate (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default: 42)")
+    parser.add_argument("--format", choices=output_formats, default="xlsx",
+                        help="output format; 'native' writes the app's Parquet snapshot directly (default: xlsx)")
+    parser.add_argument("-o", "--output", help="output file (default: applicant_data.<format>, or the app's snapshot for 'native')")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows generated and written per chunk (default: 100000)")
+    parser.add_argument("--as-of", type=datetime.fromisoformat,
+                        help="reference time application dates are generated relative to, e.g. 2024-11-01T12:00 (default: now)")
+    args = parser.parse_args(argv)
+
+    if args.format == "xlsx" and args.rows > max_excel_rows:
+        parser.error(f"xlsx output is limited to {max_excel_rows} rows; use --format csv, parquet or native")
+
+    output_path = args.output or default_output_path(args.format)
+    chunks = generate_chunks(args.rows, args.seed, args.chunk_size, args.as_of)
+    rows = write_chunks(chunks, args.format, output_path)
+    print(f"Applicant data ({rows} rows) saved to '{output_path}'.")
+
 
-# Save to Excel
-df.to_excel("applicant_data.xlsx", index=False)
-print("Applicant data saved to 'applicant_data.xlsx'.")
+if __name__ == "__main__":
+    main()
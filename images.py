@@ -0,0 +1,164 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+# Picture shown for applicants without a photo of their own
+default_picture_path = "default_profile_picture.jpg"
+
+# Photo files, named after the applicant ID (e.g. "APP001.jpg")
+photo_extensions = [".jpg", ".jpeg", ".png", ".webp"]
+
+# Photos are downscaled to fit this box (in pixels) before they are sent
+thumbnail_size = (240, 240)
+
+# Encoded thumbnails kept in memory, in bytes; the least recently shown go first
+thumbnail_cache_bytes = 16 * 1024 * 1024
+
+# How often (in seconds) the photo directory is checked for added or renamed files
+rescan_interval_seconds = 5.0
+
+# Thumbnails are written under Solara's public directory and served from there.
+# The file name is the MD5 of the content, which is also the hash Solara checks
+# for `?v=` URLs, so browsers cache each thumbnail for good and identical
+# pictures share one URL.
+thumbnail_directory = Path("public") / "thumbnails"
+thumbnail_url_prefix = "/static/public/thumbnails/"
+
+# An encoded thumbnail and the content-addressed URL it is served at
+Thumbnail = namedtuple("Thumbnail", ["digest", "data", "url"])
+
+
+# Photo file per applicant ID. The directory is listed again only when its
+# modification time changes (checked at most every `rescan_interval_seconds`),
+# so looking a photo up does not touch the disk. Replace a photo by writing a
+# new file and renaming it into place, which changes the directory.
+class PhotoDirectory:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._files = {}
+        self._sources = {}
+        self._directory_mtime = None
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < rescan_interval_seconds:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._directory_mtime:
+            return
+        files = {}
+        if mtime is not None:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    stem, extension = os.path.splitext(entry.name)
+                    if extension.lower() in photo_extensions:
+                        files[stem] = entry.path
+        self._files, self._sources, self._directory_mtime = files, {}, mtime
+
+    # (path, modification time, size) of an applicant's photo, or None
+    def source(self, applicant_id):
+        with self._lock:
+            self._refresh()
+            source = self._sources.get(applicant_id)
+            path = self._files.get(str(applicant_id))
+        if source is not None or path is None:
+            return source
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        source = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._sources[applicant_id] = source
+        return source
+
+
+def _encode_thumbnail(path):
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(thumbnail_size)
+        buffer = BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.save(buffer, format="PNG", optimize=True)
+            extension = ".png"
+        else:
+            image.convert("RGB").save(buffer, format="JPEG", quality=85)
+            extension = ".jpg"
+    data = buffer.getvalue()
+    return hashlib.md5(data).hexdigest(), data, extension
+
+
+# Downscaled profile pictures, decoded once per photo version and kept in an LRU
+# cache with a byte budget
+class ProfilePictures:
+    def __init__(self, photo_directory, default_path=default_picture_path, public_directory=thumbnail_directory, cache_bytes=thumbnail_cache_bytes):
+        self.photos = PhotoDirectory(photo_directory)
+        self.default_path = Path(default_path)
+        self.public_directory = Path(public_directory)
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._default_source = None
+        self.hits = 0
+        self.misses = 0
+
+    def _publish(self, digest, data, extension):
+        name = digest + extension
+        path = self.public_directory / name
+        # Content-addressed: a file with this name already holds these bytes
+        if not path.exists():
+            self.public_directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return f"{thumbnail_url_prefix}{name}?v={digest[:12]}"
+
+    def _thumbnail(self, source):
+        with self._lock:
+            thumbnail = self._cache.get(source)
+            if thumbnail is not None:
+                self._cache.move_to_end(source)
+                self.hits += 1
+                return thumbnail
+            self.misses += 1
+
+        digest, data, extension = _encode_thumbnail(source[0])
+        thumbnail = Thumbnail(digest, data, self._publish(digest, data, extension))
+        with self._lock:
+            if source not in self._cache:
+                self._cache[source] = thumbnail
+                self._cached_bytes += len(data)
+                while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_bytes -= len(evicted.data)
+        return thumbnail
+
+    # The default picture ships with the app and does not change while it runs
+    def default(self):
+        if self._default_source is None:
+            stat = self.default_path.stat()
+            self._default_source = (str(self.default_path), stat.st_mtime_ns, stat.st_size)
+        return self._thumbnail(self._default_source)
+
+    # The applicant's photo, or the default picture when there is none or it cannot be read
+    def thumbnail(self, applicant_id):
+        source = self.photos.source(applicant_id)
+        if source is not None:
+            try:
+                return self._thumbnail(source)
+            except (OSError, Image.DecompressionBombError) as e:
+                print(f"Could not read the photo of {applicant_id}: {e}")
+        return self.default()
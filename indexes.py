@@ -0,0 +1,146 @@
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# A filter selecting fewer than this share of the rows sorts its rows by rank
+# instead of picking them out of the whole order
+sparse_share = 0.01
+
+
+# Number of applicants per status, computed once from the table and then
+# adjusted per decision instead of re-running value_counts on every render
+class StatusCounts:
+    def __init__(self, statuses):
+        self._lock = threading.Lock()
+        self.reset(statuses)
+
+    # Recount from scratch, e.g. after the table was reloaded
+    def reset(self, statuses):
+        counts = Counter({status: int(n) for status, n in pd.Series(statuses).value_counts().items() if n})
+        with self._lock:
+            self._counts = counts
+
+    def add(self, statuses):
+        with self._lock:
+            self._counts.update(list(statuses))
+
+    # Move applicants from their previous statuses to `new_status`
+    def move(self, old_statuses, new_status):
+        with self._lock:
+            for old_status in old_statuses:
+                self._counts[old_status] -= 1
+                if self._counts[old_status] <= 0:
+                    del self._counts[old_status]
+                self._counts[new_status] += 1
+
+    def get(self, status, default=0):
+        with self._lock:
+            return self._counts.get(status, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+# Row positions ordered by one column. The order is computed once and new rows
+# are merged in on insert, so a filtered view only has to pick its rows out of
+# it instead of sorting them again. Missing values sort last in both directions;
+# descending order is the ascending one reversed, so ties come out reversed too.
+# An order is never modified: insert returns a new one, so readers holding the
+# old one are unaffected.
+class SortedOrder:
+    def __init__(self, values, order=None, valid=None):
+        self.keys = np.asarray(values)
+        self.order = np.argsort(self.keys, kind="stable") if order is None else order
+        self._valid = int(pd.notna(self.keys).sum()) if valid is None else valid
+        self._ranks = None
+
+    def __len__(self):
+        return len(self.order)
+
+    def insert(self, values):
+        values = np.asarray(values, dtype=self.keys.dtype)
+        new_positions = np.arange(len(self.keys), len(self.keys) + len(values))
+        keys = np.concatenate([self.keys, values])
+
+        new_order = new_positions[np.argsort(values, kind="stable")]
+        new_valid = int(pd.notna(values).sum())
+        sorted_keys = keys[self.order[:self._valid]]
+        slots = np.searchsorted(sorted_keys, keys[new_order[:new_valid]], side="right")
+        valid = np.insert(self.order[:self._valid], slots, new_order[:new_valid])
+        order = np.concatenate([valid, self.order[self._valid:], new_order[new_valid:]])
+        return SortedOrder(keys, order, self._valid + new_valid)
+
+    # Positions in sort order, optionally limited to the rows where `mask` is set.
+    # The mask is applied before reversing, so a descending search does not copy
+    # the whole order first; take and compress are much faster than fancy indexing.
+    def positions(self, mask=None, ascending=True):
+        order, valid = self.order, self._valid
+        if mask is not None:
+            count = np.count_nonzero(mask)
+            if count < sparse_share * len(order):
+                rows = np.flatnonzero(mask)
+                return rows[np.argsort(self.ranks(rows, ascending))]
+            if count < len(order):
+                selected = mask.take(order)
+                valid = int(np.count_nonzero(selected[:valid]))
+                order = order.compress(selected)
+        if not ascending:
+            order = np.concatenate([order[:valid][::-1], order[valid:]])
+        return order
+
+    # Where each row sits in the order
+    def ranks(self, positions, ascending=True):
+        if self._ranks is None:
+            ranks = np.empty(len(self.order), dtype=np.intp)
+            ranks[self.order] = np.arange(len(self.order))
+            self._ranks = ranks
+        ranks = self._ranks[positions]
+        if not ascending:
+            ranks = np.where(ranks < self._valid, self._valid - 1 - ranks, ranks)
+        return ranks
+
+    # Update a result of `positions` without redoing it: drop `removed` and merge
+    # `added` into place
+    def patch(self, positions, added, removed, ascending=True):
+        if len(removed):
+            positions = positions[~np.isin(positions, removed)]
+        if len(added):
+            added = added[np.argsort(self.ranks(added, ascending), kind="stable")]
+            slots = np.searchsorted(self.ranks(positions, ascending), self.ranks(added, ascending))
+            positions = np.insert(positions, slots, added)
+        return positions
+
+
+# Applicant ID -> row position, so looking up one applicant does not scan the table
+class IdIndex:
+    def __init__(self, applicant_ids):
+        self.reset(applicant_ids)
+
+    # Rebuild from scratch, e.g. after the table was reloaded
+    def reset(self, applicant_ids):
+        applicant_ids = list(applicant_ids)
+        # Filled back to front so the first row wins if an ID is repeated
+        self._positions = dict(zip(reversed(applicant_ids), range(len(applicant_ids) - 1, -1, -1)))
+        self._size = len(applicant_ids)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, applicant_id):
+        return applicant_id in self._positions
+
+    # Register rows appended to the end of the table
+    def append(self, applicant_ids):
+        for applicant_id in applicant_ids:
+            self._positions.setdefault(applicant_id, self._size)
+            self._size += 1
+
+    def position(self, applicant_id):
+        return self._positions.get(applicant_id)
+
+    # Which of `applicant_ids` are already registered, as a boolean array
+    def contains(self, applicant_ids):
+        return np.fromiter((applicant_id in self._positions for applicant_id in applicant_ids), dtype=bool, count=len(applicant_ids))
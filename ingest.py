@@ -0,0 +1,203 @@
+import argparse
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# How often (in seconds) the drop directory is checked when the queue is idle
+poll_interval_seconds = 0.1
+
+# Most queued records appended in one micro-batch
+max_batch_rows = 10_000
+
+# Arrival-to-visible latency the ingestor aims for; batches slower than this are logged
+target_p99_seconds = 1.0
+
+# Latencies kept for the percentile report
+latency_history = 10_000
+
+
+def _read_jsonl(path):
+    return pd.read_json(path, lines=True, dtype=False)
+
+
+# Files picked up from the drop directory, by extension. Producers should write
+# under another name (e.g. "batch.csv.tmp") and rename, so half-written files
+# are never read.
+readers = {".csv": pd.read_csv, ".jsonl": _read_jsonl}
+
+
+# Feeds new applicants into an ApplicantService from an in-process queue and a
+# drop directory. Everything that arrived since the last append goes in as one
+# micro-batch, so a burst of small files costs one table append.
+class Ingestor:
+    def __init__(self, service, drop_directory=None):
+        self.service = service
+        self.drop_directory = Path(drop_directory) if drop_directory else None
+        self.queue = queue.Queue()
+        self.latencies = deque(maxlen=latency_history)
+        self.accepted = 0
+        self.rejected = 0
+        if self.drop_directory is not None:
+            for name in ("processed", "failed"):
+                (self.drop_directory / name).mkdir(parents=True, exist_ok=True)
+
+    # Queue applicant records (a DataFrame or a list of dicts) for the next micro-batch
+    def submit(self, records):
+        self.queue.put((time.time(), pd.DataFrame(records)))
+
+    # Turn away a batch the service cannot append, so it does not take the
+    # rest of the micro-batch down with it
+    def _check(self, frame, source):
+        try:
+            self.service.check_applicants(frame)
+            return True
+        except Exception as e:
+            print(f"Rejected {len(frame)} new applicants from {source}: {e}")
+            self.rejected += len(frame)
+            return False
+
+    def _drain_queue(self, timeout):
+        batches, rows = [], 0
+        try:
+            batch = self.queue.get(timeout=timeout)
+            while True:
+                if self._check(batch[1], "the queue"):
+                    batches.append(batch)
+                    rows += len(batch[1])
+                if rows >= max_batch_rows:
+                    break
+                batch = self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        return batches
+
+    def _scan_directory(self):
+        if self.drop_directory is None:
+            return [], []
+        batches, files = [], []
+        for path in sorted(self.drop_directory.iterdir()):
+            reader = readers.get(path.suffix)
+            if reader is None or not path.is_file():
+                continue
+            try:
+                arrived, frame = path.stat().st_mtime, reader(path)
+            except Exception as e:
+                print(f"Could not read {path.name}: {e}")
+                shutil.move(path, self.drop_directory / "failed" / path.name)
+                continue
+            if self._check(frame, path.name):
+                batches.append((arrived, frame))
+                files.append(path)
+            else:
+                shutil.move(path, self.drop_directory / "failed" / path.name)
+        return batches, files
+
+    # Append whatever has arrived. Waits up to `timeout` seconds for queued records.
+    def run_once(self, timeout=0):
+        batches = self._drain_queue(timeout)
+        file_batches, files = self._scan_directory()
+        batches += file_batches
+        if not batches:
+            return 0
+
+        rows = pd.concat([frame for _, frame in batches], ignore_index=True)
+        try:
+            result = self.service.append_applicants(rows)
+        except Exception as e:
+            print(f"Rejected {len(rows)} new applicants: {e}")
+            self.rejected += len(rows)
+            for path in files:
+                shutil.move(path, self.drop_directory / "failed" / path.name)
+            return 0
+
+        for path in files:
+            shutil.move(path, self.drop_directory / "processed" / path.name)
+        visible_at = result.snapshot.updated_at.timestamp()
+        latencies = [visible_at - arrived for arrived, _ in batches]
+        self.latencies.extend(latencies)
+        self.accepted += result.accepted
+        self.rejected += len(result.rejected)
+        if result.rejected:
+            print(f"Skipped {len(result.rejected)} new applicants with a missing or duplicate ID")
+        if max(latencies) > target_p99_seconds:
+            print(f"Ingestion took {max(latencies):.2f}s from arrival to visibility (target {target_p99_seconds}s)")
+        return result.accepted
+
+    # Arrival-to-visible latency percentiles (in seconds) over recent batches
+    def latency_percentiles(self, percentiles=(50, 99)):
+        if not self.latencies:
+            return {}
+        values = np.percentile(np.fromiter(self.latencies, dtype=float), percentiles)
+        return {f"p{p}": value for p, value in zip(percentiles, values)}
+
+    # Ingest continuously in a daemon thread; set the returned event to stop
+    def start(self):
+        stop = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                try:
+                    self.run_once(timeout=poll_interval_seconds)
+                except Exception as e:
+                    print(f"Ingestion failed: {e}")
+                    stop.wait(poll_interval_seconds)
+
+        thread = threading.Thread(target=run, name="applicant-ingestor", daemon=True)
+        thread.start()
+        return stop
+
+
+# Stand-in producer: `rows` generated applicants, in batches of `batch_size`
+# every `interval` seconds, numbered from `start` so they do not clash with
+# the loaded data. `sink` receives each batch as a DataFrame.
+def produce(sink, rows, batch_size=100, interval=1.0, start=10_000_000, seed=None):
+    from generate_data import create_dummy_data
+
+    rng = np.random.default_rng(seed)
+    for offset in range(0, rows, batch_size):
+        sink(create_dummy_data(min(batch_size, rows - offset), rng, start + offset))
+        if offset + batch_size < rows:
+            time.sleep(interval)
+
+
+# A sink that writes each batch into a drop directory as a new file
+def drop_directory_sink(directory, file_format="csv"):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    counter = iter(range(1 << 62))
+
+    def write(frame):
+        path = directory / f"applicants-{time.time_ns()}-{next(counter)}.{file_format}"
+        tmp_path = path.with_name(path.name + ".tmp")
+        if file_format == "csv":
+            frame.to_csv(tmp_path, index=False)
+        else:
+            frame.to_json(tmp_path, orient="records", lines=True, date_format="iso")
+        tmp_path.rename(path)
+
+    return write
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drop generated applicants into the app's ingestion directory.")
+    parser.add_argument("-d", "--directory", default="incoming", help="drop directory the app watches (default: incoming)")
+    parser.add_argument("-n", "--rows", type=int, default=100, help="number of applicants to send (default: 100)")
+    parser.add_argument("--batch-size", type=int, default=10, help="applicants per file (default: 10)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between files (default: 1)")
+    parser.add_argument("--start", type=int, default=10_000_000, help="first applicant number, to avoid existing IDs (default: 10000000)")
+    parser.add_argument("--format", choices=sorted(ext.lstrip(".") for ext in readers), default="csv", help="file format (default: csv)")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    produce(drop_directory_sink(args.directory, args.format), args.rows, args.batch_size, args.interval, args.start, args.seed)
+    print(f"Sent {args.rows} applicants to '{args.directory}'.")
+
+
+if __name__ == "__main__":
+    main()
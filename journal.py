@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+
+# Set Status and Details of the applicants in `decisions` (a frame indexed by
+# applicant ID, one row each) in the DataFrame; returns how many rows changed
+def apply_decisions(df, decisions):
+    mask = df['Applicant ID'].isin(decisions.index)
+    applicant_ids = df.loc[mask, 'Applicant ID']
+    df.loc[mask, 'Status'] = applicant_ids.map(decisions['Status']).to_numpy()
+    df.loc[mask, 'Details'] = applicant_ids.map(decisions['Details']).to_numpy()
+    return int(mask.sum())
+
+
+# Append-only log of reviewer decisions. Every decision is written as one JSON
+# line and fsynced, so recording it is a small constant-size write instead of
+# rewriting the whole workbook. Applicants ingested into the live table are
+# journaled too (one line per batch), so they survive a restart before the
+# next compaction saves them.
+# A decision entry carries the sequence number of its last audit record: the
+# entry is what commits both, so audit records no entry refers to were never
+# committed (see ApplicantService).
+class DecisionJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        # Entries that are being folded into the workbook/snapshot live here
+        # until the compaction finishes, so a crash mid-compaction loses nothing
+        self.compacting_path = self.path.with_name(self.path.name + ".compacting")
+        self.lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._end_torn_line()
+
+    # A crash mid-append can leave a torn last line; end it so the next entry
+    # starts on a line of its own instead of being glued to the torn one
+    def _end_torn_line(self):
+        if self.path.stat().st_size == 0:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                self._file.write("\n")
+                self._file.flush()
+
+    def append(self, applicant_id, status, comments, reviewer=None, audit_sequence=None):
+        entry = {
+            "Applicant ID": applicant_id,
+            "Status": status,
+            "Details": comments,
+            "Reviewer": reviewer,
+            "Timestamp": datetime.now().isoformat(timespec="seconds"),
+        }
+        if audit_sequence is not None:
+            entry["Audit"] = audit_sequence
+        self._write(entry)
+        return entry
+
+    def _write(self, entry):
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    # One decision for many applicants. The whole batch is a single line, so a
+    # crash mid-write loses all of it rather than leaving part of it applied.
+    def append_batch(self, applicant_ids, status, comments, reviewer=None, audit_sequence=None):
+        return self.append(list(applicant_ids), status, comments, reviewer, audit_sequence)
+
+    # New applicant rows (a DataFrame) appended to the live table, as one line
+    def append_rows(self, rows):
+        self._write({"Rows": rows.to_dict("records"), "Timestamp": datetime.now().isoformat(timespec="seconds")})
+
+    # Every applicant row journaled by append_rows, in arrival order, or None if there are none
+    def appended_rows(self):
+        frames = [pd.DataFrame(entry["Rows"]) for entry in self.entries() if "Rows" in entry]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    # Sequence number of the newest audit record a decision entry refers to, or None
+    def last_audit_sequence(self):
+        sequences = [entry["Audit"] for entry in self.entries() if "Audit" in entry]
+        return max(sequences) if sequences else None
+
+    def entries(self):
+        # Entries left over from an interrupted compaction are older, so they come first
+        for path in (self.compacting_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash during append; the decision never completed
+                        continue
+
+    def replay(self, df):
+        # Apply every journaled decision onto the DataFrame (last decision per applicant wins)
+        entries = [entry for entry in self.entries() if "Rows" not in entry]
+        if not entries:
+            return 0
+
+        # Batch entries list several IDs; give each its own row
+        decisions = pd.DataFrame(entries).explode("Applicant ID")
+        apply_decisions(df, decisions.drop_duplicates("Applicant ID", keep="last").set_index("Applicant ID"))
+        return len(entries)
+
+    # True when there is nothing to compact: no entries since the last
+    # compaction and none left over from an interrupted one
+    def is_empty(self):
+        with self.lock:
+            return os.fstat(self._file.fileno()).st_size == 0 and not self.compacting_path.exists()
+
+    def rotate(self):
+        # Move the current entries aside and start an empty journal, so new
+        # decisions keep flowing while the compacted copy is being written
+        with self.lock:
+            self._file.close()
+            with open(self.path, "rb") as current, open(self.compacting_path, "ab") as compacting:
+                compacting.write(current.read())
+                compacting.flush()
+                os.fsync(compacting.fileno())
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def discard_compacted(self):
+        # The compacted entries are now part of the saved data
+        self.compacting_path.unlink(missing_ok=True)
+
+    def close(self):
+        with self.lock:
+            self._file.close()
+
+
+# Fold the journal into persistent storage. `data_lock` must be the lock the
+# decision handlers hold while journaling and applying a decision, so the frame
+# taken here contains every entry that was rotated out. `get_frame` must return
+# a frame that later decisions do not modify in place. Every change to the
+# table (decisions and appended applicants) is journaled, so with an empty
+# journal there is nothing to save and the run is skipped. Returns whether
+# anything was saved.
+def compact(journal, data_lock, get_frame, save_frame):
+    with data_lock:
+        if journal.is_empty():
+            return False
+        journal.rotate()
+        frame = get_frame()
+    save_frame(frame)
+    journal.discard_compacted()
+    return True
+
+
+# Run `compact` on a fixed schedule in a daemon thread
+def start_compactor(journal, data_lock, get_frame, save_frame, interval_seconds):
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_seconds):
+            try:
+                compact(journal, data_lock, get_frame, save_frame)
+            except Exception as e:
+                # Keep the journal as-is; the next run will pick the entries up again
+                print(f"Journal compaction failed: {e}")
+
+    thread = threading.Thread(target=run, name="journal-compactor", daemon=True)
+    thread.start()
+    return stop
@@ -0,0 +1,195 @@
+import argparse
+import multiprocessing
+import os
+import secrets
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmark import copy_data, ensure_data, latency_percentiles
+from data_server import address_variable, authkey_variable, create_server, parse_address
+
+# Worker process counts compared by default
+worker_counts = [1, 2, 4]
+
+# Simulated reviewer sessions in each worker process
+sessions_per_worker = 4
+
+# How long (in seconds) each worker drives its sessions
+run_seconds = 20.0
+
+# Applicants in the table the data server loads
+load_rows = 100_000
+
+# The data server listens here for the length of a run
+loadgen_server_port = 8701
+
+# Search box inputs a reviewer types, one whole word at a time
+search_queries = ["tan", "app00", "rejected", "siti", "pending", ""]
+
+# The longest a reviewer waits for a search to show its result
+filter_wait_seconds = 5.0
+
+# What every reviewer does, over and over
+reviewer_script = ["search", "page", "open", "comment", "decide"]
+
+
+# Load the generated table into a data server and answer workers until terminated
+def _serve(rows, address, authkey, ready):
+    from data_service import ApplicantService
+
+    _, snapshot_path = ensure_data(rows)
+    with tempfile.TemporaryDirectory(prefix="loadgen-") as directory:
+        service = ApplicantService(*copy_data(snapshot_path, directory))
+        server = create_server(service, parse_address(address), authkey)
+        ready.set()
+        server.serve_forever()
+
+
+# One reviewer's headless session of the app, driven through its widgets the
+# way a browser would: every action is a widget change the page reacts to
+class _Reviewer:
+    def __init__(self, rng):
+        import ipyvuetify as v
+        import solara
+        import sol
+
+        self.v = v
+        self.rng = rng
+        _, self.rc = solara.render(sol.Page(), handle_error=False)
+        self.query = ""
+        self.decisions = 0
+
+    def _buttons(self, label):
+        return [b for b in self.rc.find(self.v.Btn).widgets if b.children and b.children[0] == label]
+
+    def _field(self, label):
+        return self.rc.find(self.v.TextField, label=label).widget
+
+    def search(self):
+        from metrics import metrics
+
+        # Filters run in a background thread; wait until one more has finished
+        def filters_done():
+            timer = metrics.report()["timers"].get("filter")
+            return timer["count"] if timer else 0
+
+        done = filters_done()
+        self.query = str(self.rng.choice([query for query in search_queries if query != self.query]))
+        self._field("Search by ID, Name or Status").v_model = self.query
+        deadline = time.perf_counter() + filter_wait_seconds
+        while filters_done() == done and time.perf_counter() < deadline:
+            time.sleep(0.001)
+
+    def page(self):
+        for label in ["Next", "Previous"]:
+            button = self._buttons(label)[0]
+            if not button.disabled:
+                button.click()
+                return
+
+    def open(self):
+        rows = [b for b in self.rc.find(self.v.Btn).widgets if b.children and str(b.children[0]).startswith("Applicant ID")]
+        if rows:
+            rows[self.rng.integers(len(rows))].click()
+
+    def comment(self):
+        if self._buttons("Approve"):
+            field = self._field("Enter comments")
+            for word in ["checked", "documents", "ok"]:
+                field.v_model = f"{field.v_model or ''} {word}".strip()
+
+    def decide(self):
+        buttons = self._buttons("Approve" if self.decisions % 2 else "Reject")
+        if buttons:
+            buttons[0].click()
+            self.decisions += 1
+
+
+# Drive `sessions` reviewers for `seconds` in this process, as a Solara worker
+# connected to the data server; returns the duration of every action and the time taken
+def drive(address, authkey_hex, sessions, seconds, seed):
+    os.environ[address_variable] = address
+    os.environ[authkey_variable] = authkey_hex
+    # The app prints every decision; keep them out of the report
+    sys.stdout = open(os.devnull, "w")
+    import solara
+    import sol
+
+    # Measure the work, not the debounce wait
+    sol.filter_debounce_seconds = 0
+    solara.get_session_id = lambda: f"loadgen-{os.getpid()}"
+
+    rng = np.random.default_rng(seed)
+    reviewers = [_Reviewer(rng) for _ in range(sessions)]
+    for reviewer in reviewers:
+        for action in reviewer_script:
+            getattr(reviewer, action)()
+
+    durations = []
+    start = time.perf_counter()
+    step = 0
+    while time.perf_counter() - start < seconds:
+        action = reviewer_script[step // sessions % len(reviewer_script)]
+        action_start = time.perf_counter()
+        getattr(reviewers[step % sessions], action)()
+        durations.append(time.perf_counter() - action_start)
+        step += 1
+    return durations, time.perf_counter() - start
+
+
+# One run: a data server and `workers` processes of `sessions` reviewers each
+def run(workers, sessions, seconds, rows, port=loadgen_server_port):
+    context = multiprocessing.get_context("spawn")
+    address = f"127.0.0.1:{port}"
+    authkey = secrets.token_bytes(16)
+    ready = context.Event()
+    server = context.Process(target=_serve, args=(rows, address, authkey, ready), daemon=True)
+    server.start()
+    try:
+        if not ready.wait(300):
+            raise RuntimeError("The data server did not start")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(drive, address, authkey.hex(), sessions, seconds, i) for i in range(workers)]
+            results = [future.result() for future in futures]
+    finally:
+        server.terminate()
+        server.join()
+
+    durations = np.concatenate([durations for durations, _ in results])
+    values = np.percentile(durations, latency_percentiles) * 1000
+    result = {"workers": workers, "sessions": workers * sessions, "actions": len(durations)}
+    # Each worker's own rate, since they start at slightly different times
+    result["actions_per_second"] = round(sum(len(durations) / elapsed for durations, elapsed in results), 1)
+    result.update({f"p{p}_ms": round(float(value), 1) for p, value in zip(latency_percentiles, values)})
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive simulated reviewers through worker processes sharing one data server.")
+    parser.add_argument("--workers", type=int, nargs="+", default=worker_counts, help="worker counts to compare (default: 1 2 4)")
+    parser.add_argument("--sessions", type=int, default=sessions_per_worker, help=f"reviewer sessions per worker (default: {sessions_per_worker})")
+    parser.add_argument("--seconds", type=float, default=run_seconds, help=f"length of each run (default: {run_seconds:g})")
+    parser.add_argument("--rows", type=int, default=load_rows, help=f"applicants in the table (default: {load_rows})")
+    args = parser.parse_args(argv)
+
+    # Generate missing data first, outside the measured runs
+    ensure_data(args.rows)
+    print(f"{args.rows:,} applicants, {args.sessions} sessions per worker, {args.seconds:g}s per run, {os.cpu_count()} CPUs")
+    print(f"  {'workers':>7} {'sessions':>8} {'actions/s':>10} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args.sessions, args.seconds, args.rows)
+        baseline = baseline or result["actions_per_second"]
+        speedup = result["actions_per_second"] / baseline
+        print(
+            f"  {workers:>7} {result['sessions']:>8} {result['actions_per_second']:>10} {speedup:>7.2f}x"
+            f" {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+# Most recent durations kept per timer for the percentiles
+timer_history = 1000
+
+# Percentiles reported for every timer
+timer_percentiles = [50, 95, 99]
+
+
+# Process-wide timers, counters and gauges. Timers keep a running count, total
+# and maximum plus a window of recent durations; gauges are functions read when
+# a report is made.
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._counters = {}
+        self._gauges = {}
+        self.started_at = datetime.now()
+
+    def record(self, name, seconds):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = {"count": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=timer_history)}
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+            timer["recent"].append(seconds)
+
+    # Time the body of a `with` block under `name`
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    # Report the value `read()` returns under `name`
+    def gauge(self, name, read):
+        with self._lock:
+            self._gauges[name] = read
+
+    def reset(self):
+        with self._lock:
+            self._timers, self._counters = {}, {}
+            self.started_at = datetime.now()
+
+    # Everything recorded since the start (or the last reset), as plain JSON-ready data.
+    # Timer durations are in milliseconds.
+    def report(self):
+        with self._lock:
+            timers = {name: (timer["count"], timer["total"], timer["max"], list(timer["recent"])) for name, timer in self._timers.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            started_at = self.started_at
+
+        timer_report = {}
+        for name, (count, total, longest, recent) in sorted(timers.items()):
+            entry = {"count": count, "total_ms": total * 1000, "mean_ms": total / count * 1000, "max_ms": longest * 1000}
+            for p, value in zip(timer_percentiles, np.percentile(recent, timer_percentiles)):
+                entry[f"p{p}_ms"] = float(value) * 1000
+            timer_report[name] = {key: round(value, 3) for key, value in entry.items()}
+
+        gauge_report = {}
+        for name, read in sorted(gauges.items()):
+            try:
+                gauge_report[name] = read()
+            except Exception as e:
+                gauge_report[name] = f"error: {e}"
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "since": started_at.isoformat(timespec="seconds"),
+            "timers": timer_report,
+            "counters": dict(sorted(counters.items())),
+            "gauges": gauge_report,
+        }
+
+
+# The registry every module records into
+metrics = Metrics()
+
+
+# Decorator that times every call of a function under `name`
+def timed(name):
+    def decorate(function):
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            with metrics.timer(name):
+                return function(*args, **kwargs)
+
+        return call
+
+    return decorate
+
+
+# Count and time every render of a Solara component under "render.<name>". The
+# time covers the component's own body, not the children it renders.
+def instrumented(component):
+    return timed(f"render.{component.__name__}")(component)
+
+
+# Append `metrics.report()` as one JSON line to `path` every `interval_seconds`,
+# in a daemon thread; set the returned event to stop
+def start_metrics_log(path, interval_seconds):
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_seconds):
+            try:
+                line = json.dumps(metrics.report(), default=str)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception as e:
+                print(f"Could not write metrics: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-log", daemon=True)
+    thread.start()
+    return stop
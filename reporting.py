@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+# Width (in minutes) of the buckets the Time Taken distribution is counted in
+time_taken_bucket = 15
+
+
+def _application_day(values):
+    return values.dt.normalize(), lambda day: day.strftime('%Y-%m-%d')
+
+
+def _time_taken(values):
+    starts = values // time_taken_bucket * time_taken_bucket
+    return starts, lambda start: f"{int(start)}-{int(start) + time_taken_bucket - 1}"
+
+
+def _whole_number(values):
+    return values, lambda value: str(int(value))
+
+
+def _text(values):
+    return values.astype(object), str
+
+
+# Report dimensions: the column each is read from, and how a column turns into
+# sortable keys plus a label for each key
+report_dimensions = {
+    "Application Day": ("Application Date", _application_day),
+    "Nationality": ("Nationality", _text),
+    "Occupation": ("Occupation", _text),
+    "Risk Level": ("Risk Level", _text),
+    "Time Taken (minutes)": ("Time Taken (minutes)", _time_taken),
+    "Attempt of Application": ("Attempt of Application", _whole_number),
+}
+
+# Dimensions reported as approval/rejection rates and as distributions
+rate_dimensions = ["Nationality", "Occupation", "Risk Level"]
+distribution_dimensions = ["Time Taken (minutes)", "Attempt of Application"]
+
+
+# Which key every row has in one dimension, the label of every key, and the
+# key values themselves. Rows without a value share a trailing "N/A" key.
+def _dimension_keys(values, to_keys):
+    keys, label = to_keys(values)
+    codes, uniques = pd.factorize(keys, sort=True)
+    labels = [label(value) for value in uniques]
+    key_values = list(uniques)
+    if (codes < 0).any():
+        codes[codes < 0] = len(labels)
+        labels.append("N/A")
+        key_values.append(None)
+    return codes.astype(np.int32), labels, key_values
+
+
+# Table row order for a dimension: by key value, with "N/A" last
+def _label_order(key_values):
+    return sorted(range(len(key_values)), key=lambda i: (key_values[i] is None, key_values[i] if key_values[i] is not None else 0))
+
+
+# Applicant counts per (dimension value, status), built once from the table and
+# then adjusted per decision. Moving an applicant between statuses only touches
+# one cell per dimension, so the cubes never need a group-by over the rows again.
+class ReportingEngine:
+    def __init__(self, frame):
+        statuses = frame['Status']
+        self.statuses = list(statuses.cat.categories) if isinstance(statuses.dtype, pd.CategoricalDtype) else []
+        self._status_index = {status: i for i, status in enumerate(self.statuses)}
+        status_codes = self._status_codes(statuses)
+        # Rows without a status are not counted anywhere
+        counted = status_codes >= 0
+
+        self._keys, self._labels, self._key_values, self._orders, self._counts = {}, {}, {}, {}, {}
+        for dimension, (column, to_keys) in report_dimensions.items():
+            if column not in frame.columns:
+                continue
+            keys, labels, key_values = _dimension_keys(frame[column], to_keys)
+            counts = np.zeros((len(labels), len(self.statuses)), dtype=np.int64)
+            np.add.at(counts, (keys[counted], status_codes[counted]), 1)
+            self._keys[dimension], self._labels[dimension], self._counts[dimension] = keys, labels, counts
+            self._key_values[dimension] = key_values
+            self._orders[dimension] = list(range(len(labels)))
+
+    def _status_codes(self, statuses):
+        statuses = pd.Series(np.asarray(statuses, dtype=object))
+        for status in statuses.dropna().unique():
+            self._status_code(status)
+        return pd.Categorical(statuses, categories=self.statuses).codes.astype(np.intp)
+
+    def _status_code(self, status):
+        if status not in self._status_index:
+            self._status_index[status] = len(self.statuses)
+            self.statuses.append(status)
+            for dimension, counts in self._counts.items():
+                self._counts[dimension] = np.pad(counts, ((0, 0), (0, 1)))
+        return self._status_index[status]
+
+    # Move the applicants at `positions` from their previous statuses to
+    # `new_status`. The count arrays are replaced, not written into, so views
+    # handed out earlier keep their numbers.
+    def move(self, positions, old_statuses, new_status):
+        new_code = self._status_code(new_status)
+        old_codes = self._status_codes(old_statuses)
+        positions = np.asarray(positions, dtype=np.intp)
+        counted = old_codes >= 0
+        for dimension, keys in self._keys.items():
+            counts = self._counts[dimension].copy()
+            rows = keys[positions]
+            np.subtract.at(counts, (rows[counted], old_codes[counted]), 1)
+            np.add.at(counts, (rows, new_code), 1)
+            self._counts[dimension] = counts
+
+    # Count rows appended to the table. Values not seen before get a new row in
+    # their dimension's table. Every dimension is counted before any is
+    # replaced, so a failure leaves the cubes as they were.
+    def append(self, frame):
+        status_codes = self._status_codes(frame['Status'])
+        counted = status_codes >= 0
+        updated = {}
+        for dimension, keys in self._keys.items():
+            column, to_keys = report_dimensions[dimension]
+            new_keys, new_labels, new_key_values = _dimension_keys(frame[column], to_keys)
+
+            # Map the chunk's keys onto the engine's, adding the ones it has not seen
+            labels, key_values = list(self._labels[dimension]), list(self._key_values[dimension])
+            code_of = {(value is None, value): code for code, value in enumerate(key_values)}
+            mapping = np.empty(len(new_labels), dtype=np.int32)
+            for i, (label, value) in enumerate(zip(new_labels, new_key_values)):
+                code = code_of.get((value is None, value))
+                if code is None:
+                    code = len(labels)
+                    labels.append(label)
+                    key_values.append(value)
+                mapping[i] = code
+
+            counts = self._counts[dimension]
+            order = self._orders[dimension]
+            if len(labels) > len(counts):
+                counts = np.pad(counts, ((0, len(labels) - len(counts)), (0, 0)))
+                order = _label_order(key_values)
+            else:
+                counts = counts.copy()
+            new_keys = mapping[new_keys] if len(new_keys) else new_keys
+            np.add.at(counts, (new_keys[counted], status_codes[counted]), 1)
+            updated[dimension] = (np.concatenate([keys, new_keys]), labels, key_values, counts, order)
+
+        for dimension, (keys, labels, key_values, counts, order) in updated.items():
+            self._keys[dimension], self._labels[dimension], self._key_values[dimension] = keys, labels, key_values
+            self._counts[dimension], self._orders[dimension] = counts, order
+
+    def view(self):
+        return ReportCubes(dict(self._labels), list(self.statuses), dict(self._counts), dict(self._orders))
+
+
+# The reporting cubes at one table version. Tables are derived from the counts
+# on first use and kept, so every session showing this version shares them.
+class ReportCubes:
+    def __init__(self, labels, statuses, counts, orders):
+        self.statuses = statuses
+        self._labels = labels
+        self._counts = counts
+        self._orders = orders
+        self._tables = {}
+
+    @property
+    def dimensions(self):
+        return list(self._counts)
+
+    @timed("count.reports")
+    def _table(self, name, dimension, build):
+        key = (name, dimension)
+        if key not in self._tables:
+            self._tables[key] = build(dimension)
+        return self._tables[key]
+
+    # Applicants per dimension value and status, with a total per value
+    def counts(self, dimension):
+        def build(dimension):
+            order = self._orders[dimension]
+            labels = [self._labels[dimension][i] for i in order]
+            table = pd.DataFrame(self._counts[dimension][order], index=pd.Index(labels, name=dimension), columns=self.statuses)
+            table["Total"] = table.sum(axis=1)
+            return table[table["Total"] > 0]
+        return self._table("counts", dimension, build)
+
+    # Applications, decisions and approval/rejection rates (in %) per dimension value
+    def rates(self, dimension):
+        def build(dimension):
+            counts = self.counts(dimension)
+            approved = counts["Approved"] if "Approved" in counts else 0
+            rejected = counts["Rejected"] if "Rejected" in counts else 0
+            table = pd.DataFrame({"Applications": counts["Total"], "Approved": approved, "Rejected": rejected})
+            table["Approval Rate (%)"] = (100 * table["Approved"] / table["Applications"]).round(1)
+            table["Rejection Rate (%)"] = (100 * table["Rejected"] / table["Applications"]).round(1)
+            return table
+        return self._table("rates", dimension, build)
+
+    # Number and share (in %) of applicants per dimension value
+    def distribution(self, dimension):
+        def build(dimension):
+            total = self.counts(dimension)["Total"]
+            return pd.DataFrame({"Applicants": total, "Share (%)": (100 * total / max(total.sum(), 1)).round(1)})
+        return self._table("distribution", dimension, build)
@@ -0,0 +1,281 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Columns covered by the "Search by ID, Name or Status" box
+searchable_columns = ["Applicant ID", "Full Name", "Status"]
+
+gram_size = 3
+_char_bits = 21  # enough for any Unicode code point
+_char_mask = (1 << _char_bits) - 1
+
+# Once this many values have been added after the build, fold them into the n-gram table
+_rebuild_threshold = 50_000
+
+# 1-2 character queries match most values, so their results are kept around
+_short_cache_size = 64
+
+# Rows changed by decisions are kept beside the code array until there are this
+# many, then written into a fresh copy of it (see ColumnIndex.set)
+_overlay_limit = 4096
+
+_no_changes = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32))
+
+
+def _normalize(values):
+    return pd.Series(values, dtype=object).fillna("").astype(str).str.lower()
+
+
+# Trigram keys of an array of strings, as (key, owner) pairs. Each trigram is
+# packed into one int64 so grams can be sorted and looked up with NumPy.
+def _trigram_pairs(values):
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    array = np.asarray(values, dtype=str)
+    width = array.dtype.itemsize // 4
+    chars = array.view(np.uint32).reshape(len(array), width).astype(np.int64)
+
+    keys, owners = [], []
+    for start in range(width - gram_size + 1):
+        window = chars[:, start:start + gram_size]
+        valid = np.flatnonzero((window != 0).all(axis=1))
+        key = window[valid, 0] | (window[valid, 1] << _char_bits) | (window[valid, 2] << (2 * _char_bits))
+        keys.append(key)
+        owners.append(valid.astype(np.int32))
+    return np.concatenate(keys), np.concatenate(owners)
+
+
+_GramTable = namedtuple("_GramTable", ["indexed", "value_array", "gram_keys", "gram_starts", "gram_owners", "short_values"])
+
+
+def _pack(text):
+    key = 0
+    for i, char in enumerate(text):
+        key |= ord(char) << (i * _char_bits)
+    return key
+
+
+# N-gram index over the distinct values of one column. Rows refer to values by
+# code, so a status change only rewrites one code and never touches the grams.
+class ColumnIndex:
+    def __init__(self, values):
+        codes, uniques = pd.factorize(_normalize(values))
+        self.codes = codes.astype(np.int32)
+        self.values = list(uniques)
+        self._code_of = {value: code for code, value in enumerate(self.values)}
+        # For a column of unique values (e.g. Applicant ID) each row's code is
+        # its own position, so value hits are already row hits
+        self._identity = len(self.values) == len(self.codes)
+        # Rows whose code was changed since the code array was last copied, as
+        # sorted positions and their codes
+        self._changed = _no_changes
+        self._build()
+
+    def _build(self):
+        keys, owners = _trigram_pairs(self.values)
+        order = np.argsort(keys, kind="stable")
+        keys, owners = keys[order], owners[order]
+        gram_keys, starts = np.unique(keys, return_index=True)
+
+        # Swapped in as one tuple so a concurrent search never sees half a rebuild
+        self._table = _GramTable(
+            indexed=len(self.values),
+            value_array=np.asarray(self.values, dtype=str) if self.values else np.empty(0, dtype=str),
+            gram_keys=gram_keys,
+            gram_starts=np.append(starts, len(keys)),
+            gram_owners=owners,
+            # Values too short to contain a single trigram are checked directly
+            short_values=[code for code, value in enumerate(self.values) if len(value) < gram_size],
+        )
+        self._short_cache = {}
+
+    def code_for(self, value):
+        return self._code_for_normalized(_normalize([value]).iloc[0])
+
+    def _code_for_normalized(self, value):
+        code = self._code_of.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._code_of[value] = code
+            self._short_cache = {}
+            if len(self.values) - self._table.indexed >= _rebuild_threshold:
+                self._build()
+        return code
+
+    # Give the rows at `positions` the code of `value`. The rows go into the
+    # changed-rows overlay rather than a copy of the whole code array, so a
+    # decision costs the same however long the column is; the overlay is folded
+    # into a new code array once it holds `_overlay_limit` rows. Either way
+    # searches still running on the previous codes are unaffected.
+    def set(self, positions, value):
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        changed_positions, changed_codes = self._changed
+        kept = ~np.isin(changed_positions, positions)
+        changed_positions = np.concatenate([changed_positions[kept], positions])
+        changed_codes = np.concatenate([changed_codes[kept], np.full(len(positions), self.code_for(value), dtype=np.int32)])
+        if len(changed_positions) >= _overlay_limit:
+            codes = self.codes.copy()
+            codes[changed_positions] = changed_codes
+            self.codes = codes
+            self._identity = False
+            self._changed = _no_changes
+        else:
+            order = np.argsort(changed_positions, kind="stable")
+            self._changed = (changed_positions[order], changed_codes[order])
+
+    # Codes for new rows' values, adding the values not seen before
+    def encode(self, values):
+        return np.fromiter(map(self._code_for_normalized, _normalize(values)), dtype=np.int32, count=len(values))
+
+    # Add rows with codes from `encode`
+    def extend(self, new_codes):
+        if self._identity:
+            self._identity = np.array_equal(new_codes, np.arange(len(self.codes), len(self.codes) + len(new_codes)))
+        self.codes = np.concatenate([self.codes, new_codes])
+
+    @staticmethod
+    def _postings(table, gram_positions):
+        if len(gram_positions) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([
+            table.gram_owners[table.gram_starts[i]:table.gram_starts[i + 1]] for i in gram_positions
+        ])
+
+    # Boolean flag per distinct value: does it contain `text`?
+    def matching_values(self, text):
+        short_cache = self._short_cache
+        if text in short_cache:
+            return short_cache[text]
+
+        table = self._table
+        hits = np.zeros(len(self.values), dtype=bool)
+        if len(text) >= gram_size:
+            # Candidates share the query's rarest trigram; confirm them with a substring check
+            best, best_size = None, None
+            for start in range(len(text) - gram_size + 1):
+                key = _pack(text[start:start + gram_size])
+                i = np.searchsorted(table.gram_keys, key)
+                if i == len(table.gram_keys) or table.gram_keys[i] != key:
+                    # No indexed value has this trigram, so none can contain the query
+                    best = None
+                    break
+                size = table.gram_starts[i + 1] - table.gram_starts[i]
+                if best is None or size < best_size:
+                    best, best_size = i, size
+            if best is not None:
+                candidates = self._postings(table, [best])
+                confirmed = np.char.find(table.value_array[candidates], text) >= 0
+                hits[candidates[confirmed]] = True
+        else:
+            # Any value containing a 1-2 character query contains it inside one of its trigrams
+            grams = table.gram_keys
+            chars = [(grams >> (i * _char_bits)) & _char_mask for i in range(gram_size)]
+            query = [ord(char) for char in text]
+            found = np.zeros(len(grams), dtype=bool)
+            for offset in range(gram_size - len(text) + 1):
+                part = np.ones(len(grams), dtype=bool)
+                for i, char in enumerate(query):
+                    part &= chars[offset + i] == char
+                found |= part
+            hits[self._postings(table, np.flatnonzero(found))] = True
+            for code in table.short_values:
+                hits[code] = text in self.values[code]
+
+        # Values added since the last build are not in the n-gram table yet
+        for code in range(table.indexed, len(hits)):
+            hits[code] = text in self.values[code]
+
+        if len(text) < gram_size:
+            if len(short_cache) >= _short_cache_size:
+                short_cache.pop(next(iter(short_cache)), None)
+            short_cache[text] = hits
+        return hits
+
+    # Row mask for `text`, or None when no row matches. `codes`, `identity` and
+    # `changed` default to the current ones; a SearchView passes the ones it captured.
+    def match(self, text, codes=None, identity=None, changed=None):
+        if codes is None:
+            codes, identity, changed = self.codes, self._identity, self._changed
+        hits = self.matching_values(text)
+        if not hits.any():
+            return None
+        mask = hits[:len(codes)] if identity else hits.take(codes)
+        changed_positions, changed_codes = changed
+        if len(changed_positions):
+            if identity:
+                # `hits` may be cached; write into a copy
+                mask = mask.copy()
+            mask[changed_positions] = hits[changed_codes]
+        return mask
+
+    # Codes of the rows at `positions`, with the changed-rows overlay applied
+    @staticmethod
+    def row_codes(positions, codes, changed):
+        row_codes = codes[positions]
+        changed_positions, changed_codes = changed
+        if len(changed_positions):
+            slots = np.minimum(np.searchsorted(changed_positions, positions), len(changed_positions) - 1)
+            found = changed_positions[slots] == positions
+            row_codes[found] = changed_codes[slots[found]]
+        return row_codes
+
+
+# Search index over ID, name and status, built once when the data loads
+class SearchIndex:
+    def __init__(self, df):
+        self.columns = {column: ColumnIndex(df[column]) for column in searchable_columns}
+
+    def __len__(self):
+        return len(self.columns[searchable_columns[0]].codes)
+
+    # Case-insensitive substring match on any searchable column, as a row mask
+    def match(self, text):
+        return self.view().match(text)
+
+    # Freeze the current row codes. Later updates replace the code arrays and
+    # overlays rather than writing into them, so the view keeps answering for
+    # the rows it saw.
+    def view(self):
+        return SearchView([(column, column.codes, column._identity, column._changed) for column in self.columns.values()])
+
+    def update(self, positions, column, value):
+        if column in self.columns:
+            self.columns[column].set(positions, value)
+
+    # Every column is encoded before any is extended, so a failure leaves the index as it was
+    def append(self, frame):
+        new_codes = {column: index.encode(list(frame[column])) for column, index in self.columns.items()}
+        for column, index in self.columns.items():
+            index.extend(new_codes[column])
+
+
+class SearchView:
+    def __init__(self, columns):
+        self._columns = columns
+        self._size = len(columns[0][1])
+
+    def __len__(self):
+        return self._size
+
+    def match(self, text):
+        text = text.lower()
+        if not text:
+            return np.ones(self._size, dtype=bool)
+        mask = np.zeros(self._size, dtype=bool)
+        for column, codes, identity, changed in self._columns:
+            column_mask = column.match(text, codes, identity, changed)
+            if column_mask is not None:
+                mask |= column_mask
+        return mask
+
+    # Like match, but only for the rows at `positions`
+    def match_rows(self, text, positions):
+        text = text.lower()
+        if not text:
+            return np.ones(len(positions), dtype=bool)
+        mask = np.zeros(len(positions), dtype=bool)
+        for column, codes, _, changed in self._columns:
+            mask |= column.matching_values(text)[column.row_codes(positions, codes, changed)]
+        return mask
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from activity import activity_path_for, empty_events, parse_activity_feed
+
+# Columns with a small, fixed set of values are stored as categoricals
+categorical_columns = ["Status", "Race", "Nationality", "Risk Level"]
+
+# Columns rewritten by reviewer decisions. The rest of a memory-mapped
+# snapshot can stay read-only, but these need their own writable copy.
+mutable_columns = ["Status", "Details"]
+
+# Rows per Parquet row group. Reading one applicant's details on demand reads
+# the row group it is in, so groups are kept small.
+row_group_size = 16_384
+
+# Statuses the app can assign, kept as categories even if no applicant has them yet
+known_statuses = ["Approved", "In Progress", "Alerts", "Pending Approval", "Rejected"]
+
+
+def snapshot_path_for(excel_path):
+    return Path(excel_path).with_suffix(".parquet")
+
+
+def _meta_path(snapshot_path):
+    return snapshot_path.with_name(snapshot_path.name + ".json")
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Identify a version of the workbook. The hash is only computed when the cheap
+# mtime/size check says the file may have changed.
+def source_fingerprint(excel_path, previous=None):
+    stat = os.stat(excel_path)
+    fingerprint = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+    if previous and previous.get("mtime") == fingerprint["mtime"] and previous.get("size") == fingerprint["size"]:
+        fingerprint["sha256"] = previous.get("sha256")
+    else:
+        fingerprint["sha256"] = _file_hash(excel_path)
+    return fingerprint
+
+
+# Give the applicant table its storage dtypes
+def prepare_frame(df):
+    df['Application Date'] = pd.to_datetime(df['Application Date'], errors='coerce')
+    for column in categorical_columns:
+        if column not in df.columns:
+            continue
+        categories = list(dict.fromkeys(df[column].dropna().astype(str)))
+        if column == "Status":
+            categories = known_statuses + [c for c in categories if c not in known_statuses]
+        df[column] = pd.Categorical(df[column], categories=categories)
+    return df
+
+
+# Give new rows the columns and dtypes of `table`, so appending them keeps the
+# table's storage types. Returns the table (with any new categories added to
+# its categorical columns and integer columns widened to hold the new values,
+# shallow-copied if so) and the aligned rows.
+def align_rows(rows, table):
+    rows = rows.reindex(columns=table.columns)
+    table = table.copy(deep=False)
+    for column in table.columns:
+        values = table[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            new_categories = [c for c in dict.fromkeys(rows[column].dropna().astype(str)) if c not in values.cat.categories]
+            if new_categories:
+                table[column] = values.cat.add_categories(new_categories)
+            rows[column] = pd.Categorical(rows[column].astype(object), categories=table[column].cat.categories)
+        elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+            rows[column] = pd.to_datetime(rows[column], errors='coerce').astype(values.dtype)
+        elif isinstance(values.dtype, np.dtype) and values.dtype.kind in "iu" and rows[column].notna().all() and len(rows):
+            # Columns can be stored in the smallest type that held the loaded
+            # values (see compact_frame); casting larger ones to it would wrap them
+            numbers = pd.to_numeric(rows[column])
+            low, high = int(numbers.min()), int(numbers.max())
+            fits = next(dtype for dtype in (np.int8, np.int16, np.int32, np.int64) if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max)
+            dtype = np.promote_types(values.dtype, fits)
+            if dtype != values.dtype:
+                table[column] = values.astype(dtype)
+            rows[column] = numbers.astype(dtype)
+        else:
+            try:
+                rows[column] = rows[column].astype(values.dtype)
+            except (TypeError, ValueError):
+                # e.g. missing values in an integer column; concatenating will widen the column
+                pass
+    return table, rows
+
+
+# Columns of `rows` holding values that the column of the same name in a table
+# with `dtypes` cannot store, such as text in a numeric column, or a number
+# too large for any integer type in an integer column. align_rows would leave
+# such a column as objects, which later breaks sorting and saving.
+def incompatible_columns(rows, dtypes):
+    incompatible = []
+    limits = np.iinfo(np.int64)
+    for column in rows.columns:
+        if column not in dtypes.index:
+            continue
+        dtype = dtypes[column]
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            values = rows[column]
+            numbers = pd.to_numeric(values, errors='coerce')
+            if (numbers.isna() & values.notna()).any():
+                incompatible.append(column)
+            elif pd.api.types.is_integer_dtype(dtype) and ((numbers < limits.min) | (numbers > limits.max)).any():
+                incompatible.append(column)
+    return incompatible
+
+
+# Move the free-text "Activity Feed" column out of the applicant table into
+# typed events (one row per reached stage)
+def split_activity(df):
+    if "Activity Feed" not in df.columns:
+        return df, empty_events()
+    events = parse_activity_feed(df["Applicant ID"], df["Activity Feed"])
+    return df.drop(columns="Activity Feed"), events
+
+
+def save_activity(events, snapshot_path):
+    activity_path = activity_path_for(snapshot_path)
+    tmp_path = activity_path.with_name(activity_path.name + ".tmp")
+    events.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, activity_path)
+
+
+def save_snapshot(df, snapshot_path, fingerprint, audit_sequence=None):
+    snapshot_path = Path(snapshot_path)
+    # Write to temporary files and swap them in, so readers never see a partial snapshot
+    tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    df.to_parquet(tmp_path, index=False, row_group_size=row_group_size)
+    os.replace(tmp_path, snapshot_path)
+    save_snapshot_meta(snapshot_path, fingerprint, audit_sequence)
+
+
+# The meta file names the workbook version the snapshot was built from and,
+# as `audit`, the audit record up to which every decision is either in the
+# snapshot or in the journal
+def save_snapshot_meta(snapshot_path, fingerprint, audit_sequence=None):
+    meta_path = _meta_path(Path(snapshot_path))
+    tmp_meta_path = meta_path.with_name(meta_path.name + ".tmp")
+    meta = {"source": fingerprint}
+    if audit_sequence is not None:
+        meta["audit"] = audit_sequence
+    tmp_meta_path.write_text(json.dumps(meta))
+    os.replace(tmp_meta_path, meta_path)
+
+
+def read_snapshot_meta(snapshot_path):
+    meta_path = _meta_path(Path(snapshot_path))
+    if not meta_path.exists():
+        return None
+    try:
+        return json.loads(meta_path.read_text())
+    except json.JSONDecodeError:
+        return None
+
+
+# Read the snapshot, or only `columns` of it
+def read_snapshot(snapshot_path, columns=None):
+    import pyarrow.parquet as pq
+
+    if "Activity Feed" in pq.read_schema(snapshot_path).names:
+        # Snapshot from before activity events were stored separately
+        df, events = split_activity(pd.read_parquet(snapshot_path))
+        save_activity(events, snapshot_path)
+        meta = read_snapshot_meta(snapshot_path)
+        save_snapshot(df, snapshot_path, meta["source"] if meta else None, meta.get("audit") if meta else None)
+        if columns is not None:
+            df = df[[column for column in df.columns if column in columns]]
+    else:
+        if columns is not None:
+            columns = [column for column in pq.read_schema(snapshot_path).names if column in columns]
+        df = pd.read_parquet(snapshot_path, columns=columns, memory_map=True)
+    for column in mutable_columns:
+        if column in df.columns:
+            df[column] = df[column].copy()
+    return df
+
+
+# Write a snapshot from an iterable of applicant frames without holding the whole
+# table in memory. Such a snapshot has no source workbook.
+def write_snapshot_chunks(frames, snapshot_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    snapshot_path = Path(snapshot_path)
+    activity_path = activity_path_for(snapshot_path)
+    tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    tmp_activity_path = activity_path.with_name(activity_path.name + ".tmp")
+    writers = {}
+    rows = 0
+
+    def write(path, frame):
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if path not in writers:
+            writers[path] = pq.ParquetWriter(path, table.schema)
+        writers[path].write_table(table.cast(writers[path].schema), row_group_size=row_group_size)
+
+    try:
+        for frame in frames:
+            frame, events = split_activity(prepare_frame(frame))
+            write(tmp_path, frame)
+            write(tmp_activity_path, events)
+            rows += len(frame)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    os.replace(tmp_path, snapshot_path)
+    os.replace(tmp_activity_path, activity_path)
+    save_snapshot_meta(snapshot_path, None)
+    return rows
+
+
+# Load the applicant table from the columnar snapshot, rebuilding it from the
+# workbook only when the workbook has changed since the snapshot was taken.
+# With `columns`, only those columns are returned. The workbook does not have
+# what was saved into the snapshot since (compacted decisions, ingested
+# applicants): `on_rebuild(df)` is called with the table read from the
+# workbook before it replaces the snapshot, so decisions can be reapplied, and
+# applicants only the old snapshot had are reported.
+def load_applicants(excel_path, snapshot_path=None, columns=None, on_rebuild=None):
+    snapshot_path = Path(snapshot_path or snapshot_path_for(excel_path))
+    meta = read_snapshot_meta(snapshot_path)
+    previous = meta["source"] if meta else None
+    audit_sequence = meta.get("audit") if meta else None
+
+    if not Path(excel_path).exists():
+        # A snapshot generated directly (generate_data.py --format native) has no workbook behind it
+        if snapshot_path.exists():
+            return read_snapshot(snapshot_path, columns), previous
+        raise FileNotFoundError(f"Neither {excel_path} nor {snapshot_path} exists. Run generate_data.py first.")
+
+    if snapshot_path.exists() and previous is not None:
+        fingerprint = source_fingerprint(excel_path, previous)
+        if fingerprint["sha256"] == previous.get("sha256"):
+            if fingerprint != previous:
+                # Touched but unchanged; remember the new mtime to skip hashing next time
+                save_snapshot_meta(snapshot_path, fingerprint, audit_sequence)
+            return read_snapshot(snapshot_path, columns), fingerprint
+    else:
+        fingerprint = source_fingerprint(excel_path)
+
+    df, events = split_activity(prepare_frame(pd.read_excel(excel_path)))
+    if on_rebuild is not None:
+        on_rebuild(df)
+    if snapshot_path.exists():
+        previous_ids = pd.read_parquet(snapshot_path, columns=["Applicant ID"])["Applicant ID"]
+        dropped = previous_ids[~previous_ids.isin(df["Applicant ID"])]
+        if len(dropped):
+            print(
+                f"Warning: {excel_path} changed, and {len(dropped)} applicants in the previous snapshot "
+                f"(e.g. ingested ones) are not in it: {', '.join(map(str, dropped[:10]))}. They were dropped."
+            )
+    save_activity(events, snapshot_path)
+    save_snapshot(df, snapshot_path, fingerprint, audit_sequence)
+    if columns is not None:
+        df = df[[column for column in df.columns if column in columns]]
+    return df, fingerprint
@@ -1,71 +1,676 @@
-import solara
+import os
+import ipywidgets
 import pandas as pd
-from datetime import datetime
+import solara
+from collections import namedtuple
 from pathlib import Path
 
-# Load data from Excel file
+from analytics import analytics_columns, group_columns
+from data_server import address_variable, authkey_variable, connect
+from data_service import ApplicantService, sortable_columns
+from export import ExportManager, export_formats
+from images import ProfilePictures
+from ingest import Ingestor
+from metrics import instrumented, metrics, start_metrics_log
+from reporting import distribution_dimensions, rate_dimensions
+from triage import load_rules
+
+# Data files
 excel_file_path = "applicant_data.xlsx"  # Specify your Excel file path here
-df = pd.read_excel(excel_file_path)
+journal_file_path = "decisions.journal"
+
+# How often (in seconds) the decision journal is folded back into the snapshot
+compaction_interval = float(os.environ.get("JOURNAL_COMPACTION_INTERVAL", 300))
+
+# Optional JSON file with triage rules replacing the built-in ones in triage.py
+triage_rules_path = os.environ.get("TRIAGE_RULES")
+
+# Set LAZY_COLUMNS=1 to keep only the list columns in memory and read the rest
+# of an applicant's details from the snapshot when they are opened
+lazy_columns = os.environ.get("LAZY_COLUMNS") == "1"
+
+# With DATA_SERVER (host:port) and DATA_SERVER_KEY set, this process is one of several
+# workers reading the table held by a data server (see data_server.py), which also
+# applies every decision and ingests new applicants
+data_server_address = os.environ.get(address_variable)
+
+if data_server_address:
+    service = connect(data_server_address, bytes.fromhex(os.environ[authkey_variable]))
+else:
+    # One service owns the applicant table for every session in this process
+    service = ApplicantService(
+        excel_file_path, journal_file_path, compaction_interval,
+        load_rules(triage_rules_path) if triage_rules_path else None, lazy_columns
+    )
 
-# Ensure the DataFrame contains the expected columns
-required_columns = ["Applicant ID", "Application Date", "Full Name", "Status", "Details"]
-if not all(col in df.columns for col in required_columns):
-    raise ValueError(f"The Excel file must contain the following columns: {required_columns}")
+    # New applicants dropped into this directory (as CSV or JSON lines files) are added to the live table
+    ingest_directory = os.environ.get("INGEST_DIRECTORY", "incoming")
+    ingestor = Ingestor(service, ingest_directory)
+    ingestor.start()
 
-# Convert 'Application Date' to datetime if it is not already
-df['Application Date'] = pd.to_datetime(df['Application Date'], errors='coerce')
+# Applicant photos, named after the applicant ID (e.g. photos/APP001.jpg); applicants without one get the default picture
+photo_directory = os.environ.get("PHOTO_DIRECTORY", "photos")
+pictures = ProfilePictures(photo_directory)
 
-# Function to save updates to the Excel file
-def save_updates():
-    df.to_excel(excel_file_path, index=False)
+# Exports of the filtered applicant list run in the background and are downloaded as static files
+exports = ExportManager()
 
-def handle_approval(applicant_id, comments):
-    # Update the applicant's status to 'Approved' and add comments
-    global df  # Access the global DataFrame
-    df.loc[df['Applicant ID'] == applicant_id, 'Status'] = 'Approved'
-    df.loc[df['Applicant ID'] == applicant_id, 'Details'] = comments
+# Set PROFILING_PANEL=1 to add a Profiling page with render and data timings to the sidebar
+profiling_panel = os.environ.get("PROFILING_PANEL") == "1"
+
+# With METRICS_LOG set, a JSON line with every timer, counter and gauge is appended to that file periodically
+metrics_log_path = os.environ.get("METRICS_LOG")
+metrics_log_interval = float(os.environ.get("METRICS_LOG_INTERVAL", 60))
+if metrics_log_path:
+    start_metrics_log(metrics_log_path, metrics_log_interval)
+
+metrics.gauge("widgets", lambda: len(ipywidgets.widgets.widget._instances))
+metrics.gauge("table.version", lambda: service.version)
+metrics.gauge("table.rows", lambda: len(service.snapshot()))
+metrics.gauge("thumbnails.hits", lambda: pictures.hits)
+metrics.gauge("thumbnails.misses", lambda: pictures.misses)
+
+# Page sizes offered for the applicant list
+page_size_options = [5, 10, 25, 50, 100]
+
+# How long typing has to pause (in seconds) before the applicant table is filtered again
+filter_debounce_seconds = 0.15
 
-    # Write the updated DataFrame back to the Excel file
-    save_updates()
+# Most recent decisions listed in an applicant's history
+history_entries_shown = 10
+
+# How long (in seconds) a session waits for a new data version before checking again
+version_poll_seconds = 1.0
+
+def handle_approval(applicant_id, comments, reviewer=None):
+    # Update the applicant's status to 'Approved' and add comments
+    service.record_decision(applicant_id, 'Approved', comments, reviewer)
     print(f"Application {applicant_id} approved with comments: {comments}")
 
-def handle_rejection(applicant_id, comments):
+def handle_rejection(applicant_id, comments, reviewer=None):
     # Update the applicant's status to 'Rejected' and add comments
-    global df  # Access the global DataFrame
-    df.loc[df['Applicant ID'] == applicant_id, 'Status'] = 'Rejected'
-    df.loc[df['Applicant ID'] == applicant_id, 'Details'] = comments
-
-    # Write the updated DataFrame back to the Excel file
-    save_updates()
+    service.record_decision(applicant_id, 'Rejected', comments, reviewer)
     print(f"Application {applicant_id} rejected with comments: {comments}")
 
+def handle_batch_decision(applicant_ids, status, comments, reviewer=None, on_progress=None):
+    # Give every applicant in the batch the same status and comments, all or none of them
+    service.record_decisions(applicant_ids, status, comments, reviewer, on_progress)
+    print(f"{len(applicant_ids)} applications set to {status} with comments: {comments}")
+    return len(applicant_ids)
+
+
+# A filter result and the table version it is current for
+FilterResult = namedtuple("FilterResult", ["version", "positions"])
+
+
+def use_data_snapshot():
+    # The latest table snapshot for this session. A background thread waits for
+    # new versions from the service and swaps the snapshot in when one arrives.
+    snapshot, set_snapshot = solara.use_state(service.snapshot())
+
+    def watch(cancel):
+        seen = snapshot.version
+        while not cancel.is_set():
+            latest = service.wait_for_version(seen, timeout=version_poll_seconds)
+            if latest.version != seen:
+                seen = latest.version
+                set_snapshot(latest)
+
+    solara.use_thread(watch, [], intrusive_cancel=False)
+    return snapshot
+
+
+def use_patched_positions(snapshot, filter_result, filter_text, include_approved, sort_by, sort_ascending):
+    # Keep a finished filter result current as decisions come in. Only the
+    # applicants named in each change are re-checked; the result is refiltered
+    # from scratch only when the change feed no longer reaches back far enough.
+    latest = solara.use_ref(None)
+
+    def patch():
+        base = filter_result.value
+        if base is None:
+            return None
+        if latest.current is None or latest.current[0] is not base:
+            latest.current = (base, base)
+        current = latest.current[1]
+        if current.version < snapshot.version:
+            changes = service.changes_since(current.version, snapshot.version)
+            if changes is None:
+                metrics.increment("filter.refiltered")
+                positions = snapshot.filter(filter_text, include_approved, sort_by, sort_ascending)
+            else:
+                metrics.increment("filter.patched")
+                positions = snapshot.patch_filter(current.positions, changes, filter_text, include_approved, sort_by, sort_ascending)
+            current = FilterResult(snapshot.version, positions)
+            latest.current = (base, current)
+        return current.positions
+
+    return solara.use_memo(patch, [filter_result.value, snapshot.version])
+
+
+@solara.component
+@instrumented
+def ApplicantList(rows, page_size, on_select, checked_ids, on_check):
+    # A fixed set of row slots. Slots past the end of the page are hidden instead of
+    # removed, so flipping pages only updates the labels of the same widgets.
+    for slot in range(page_size):
+        row = rows[slot] if slot < len(rows) else None
+        applicant_id = row['Applicant ID'] if row is not None else None
+        button_style = {
+            "margin": "5px",
+            "padding": "10px",
+            "border": "1px solid #ccc",
+            "borderRadius": "5px",
+            "cursor": "pointer",
+            "backgroundColor": "#f9f9f9",
+            "width": "100%",
+            "textAlign": "left",
+            "display": "flex",
+            "alignItems": "center"
+        }
+
+        with solara.Div(style={"display": "flex" if row is not None else "none", "alignItems": "center"}):
+            # Checkbox to include the applicant in a batch decision
+            solara.Checkbox(
+                value=applicant_id in checked_ids,
+                on_value=lambda checked, applicant_id=applicant_id: on_check(applicant_id, checked) if applicant_id is not None else None
+            )
+
+            solara.Button(
+                label=f"Applicant ID: {row['Applicant ID']} | Name: {row['Full Name']} | Status: {row['Status']}" if row is not None else "",
+                style=button_style,
+                on_click=lambda applicant_id=applicant_id: on_select(applicant_id) if applicant_id is not None else None
+            )
+
+
+# The components below each take only plain values (IDs, counts, the table
+# snapshot, which is replaced rather than changed), so Solara skips rendering
+# them again when a parent re-renders with the same arguments. State that
+# changes on every keystroke or page flip lives in the component that shows it.
+
+@solara.component
+@instrumented
+def StatusCards(status_counts):
+    # Create a container for the status cards
+    with solara.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "10px"}):
+        # Define card data for each status
+        card_data = [
+            {"title": "Approved", "symbol": "✅", "color": "green", "borderColor": "green", "number": status_counts.get("Approved", 0), "info": "Total number of approved applications"},
+            {"title": "In Progress", "symbol": "🔄", "color": "orange", "borderColor": "orange", "number": status_counts.get("In Progress", 0), "info": "Total number of applications currently being processed."},
+            {"title": "Alerts", "symbol": "⚠️", "color": "darkred", "borderColor": "darkred", "number": status_counts.get("Alerts", 0), "info": "Total number of applications that are suspicious"},
+            {"title": "Pending Approval", "symbol": "⏳", "color": "blue", "borderColor": "blue", "number": status_counts.get("Pending Approval", 0), "info": "Total number of applications awaiting approval"},
+            {"title": "Rejected", "symbol": "❌", "color": "red", "borderColor": "red", "number": status_counts.get("Rejected", 0), "info": "Total number of rejected applications"},
+        ]
+
+        # Loop through each card data entry to create the cards
+        for card in card_data:
+            # Define styles for each card
+            card_style = {
+                "border": f"2px solid {card['borderColor']}",
+                "borderRadius": "5px",
+                "padding": "8px",
+                "flex": "1 1 150px",  # Flex properties for responsiveness
+                "cursor": "pointer",
+                "height": "100px",
+                "position": "relative"
+            }
+
+            # Create the card container
+            with solara.Div(style=card_style):
+                # Add a tooltip with information about the card
+                with solara.Tooltip(solara.Markdown(card['info']), color="white"):
+                    # Information icon in the top right corner
+                    solara.Div("ℹ️", style={"position": "absolute", "top": "8px", "right": "8px", "fontSize": "16px", "color": "gray", "cursor": "pointer"})
+
+                # Layout for the card content
+                with solara.Div(style={"display": "flex", "alignItems": "center"}):
+                    # Display the status symbol
+                    solara.Div(card["symbol"], style={"color": card["color"], "fontSize": "40px", "marginRight": "10px"})
+
+                    # Column layout for title and count
+                    solara.Div(
+                        style={"display": "flex", "flexDirection": "column"},
+                        children=[
+                            solara.Markdown(f"**{card['title']}**", style={"color": card["color"], "fontSize": "18px", "fontWeight": "bold"}),
+                            solara.Markdown(f"{card['number']}", style={"fontSize": "24px", "fontWeight": "bold"})
+                        ]
+                    )
+
+
+@solara.component
+@instrumented
+def ApplicantPager(snapshot, positions, on_select, checked_ids, on_check):
+    # State for pagination, kept here so flipping pages re-renders only the list
+    current_page, set_current_page = solara.use_state(0)  # Tracks the current page for applicant listings
+    items_per_page, set_items_per_page = solara.use_state(page_size_options[0])  # Number of applicants per page
+
+    # Read only the visible page from the filtered positions
+    applicant_page = snapshot.fetch_page(positions, current_page, items_per_page)
+
+    # Display the page as clickable buttons
+    ApplicantList(applicant_page.rows, items_per_page, on_select, checked_ids, on_check)
+
+    # Pagination controls
+    with solara.Div(style={"display": "flex", "justifyContent": "space-between", "marginTop": "10px"}):
+        solara.Button(
+            label="Previous",
+            on_click=lambda: set_current_page(max(applicant_page.page - 1, 0)),
+            disabled=applicant_page.page == 0
+        )
+
+        solara.Markdown(f"Page {applicant_page.page + 1} of {applicant_page.page_count} | Total Applications: {applicant_page.total}")
+
+        solara.Button(
+            label="Next",
+            on_click=lambda: set_current_page(min(applicant_page.page + 1, applicant_page.page_count - 1)),
+            disabled=applicant_page.page >= applicant_page.page_count - 1
+        )
+
+        solara.Select(
+            label="Per page",
+            values=page_size_options,
+            value=items_per_page,
+            on_value=lambda size: (set_items_per_page(size), set_current_page(0)),
+            style={"maxWidth": "100px"}
+        )
+
+
+@solara.component
+@instrumented
+def BatchDecisionForm(visible, running, completed, on_submit):
+    # Comments applied to every ticked applicant, cleared once a batch has been saved
+    comments, set_comments = solara.use_state("")
+    solara.use_effect(lambda: set_comments(""), [completed])
+
+    # Hidden rather than removed when nothing is ticked, so the list below keeps its widgets
+    with solara.Div(style={"display": "flex" if visible else "none", "alignItems": "center", "gap": "10px"}):
+        solara.InputText(label="Comments for selected", value=comments, on_value=set_comments, continuous_update=True, style={"flex": "1"})
+        solara.Button("Approve Selected", on_click=lambda: on_submit('Approved', comments), disabled=running, style={"backgroundColor": "green", "color": "white"})
+        solara.Button("Reject Selected", on_click=lambda: on_submit('Rejected', comments), disabled=running, style={"backgroundColor": "red", "color": "white"})
+
+
+@solara.component
+@instrumented
+def ProfileCard(applicant_id, status, photo_matched, ic_verified, rating_score, risk_level, compliance_probability):
+    # Profile image, served as a cached thumbnail at a content-addressed URL
+    picture = pictures.thumbnail(applicant_id)
+
+    with solara.Div(style={
+        "border": "1px solid #ddd",
+        "borderRadius": "8px",
+        "padding": "8px",
+        "display": "inline-block",
+        "boxShadow": "0 1px 5px rgba(0, 0, 0, 0.1)",
+        "backgroundColor": "#fff",
+        "maxWidth": "250px"  # Set a smaller max width
+    }):
+        solara.v.Html(tag="img", attributes={"src": picture.url, "alt": "Profile picture"}, style_="width: 100%; display: block")  # Display profile image
+
+        # Status color mapping
+        status_color_map = {
+            "APPROVED": "green",
+            "IN PROGRESS": "orange",
+            "ALERTS": "darkred",
+            "PENDING APPROVAL": "blue",
+            "REJECTED": "red"
+        }
+
+        current_status = status.upper()
+        background_color = status_color_map.get(current_status, "gray")
+        status_box_style = {
+            "height": "25px",
+            "backgroundColor": background_color,
+            "borderRadius": "4px",
+            "display": "flex",
+            "alignItems": "center",
+            "justifyContent": "center",
+            "marginTop": "5px",
+            "color": "white",
+            "fontWeight": "bold",
+            "fontSize": "12px"  # Smaller font size
+        }
+        with solara.Div(style=status_box_style):
+            solara.Markdown(f"**{current_status}**", style={"margin": "0", "color": "white"})
+
+        # Displaying status indicators
+        for status_text, is_matched in [("PHOTO MATCHED", photo_matched), ("IC VERIFIED", ic_verified)]:
+            color = "green" if is_matched == 1 else "red"
+
+            # Status boxes
+            status_styles = {
+                "height": "25px",
+                "backgroundColor": color,
+                "borderRadius": "4px",
+                "display": "flex",
+                "alignItems": "center",
+                "justifyContent": "center",
+                "marginTop": "5px",
+                "color": "white",
+                "fontWeight": "bold",
+                "fontSize": "12px"
+            }
+            with solara.Div(style=status_styles):
+                solara.Markdown(f"**{status_text}**", style={"margin": "0", "color": "white"})
+
+        # Info boxes layout
+        with solara.Div(style={"display": "flex", "flexDirection": "column", "gap": "5px", "marginTop": "10px"}):
+            new_box_data = [
+                {"title": "Rating Score", "value": rating_score},
+                {"title": "Risk Level", "value": risk_level},
+                {"title": "Compliance Probability", "value": compliance_probability},
+            ]
+
+            for item in new_box_data:
+                with solara.Div(style={
+                    "border": "1px solid #ddd",
+                    "borderRadius": "4px",
+                    "padding": "5px",
+                    "backgroundColor": "#f9f9f9",
+                    "boxShadow": "0 1px 3px rgba(0, 0, 0, 0.1)"
+                }):
+                    solara.Markdown(f"**{item['title']}:** {item['value']}", style={
+                        "margin": "0",
+                        "fontSize": "12px"  # Smaller font size
+                    })
+
+
+@solara.component
+@instrumented
+def DecisionHistory(applicant_id, version):
+    # The applicant's decision history, read again when a new version may have added to it
+    history = solara.use_memo(lambda: service.audit.history(applicant_id), [applicant_id, version])
+
+    # Earlier decisions, newest first, from the audit trail
+    with solara.Column(gap="0px"):
+        if len(history):
+            solara.Markdown(f"**Decision History:** {len(history)} decision{'s' if len(history) != 1 else ''}")
+            for record in history.iloc[::-1].head(history_entries_shown).to_dict("records"):
+                reviewer = f" by {record['Reviewer']}" if record['Reviewer'] else ""
+                solara.Markdown(
+                    f"{record['Timestamp'].strftime('%Y-%m-%d %H:%M')} · {record['Previous Status'] or '—'} → "
+                    f"**{record['Status']}**{reviewer}: {record['Comment'] or '(no comment)'}",
+                    style={"fontSize": "12px", "margin": "0"}
+                )
+
+
+@solara.component
+@instrumented
+def ApplicantDetails(snapshot, applicant_id):
+    applicant_info = snapshot.applicant(applicant_id)
+
+    with solara.Div(style={"display": "flex", "alignItems": "flex-start", "gap": "20px", "margin": "10px 0"}):
+        ProfileCard(
+            applicant_id,
+            applicant_info['Status'],
+            applicant_info['PHOTO MATCHED'],
+            applicant_info['IC VERIFIED'],
+            applicant_info['Rating Score'],
+            applicant_info['Risk Level'],
+            applicant_info['Compliance Probability']
+        )
+
+        # Display the applicant information based on the selected applicant
+        with solara.Div(style={"display": "flex", "flexDirection": "column", "border": "1px solid #ccc", "borderRadius": "5px", "padding": "10px", "backgroundColor": "#f9f9f9"}):
+            solara.Markdown(f"**Applicant ID:** {applicant_info['Applicant ID']}")
+            solara.Markdown(f"**Full Name:** {applicant_info['Full Name']}")
+            solara.Markdown(f"**Date of Birth & Gender:** {applicant_info.get('Date of Birth', 'N/A')} | {applicant_info.get('Gender', 'N/A')}")
+            solara.Markdown(f"**Address:** {applicant_info.get('Address', 'N/A')}")
+            solara.Markdown(f"**Race & Nationality:** {applicant_info.get('Race', 'N/A')} | {applicant_info.get('Nationality', 'N/A')}")
+            solara.Markdown(f"**Employment Status & Occupation:** {applicant_info.get('Employment Status', 'N/A')} | {applicant_info.get('Occupation', 'N/A')}")
+            solara.Markdown(f"**Annual Income (RM) & Net Worth (RM):** {applicant_info.get('Annual Income (RM)', 'N/A')} | {applicant_info.get('Net Worth (RM)', 'N/A')}")
+            solara.Markdown(f"**Attempt of Application & Time Taken:** {applicant_info.get('Attempt of Application', 'N/A')} | {applicant_info.get('Time Taken (minutes)', 'N/A')}")
+            solara.Markdown(f"**Source of Funds:** {applicant_info.get('Source of Funds', 'N/A')}")
+
+            # Which triage rule routed the applicant, if any
+            with solara.Column(gap="0px"):
+                triage_rule = snapshot.triage_rule(applicant_id)
+                if triage_rule >= 0:
+                    solara.Markdown(f"**Triage:** {service.triage.rule_name(triage_rule)} → {service.triage.queue(triage_rule)}")
+
+            DecisionHistory(applicant_id, snapshot.version)
+
+
+@solara.component
+@instrumented
+def DecisionForm(applicant_id, on_decided):
+    # Comments entered by the admin, kept here so typing re-renders only this form
+    admin_comments, set_admin_comments = solara.use_state("")
+
+    # Clear comments when the selected applicant changes
+    solara.use_effect(
+        lambda: set_admin_comments(""),  # Reset comments field
+        [applicant_id]  # Dependency: triggers when applicant_id changes
+    )
+
+    with solara.Div(style={"display": "flex", "alignItems": "center", "gap": "10px", "marginTop": "10px"}):
+        solara.InputText(label="Enter comments", value=admin_comments, on_value=set_admin_comments, continuous_update=True, style={"flex": "1"})
+
+        solara.Button("Approve",
+                      on_click=lambda: (
+                          handle_approval(applicant_id, admin_comments, solara.get_session_id()),
+                          set_admin_comments(""),  # Clear comments field
+                          on_decided()
+                      ),
+                      style={"backgroundColor": "green", "color": "white"})
+
+        solara.Button("Reject",
+                      on_click=lambda: (
+                          handle_rejection(applicant_id, admin_comments, solara.get_session_id()),
+                          set_admin_comments(""),  # Clear comments field
+                          on_decided()
+                      ),
+                      style={"backgroundColor": "red", "color": "white"})
+
+
+@solara.component
+@instrumented
+def ActivityFeed(applicant_id, version):
+    if applicant_id is not None:
+        # The selected applicant's stages, their statuses, and timestamps
+        stages = service.activity_log.timeline(applicant_id)
+    else:
+        stages = []
+        solara.Markdown("Select an applicant to see their activity.")
+
+        # Where applications currently are, across all applicants
+        with solara.Div(style={"padding": "20px", "fontFamily": "Arial"}):
+            for stage, count in service.activity_log.current_stage_counts().items():
+                solara.Markdown(f"<span style='font-size: 15px;'>**{stage}**: {count} applications")
+
+    # Display each stage with appropriate icons and timestamps
+    with solara.Div(style={"padding": "20px", "fontFamily": "Arial"}):
+        for stage, status, timestamp in stages:
+            if status == "completed":
+                icon = "✅"  # Green check mark for completed stages
+            elif status == "in_progress":
+                icon = "⏳"  # Hourglass for in-progress stages
+            else:
+                icon = "⚪"  # No color circle for not yet reached stages
+
+            solara.Markdown(f"<span style='font-size: 15px;'>{icon} **{stage}** - *{timestamp}*")
+
+
+@solara.component
+@instrumented
+def ReportTable(title, table):
+    # A pre-computed report table; the dimension values become the first column
+    solara.Markdown(f"### {title}")
+    solara.DataFrame(table.reset_index(), items_per_page=10)
+
 
 @solara.component
+@instrumented
+def ReportingPage(reports, triage_summary):
+    rate_dimension, set_rate_dimension = solara.use_state(rate_dimensions[0])  # Dimension the rates are broken down by
+    distribution_dimension, set_distribution_dimension = solara.use_state(distribution_dimensions[0])  # Column whose distribution is shown
+
+    solara.Markdown("## Reporting Page")
+
+    # Every table below is read from cubes the service keeps up to date per decision
+    ReportTable("Applications per Day by Status", reports.counts("Application Day"))
+
+    solara.Select(label="Rates by", values=rate_dimensions, value=rate_dimension, on_value=set_rate_dimension, style={"maxWidth": "280px"})
+    ReportTable(f"Approval and Rejection Rates by {rate_dimension}", reports.rates(rate_dimension))
+
+    solara.Select(label="Distribution of", values=distribution_dimensions, value=distribution_dimension, on_value=set_distribution_dimension, style={"maxWidth": "280px"})
+    ReportTable(f"Distribution of {distribution_dimension}", reports.distribution(distribution_dimension))
+
+    # How many applicants each triage rule routed when the data was loaded
+    ReportTable("Triage Rules", triage_summary)
+
+
+@solara.component
+@instrumented
+def HistogramChart(table):
+    # Bar chart of a pre-computed histogram table
+    option = {
+        "tooltip": {},
+        "xAxis": {"type": "category", "data": [f"{low:g}–{high:g}" for low, high in zip(table["From"], table["To"])]},
+        "yAxis": {"type": "value"},
+        "series": [{"type": "bar", "data": [int(count) for count in table["Applicants"]]}],
+    }
+    solara.FigureEcharts(option=option)
+
+
+@solara.component
+@instrumented
+def AnalyticsPage(snapshot):
+    histogram_column, set_histogram_column = solara.use_state(analytics_columns[0])  # Column shown in the histogram
+    group_column, set_group_column = solara.use_state(group_columns[0])  # Column the means are broken down by
+
+    # Results are kept on the snapshot's Analytics, so only the first session to ask
+    # for one at a given version computes it; the rest (and re-renders) read it back
+    analytics = snapshot.analytics
+
+    def compute():
+        return analytics.summary(), analytics.histogram(histogram_column), analytics.correlations(), analytics.group_means(group_column)
+
+    result = solara.use_thread(compute, [snapshot.version, histogram_column, group_column])
+
+    solara.Markdown("## Analytics Page")
+    if result.state == solara.ResultState.ERROR:
+        solara.Error(f"Could not compute analytics: {result.error}")
+    solara.ProgressLinear(result.state == solara.ResultState.RUNNING)
+    if result.value is None:
+        return
+    summary, histogram, correlations, group_means = result.value
+
+    ReportTable("Summary of Numeric Columns", summary)
+
+    solara.Select(label="Histogram of", values=analytics_columns, value=histogram_column, on_value=set_histogram_column, style={"maxWidth": "280px"})
+    HistogramChart(histogram)
+
+    ReportTable("Correlations", correlations)
+
+    solara.Select(label="Break down by", values=group_columns, value=group_column, on_value=set_group_column, style={"maxWidth": "280px"})
+    ReportTable(f"Averages by {group_column}", group_means)
+
+    # Applicant counts by risk level and status come from the reporting cubes
+    ReportTable("Applicants by Risk Level and Status", snapshot.reports.counts("Risk Level"))
+
+
+@solara.component
+@instrumented
+def ProfilingPanel(version):
+    # Re-read whenever the table changes, or on request
+    refreshes, set_refreshes = solara.use_state(0)
+    report = solara.use_memo(metrics.report, [version, refreshes])
+
+    solara.Markdown("## Profiling")
+    solara.Markdown(f"Since {report['since']}, as of {report['timestamp']}. Times are in milliseconds; `render.*` is the component's own body.")
+    with solara.Div(style={"display": "flex", "gap": "10px"}):
+        solara.Button("Refresh", on_click=lambda: set_refreshes(refreshes + 1))
+        solara.Button("Reset", on_click=lambda: (metrics.reset(), set_refreshes(refreshes + 1)))
+
+    ReportTable("Timers", pd.DataFrame.from_dict(report["timers"], orient="index").rename_axis("Stage"))
+    ReportTable("Counters", pd.Series(report["counters"], name="Count", dtype=object).rename_axis("Counter").to_frame())
+    ReportTable("Gauges", pd.Series(report["gauges"], name="Value", dtype=object).rename_axis("Gauge").to_frame())
+
+
+@solara.component
+@instrumented
 def Page():
     # Load custom CSS for styling
     solara.Style(Path("custom.css"))
     
+    # The version of the applicant table this render works on
+    snapshot = use_data_snapshot()
+
     # State management
     selected_page, set_selected_page = solara.use_state("Admin")  # Tracks the currently selected page
 
     # Filter state for searching applicants
     filter_text, set_filter_text = solara.use_state("")  # Text input for filtering
     include_approved, set_include_approved = solara.use_state(True)  # Checkbox to include approved applicants
-    last_updated, set_last_updated = solara.use_state(datetime.now().strftime("%Y-%m-%d %H:%M"))  # Timestamp for last update
+    sort_by, set_sort_by = solara.use_state("Application Date")  # Column the applicant list is ordered by
+    sort_ascending, set_sort_ascending = solara.use_state(True)  # Checkbox to sort in ascending order
 
-    # State for selected applicant and admin comments
+    # State for the selected applicant
     selected_applicant, set_selected_applicant = solara.use_state(None)  # Currently selected applicant ID
-    admin_comments, set_admin_comments = solara.use_state("")  # Comments entered by the admin
     show_confirmation, set_show_confirmation = solara.use_state(False)  # State for showing confirmation popup
 
-    # Clear comments when the selected applicant changes
-    solara.use_effect(
-        lambda: set_admin_comments(""),  # Reset comments field
-        [selected_applicant]  # Dependency: triggers when selected_applicant changes
-    )
-
-    # State for pagination
-    current_page, set_current_page = solara.use_state(0)  # Tracks the current page for applicant listings
+    # State for batch decisions
+    checked_ids, set_checked_ids = solara.use_state(frozenset())  # Applicants ticked in the list
+    batch_request, set_batch_request = solara.use_state(None)  # (number, status, comments, IDs, reviewer) of the last batch submitted
+    batch_progress, set_batch_progress = solara.use_state(0.0)  # Fraction of the running batch that is done
+
+    # State for exports
+    export_format, set_export_format = solara.use_state("csv")  # File format of the next export
+    export_job, set_export_job = solara.use_state(None)  # This session's latest export job
+    export_error, set_export_error = solara.use_state(None)  # Why the latest export could not start
+    _, set_export_progress = solara.use_state(None)  # (job ID, state, fraction done), updated by the job to re-render
+
+    # Filter in a background thread. A new keystroke or checkbox toggle cancels the
+    # running filter, and the debounce wait means only the last of a burst does any work.
+    def run_filter(cancel):
+        if cancel.wait(filter_debounce_seconds):
+            metrics.increment("filter.cancelled")
+            raise solara.util.CancelledError()
+        return FilterResult(snapshot.version, snapshot.filter(filter_text, include_approved, sort_by, sort_ascending))
+
+    filter_result = solara.use_thread(run_filter, [filter_text, include_approved, sort_by, sort_ascending])
+
+    # New decisions are patched into the finished result rather than triggering a new filter
+    sorted_positions = use_patched_positions(snapshot, filter_result, filter_text, include_approved, sort_by, sort_ascending)
+
+    # Apply a submitted batch decision in a background thread, so its progress can be shown
+    def run_batch():
+        if batch_request is None:
+            return None
+        _, status, comments, applicant_ids, reviewer = batch_request
+        set_batch_progress(0.0)
+        count = handle_batch_decision(applicant_ids, status, comments, reviewer, set_batch_progress)
+        set_checked_ids(frozenset())
+        return count
+
+    batch_result = solara.use_thread(run_batch, [batch_request])
+    batch_running = batch_result.state == solara.ResultState.RUNNING
+
+    # Number of the last batch that was saved, so the batch form can clear its comments
+    batch_completed = batch_request[0] if batch_request and batch_result.state == solara.ResultState.FINISHED else 0
+
+    def submit_batch(status, comments):
+        number = batch_request[0] + 1 if batch_request else 1
+        set_batch_request((number, status, comments, sorted(checked_ids), solara.get_session_id()))
+
+    def start_export():
+        # The job reads this session's snapshot, so the file matches the list as shown
+        try:
+            job = exports.start(snapshot, sorted_positions, export_format, lambda job: set_export_progress((job.id, job.state, job.progress)))
+        except ValueError as e:
+            set_export_error(str(e))
+            return
+        set_export_error(None)
+        set_export_job(job)
+
+    export_running = export_job is not None and export_job.state in ("queued", "running")
+
+    def on_decided():
+        set_show_confirmation(True)
+        set_selected_applicant(None)  # Optionally clear selected applicant
+
+    def check_applicant(applicant_id, checked):
+        set_checked_ids(checked_ids | {applicant_id} if checked else checked_ids - {applicant_id})
 
 
     # Create the top navigation bar
@@ -75,8 +680,8 @@ def Page():
 
     # Create the sidebar for navigation and information display
     with solara.Sidebar():
-        # Display the last updated timestamp
-        solara.Markdown(f"**Last Updated:**<br> {last_updated} (UTC+8)")
+        # Display when the data this session shows was last changed
+        solara.Markdown(f"**Last Updated:**<br> {snapshot.updated_at.strftime('%Y-%m-%d %H:%M')} (UTC+8)")
 
         # Section header for page navigation
         solara.Markdown("## Pages")
@@ -92,59 +697,17 @@ def Page():
             # Button for navigating to the Analytics page
             solara.Button("Analytics", on_click=lambda: set_selected_page("Analytics"))
 
+            # Button for navigating to the Profiling page, only when it is switched on
+            if profiling_panel:
+                solara.Button("Profiling", on_click=lambda: set_selected_page("Profiling"))
+
 
     # Create a main content area with a specified left margin
     with solara.Column(style={"marginLeft": "200px"}):
         # Check if the selected page is "Admin"
         if selected_page == "Admin":
-            # Calculate counts for each application status
-            status_counts = df['Status'].value_counts()
-
-            # Create a container for the status cards
-            with solara.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "10px"}):
-                # Define card data for each status
-                card_data = [
-                    {"title": "Approved", "symbol": "✅", "color": "green", "borderColor": "green", "number": status_counts.get("Approved", 0), "info": "Total number of approved applications"},
-                    {"title": "In Progress", "symbol": "🔄", "color": "orange", "borderColor": "orange", "number": status_counts.get("In Progress", 0), "info": "Total number of applications currently being processed."},
-                    {"title": "Alerts", "symbol": "⚠️", "color": "darkred", "borderColor": "darkred", "number": status_counts.get("Alerts", 0), "info": "Total number of applications that are suspicious"},
-                    {"title": "Pending Approval", "symbol": "⏳", "color": "blue", "borderColor": "blue", "number": status_counts.get("Pending Approval", 0), "info": "Total number of applications awaiting approval"},
-                    {"title": "Rejected", "symbol": "❌", "color": "red", "borderColor": "red", "number": status_counts.get("Rejected", 0), "info": "Total number of rejected applications"},
-                ]
-
-                # Loop through each card data entry to create the cards
-                for card in card_data:
-                    # Define styles for each card
-                    card_style = {
-                        "border": f"2px solid {card['borderColor']}",
-                        "borderRadius": "5px",
-                        "padding": "8px",
-                        "flex": "1 1 150px",  # Flex properties for responsiveness
-                        "cursor": "pointer",
-                        "height": "100px",
-                        "position": "relative"
-                    }
-
-                    # Create the card container
-                    with solara.Div(style=card_style):
-                        # Add a tooltip with information about the card
-                        with solara.Tooltip(solara.Markdown(card['info']), color="white"):
-                            # Information icon in the top right corner
-                            solara.Div("ℹ️", style={"position": "absolute", "top": "8px", "right": "8px", "fontSize": "16px", "color": "gray", "cursor": "pointer"})
-
-                        # Layout for the card content
-                        with solara.Div(style={"display": "flex", "alignItems": "center"}):
-                            # Display the status symbol
-                            solara.Div(card["symbol"], style={"color": card["color"], "fontSize": "40px", "marginRight": "10px"})
-                            
-                            # Column layout for title and count
-                            solara.Div(
-                                style={"display": "flex", "flexDirection": "column"},
-                                children=[
-                                    solara.Markdown(f"**{card['title']}**", style={"color": card["color"], "fontSize": "18px", "fontWeight": "bold"}),
-                                    solara.Markdown(f"{card['number']}", style={"fontSize": "24px", "fontWeight": "bold"})
-                                ]
-                            )
-
+            # Counts for each application status, maintained as decisions are recorded
+            StatusCards(snapshot.status_counts)
 
             # Split section below cards
             with solara.Div(style={"marginTop": "0px", "display": "flex"}):
@@ -162,65 +725,60 @@ def Page():
                                 )
                                 solara.Checkbox(label="Include Approved Applications", value=include_approved, on_value=set_include_approved)
 
-                            # Filter the DataFrame based on input
-                            filtered_df = df[
-                                (include_approved | (df['Status'] != "Approved")) & 
-                                (
-                                    df['Applicant ID'].astype(str).str.contains(filter_text, case=False) |
-                                    df['Full Name'].str.contains(filter_text, case=False) |
-                                    df['Status'].str.contains(filter_text, case=False)
-                                )
-                            ]
-
-                            sorted_df = filtered_df.sort_values(by="Application Date", ascending=True)
-                            sorted_df['Application Date'] = sorted_df['Application Date'].dt.strftime('%Y-%m-%d %H:%M')
-
-                            # Pagination setup
-                            items_per_page = 5
-                            start_idx = current_page * items_per_page
-                            end_idx = start_idx + items_per_page
-                            paginated_df = sorted_df.iloc[start_idx:end_idx]
-
-                            # Total items and pages
-                            total_items = len(sorted_df)
-                            total_pages = (total_items - 1) // items_per_page + 1
-
-                            # Display paginated DataFrame as clickable buttons
-                            for _, row in paginated_df.iterrows():
-                                button_style = {
-                                    "margin": "5px",
-                                    "padding": "10px",
-                                    "border": "1px solid #ccc",
-                                    "borderRadius": "5px",
-                                    "cursor": "pointer",
-                                    "backgroundColor": "#f9f9f9",
-                                    "width": "100%",
-                                    "textAlign": "left",
-                                    "display": "flex",
-                                    "alignItems": "center"
-                                }
-
-                                solara.Button(
-                                    label=f"Applicant ID: {row['Applicant ID']} | Name: {row['Full Name']} | Status: {row['Status']}",
-                                    style=button_style,
-                                    on_click=lambda applicant_id=row['Applicant ID']: (set_selected_applicant(applicant_id))
-                                )
-
-                            # Pagination controls
-                            with solara.Div(style={"display": "flex", "justifyContent": "space-between", "marginTop": "10px"}):
-                                solara.Button(
-                                    label="Previous",
-                                    on_click=lambda: set_current_page(max(current_page - 1, 0)),
-                                    disabled=current_page == 0
-                                )
-
-                                solara.Markdown(f"Page {current_page + 1} of {total_pages} | Total Applications: {total_items}")
-
+                            # Sort controls
+                            with solara.Div(style={"display": "flex", "alignItems": "center", "gap": "10px"}):
+                                solara.Select(label="Sort by", values=sortable_columns, value=sort_by, on_value=set_sort_by, style={"maxWidth": "280px"})
+                                solara.Checkbox(label="Ascending", value=sort_ascending, on_value=set_sort_ascending)
+
+                            # Show the latest finished filter result; the previous one stays up while a new one runs
+                            if filter_result.state == solara.ResultState.ERROR:
+                                solara.Error(f"Could not filter applications: {filter_result.error}")
+                            if sorted_positions is None:
+                                solara.ProgressLinear(True)
+                                sorted_positions = []
+                            else:
+                                solara.ProgressLinear(filter_result.state == solara.ResultState.RUNNING)
+
+                            # Batch selection
+                            with solara.Div(style={"display": "flex", "alignItems": "center", "gap": "10px"}):
                                 solara.Button(
-                                    label="Next",
-                                    on_click=lambda: set_current_page(min(current_page + 1, total_pages - 1)),
-                                    disabled=end_idx >= total_items
+                                    "Select All Matching",
+                                    on_click=lambda: set_checked_ids(frozenset(snapshot.applicant_ids(sorted_positions))),
+                                    disabled=len(sorted_positions) == 0 or batch_running
                                 )
+                                solara.Button("Clear Selection", on_click=lambda: set_checked_ids(frozenset()), disabled=not checked_ids or batch_running)
+                                solara.Markdown(f"{len(checked_ids)} selected")
+
+                            # Batch decision for every ticked applicant
+                            BatchDecisionForm(bool(checked_ids) or batch_running, batch_running, batch_completed, submit_batch)
+                            with solara.Column():
+                                if batch_running:
+                                    solara.ProgressLinear(batch_progress * 100)
+                                elif batch_result.state == solara.ResultState.ERROR:
+                                    solara.Error(f"The batch decision failed and no applications were changed: {batch_result.error}")
+                                elif batch_result.value:
+                                    solara.Markdown(f"**Saved!** {batch_result.value} applications updated.")
+
+                            # Export the filtered list as a file, built in the background
+                            with solara.Div(style={"display": "flex", "alignItems": "center", "gap": "10px"}):
+                                solara.Select(label="Export as", values=list(export_formats), value=export_format, on_value=set_export_format, style={"maxWidth": "120px"})
+                                solara.Button("Export Matching", on_click=start_export, disabled=len(sorted_positions) == 0 or export_running)
+                                with solara.Column():
+                                    if export_error:
+                                        solara.Error(f"Could not export: {export_error}")
+                                    elif export_running:
+                                        solara.ProgressLinear(export_job.progress * 100)
+                                        solara.Markdown(f"Exporting {export_job.rows_written:,} of {export_job.total:,} applications")
+                                        solara.Button("Cancel Export", on_click=export_job.cancel, text=True)
+                                    elif export_job is not None and export_job.state == "done":
+                                        solara.v.Html(tag="a", attributes={"href": export_job.url, "download": export_job.filename}, children=[f"Download {export_job.filename} ({export_job.rows_written:,} applications)"])
+                                    elif export_job is not None and export_job.state == "failed":
+                                        solara.Error(f"The export failed: {export_job.error}")
+                                    elif export_job is not None and export_job.state == "cancelled":
+                                        solara.Markdown("Export cancelled.")
+
+                            # The current page of the list, with its pagination controls
+                            ApplicantPager(snapshot, sorted_positions, set_selected_applicant, checked_ids, check_applicant)
 
 
 
@@ -229,130 +787,10 @@ def Page():
                 with solara.lab.Tabs():
                     with solara.lab.Tab("Applicant Information", icon_name="mdi-information", style="font-weight: bold"):
                         # Check if an applicant is selected
-                        if selected_applicant is not None:
-                            applicant_info = df[df['Applicant ID'] == selected_applicant].iloc[0]
-                            
-                            with solara.Div(style={"display": "flex", "alignItems": "flex-start", "gap": "20px", "margin": "10px 0"}):
-                                # Profile image handling
-                                default_image_path = Path("default_profile_picture.jpg")
-                                profile_image_path = Path("profile_picture.jpg")
-                                final_image_path = profile_image_path if profile_image_path.exists() else default_image_path
-
-                                with solara.Div(style={
-                                    "border": "1px solid #ddd",
-                                    "borderRadius": "8px",
-                                    "padding": "8px",
-                                    "display": "inline-block",
-                                    "boxShadow": "0 1px 5px rgba(0, 0, 0, 0.1)",
-                                    "backgroundColor": "#fff",
-                                    "maxWidth": "250px"  # Set a smaller max width
-                                }):
-                                    solara.Image(final_image_path)  # Display profile image
-
-                                    # Status color mapping
-                                    status_color_map = {
-                                        "APPROVED": "green",
-                                        "IN PROGRESS": "orange",
-                                        "ALERTS": "darkred",
-                                        "PENDING APPROVAL": "blue",
-                                        "REJECTED": "red"
-                                    }
-
-                                    current_status = applicant_info['Status'].upper()  # Retrieve current status
-                                    background_color = status_color_map.get(current_status, "gray")
-                                    status_box_style = {
-                                        "height": "25px",
-                                        "backgroundColor": background_color,
-                                        "borderRadius": "4px",
-                                        "display": "flex",
-                                        "alignItems": "center",
-                                        "justifyContent": "center",
-                                        "marginTop": "5px",
-                                        "color": "white",
-                                        "fontWeight": "bold",
-                                        "fontSize": "12px"  # Smaller font size
-                                    }
-                                    with solara.Div(style=status_box_style):
-                                        solara.Markdown(f"**{current_status}**", style={"margin": "0", "color": "white"})
-
-                                    # Displaying status indicators
-                                    for status_text in ["PHOTO MATCHED", "IC VERIFIED"]:
-                                        is_matched = applicant_info[status_text]  # 1 or 0
-                                        color = "green" if is_matched == 1 else "red"
-
-                                        # Status boxes
-                                        status_styles = {
-                                            "height": "25px",
-                                            "backgroundColor": color,
-                                            "borderRadius": "4px",
-                                            "display": "flex",
-                                            "alignItems": "center",
-                                            "justifyContent": "center",
-                                            "marginTop": "5px",
-                                            "color": "white",
-                                            "fontWeight": "bold",
-                                            "fontSize": "12px"
-                                        }
-                                        with solara.Div(style=status_styles):
-                                            solara.Markdown(f"**{status_text}**", style={"margin": "0", "color": "white"})
-
-                                    # Info boxes layout
-                                    with solara.Div(style={"display": "flex", "flexDirection": "column", "gap": "5px", "marginTop": "10px"}):
-                                        new_box_data = [
-                                            {"title": "Rating Score", "value": applicant_info['Rating Score']},
-                                            {"title": "Risk Level", "value": applicant_info['Risk Level']},
-                                            {"title": "Compliance Probability", "value": applicant_info['Compliance Probability']},
-                                        ]
-
-                                        for item in new_box_data:
-                                            with solara.Div(style={
-                                                "border": "1px solid #ddd",
-                                                "borderRadius": "4px",
-                                                "padding": "5px",
-                                                "backgroundColor": "#f9f9f9",
-                                                "boxShadow": "0 1px 3px rgba(0, 0, 0, 0.1)"
-                                            }):
-                                                solara.Markdown(f"**{item['title']}:** {item['value']}", style={
-                                                    "margin": "0",
-                                                    "fontSize": "12px"  # Smaller font size
-                                                })
-
-
-
-                                # Display the applicant information based on the selected applicant
-                                with solara.Div(style={"display": "flex", "flexDirection": "column", "border": "1px solid #ccc", "borderRadius": "5px", "padding": "10px", "backgroundColor": "#f9f9f9"}):
-                                    solara.Markdown(f"**Applicant ID:** {applicant_info['Applicant ID']}")
-                                    solara.Markdown(f"**Full Name:** {applicant_info['Full Name']}")
-                                    solara.Markdown(f"**Date of Birth & Gender:** {applicant_info.get('Date of Birth', 'N/A')} | {applicant_info.get('Gender', 'N/A')}")
-                                    solara.Markdown(f"**Address:** {applicant_info.get('Address', 'N/A')}")
-                                    solara.Markdown(f"**Race & Nationality:** {applicant_info.get('Race', 'N/A')} | {applicant_info.get('Nationality', 'N/A')}")
-                                    solara.Markdown(f"**Employment Status & Occupation:** {applicant_info.get('Employment Status', 'N/A')} | {applicant_info.get('Occupation', 'N/A')}")
-                                    solara.Markdown(f"**Annual Income (RM) & Net Worth (RM):** {applicant_info.get('Annual Income (RM)', 'N/A')} | {applicant_info.get('Net Worth (RM)', 'N/A')}")
-                                    solara.Markdown(f"**Attempt of Application & Time Taken:** {applicant_info.get('Attempt of Application', 'N/A')} | {applicant_info.get('Time Taken (minutes)', 'N/A')}")
-                                    solara.Markdown(f"**Source of Funds:** {applicant_info.get('Source of Funds', 'N/A')}")
-
-                        # here
-                        if selected_applicant is not None:
-                            with solara.Div(style={"display": "flex", "alignItems": "center", "gap": "10px", "marginTop": "10px"}):
-                                solara.InputText(label="Enter comments", value=admin_comments, on_value=set_admin_comments, continuous_update=True, style={"flex": "1"})
-
-                                solara.Button("Approve", 
-                                              on_click=lambda: (
-                                                  handle_approval(selected_applicant, admin_comments),
-                                                  set_show_confirmation(True),
-                                                  set_admin_comments(""),  # Clear comments field
-                                                  set_selected_applicant(None)  # Optionally clear selected applicant
-                                              ),
-                                              style={"backgroundColor": "green", "color": "white"})
-                                
-                                solara.Button("Reject", 
-                                              on_click=lambda: (
-                                                  handle_rejection(selected_applicant, admin_comments),
-                                                  set_show_confirmation(True),
-                                                  set_admin_comments(""),  # Clear comments field
-                                                  set_selected_applicant(None)  # Optionally clear selected applicant
-                                              ),
-                                              style={"backgroundColor": "red", "color": "white"})
+                        with solara.Column(gap="0px"):
+                            if selected_applicant is not None:
+                                ApplicantDetails(snapshot, selected_applicant)
+                                DecisionForm(selected_applicant, on_decided)
 
                         # Confirmation message
                         if show_confirmation:
@@ -364,33 +802,14 @@ def Page():
 
 
                     with solara.lab.Tab("Activity Feed", icon_name="mdi-calendar-clock", style="font-weight: bold"):
-                        # Define the stages, their statuses, and timestamps
-                        stages = [
-                            ("Application Submitted", "completed", "2024-11-01 10:00"),
-                            ("Verification Started", "completed", "2024-11-01 11:00"),
-                            ("Initial Review Completed", "completed", "2024-11-01 12:00"),
-                            ("Request for Additional Information", "in_progress", "2024-11-01 13:00"),
-                            ("User Responded with Additional Information", "not_reached", "N/A"),
-                            ("Final Review Completed", "not_reached", "N/A"),
-                            ("Verification Completed", "not_reached", "N/A"),
-                            ("Notification Sent to User", "not_reached", "N/A"),
-                        ]
-
-                        # Display each stage with appropriate icons and timestamps
-                        with solara.Div(style={"padding": "20px", "fontFamily": "Arial"}):
-                            for stage, status, timestamp in stages:
-                                if status == "completed":
-                                    icon = "✅"  # Green check mark for completed stages
-                                elif status == "in_progress":
-                                    icon = "⏳"  # Hourglass for in-progress stages
-                                else:
-                                    icon = "⚪"  # No color circle for not yet reached stages
-
-                                solara.Markdown(f"<span style='font-size: 15px;'>{icon} **{stage}** - *{timestamp}*")
+                        ActivityFeed(selected_applicant, snapshot.version)
 
 
         elif selected_page == "Reporting":
-            solara.Markdown("## Reporting Page")
+            ReportingPage(snapshot.reports, service.triage_summary)
 
         elif selected_page == "Analytics":
-            solara.Markdown("## Analytics Page")
+            AnalyticsPage(snapshot)
+
+        elif selected_page == "Profiling" and profiling_panel:
+            ProfilingPanel(snapshot.version)
@@ -0,0 +1,53 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# The modules under test live at the top of the repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_data import generate_chunks, write_chunks  # noqa: E402
+from snapshot import snapshot_path_for  # noqa: E402
+
+# Applicants in the table every test starts from
+test_rows = 500
+
+
+# Paths of a fresh workbook-less snapshot of `test_rows` applicants, and of its journal
+@pytest.fixture
+def data_paths(tmp_path):
+    workbook = tmp_path / "applicants.xlsx"
+    write_chunks(generate_chunks(test_rows, seed=7, as_of=datetime(2024, 11, 1, 12, 0)), "native", snapshot_path_for(workbook))
+    return workbook, tmp_path / "decisions.journal"
+
+
+@pytest.fixture
+def service(data_paths):
+    from data_service import ApplicantService
+
+    service = ApplicantService(*data_paths)
+    yield service
+    service.journal.close()
+    service.audit.close()
+
+
+# Check that every index and counter of `service` covers exactly the rows of its table
+def assert_consistent(service):
+    snapshot = service.snapshot()
+    frame = snapshot.frame
+    rows = len(frame)
+    assert len(service.id_index) == rows
+    assert len(service.search_index) == rows
+    assert all(len(order) == rows for order in service.sort_orders.values())
+    assert len(service.date_labels) == rows
+    assert len(service.triage_matches) == rows
+    assert sum(service.status_counter.snapshot().values()) == rows
+    assert snapshot.status_counts == frame['Status'].value_counts()[lambda counts: counts > 0].to_dict()
+    reports = service.reporting.view()
+    for dimension in reports.dimensions:
+        assert reports.counts(dimension)["Total"].sum() == rows
+    positions = np.arange(rows)
+    assert list(snapshot.applicant_ids(positions)) == list(frame['Applicant ID'])
+    assert all(snapshot.position(applicant_id) == i for i, applicant_id in enumerate(frame['Applicant ID']))
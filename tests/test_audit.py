@@ -0,0 +1,187 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import audit
+from audit import AuditTrail
+from journal import compact
+
+
+def _record(trail, applicant_id, status, comment=""):
+    trail.record([applicant_id], ["In Progress"], [""], status, comment, "reviewer")
+
+
+def test_history_spans_sealed_and_active_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "segment_max_records", 4)
+    trail = AuditTrail(tmp_path)
+    for i in range(10):
+        _record(trail, f"APP{i % 3:03d}", "Approved" if i % 2 else "Rejected", f"comment {i}")
+    trail.close()
+
+    # A full segment is sealed unless the previous seal is still running
+    assert len(list(tmp_path.glob("segment-*.parquet"))) >= 1
+    assert not (tmp_path / "sealing.jsonl").exists()
+    trail = AuditTrail(tmp_path)
+    assert len(trail) == 10
+    assert list(trail.history("APP000")["Comment"]) == ["comment 0", "comment 3", "comment 6", "comment 9"]
+    assert trail.latest().loc["APP001", "Comment"] == "comment 7"
+    trail.close()
+
+
+def test_records_being_sealed_stay_queryable(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "segment_max_records", 2)
+    started = []
+    trail = AuditTrail(tmp_path)
+    # Hold the seal back, as a slow disk would
+    monkeypatch.setattr(trail, "_seal", lambda number: started.append(number))
+    _record(trail, "APP001", "Approved")
+    _record(trail, "APP002", "Rejected")
+    _record(trail, "APP001", "Rejected")
+
+    assert started == [1]
+    assert (tmp_path / "sealing.jsonl").exists()
+    assert list(trail.history("APP001")["Status"]) == ["Approved", "Rejected"]
+    assert len(trail.between()) == 3
+    trail.close()
+
+    # A seal a crash interrupted is finished on the next start
+    trail = AuditTrail(tmp_path)
+    assert not (tmp_path / "sealing.jsonl").exists()
+    assert len(list(tmp_path.glob("segment-*.parquet"))) == 1
+    assert list(trail.history("APP001")["Status"]) == ["Approved", "Rejected"]
+    trail.close()
+
+
+def test_records_survive_a_clock_stepping_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit, "segment_max_records", 2)
+    trail = AuditTrail(tmp_path)
+    noon = datetime(2024, 11, 1, 12, 0)
+    trail.record(["APP001"], ["In Progress"], [""], "Approved", "first", "reviewer", timestamp=noon)
+    trail.record(["APP002"], ["In Progress"], [""], "Approved", "same time", "reviewer", timestamp=noon)
+    # The first two are sealed; then the clock steps back
+    trail.record(["APP003"], ["In Progress"], [""], "Rejected", "earlier", "reviewer", timestamp=datetime(2024, 11, 1, 11, 0))
+    trail.record(["APP004"], ["In Progress"], [""], "Rejected", "same again", "reviewer", timestamp=noon)
+    trail.close()
+    assert len(list(tmp_path.glob("segment-*.parquet"))) == 1
+    # A crash between writing the segment and deleting its JSON-lines file leaves a copy behind
+    leftover = [{"Timestamp": noon.isoformat(), "Applicant ID": f"APP00{n}", "Status": "Approved", "Sequence": n} for n in (1, 2)]
+    (tmp_path / "sealing.jsonl").write_text("".join(json.dumps(record) + "\n" for record in leftover))
+
+    trail = AuditTrail(tmp_path)
+    assert len(trail) == 4
+    assert list(trail.between()["Sequence"]) == [3, 1, 2, 4]
+    assert trail.record(["APP005"], ["In Progress"], [""], "Approved", "", "reviewer") == 5
+    trail.close()
+
+
+def test_discarded_records_are_gone_after_a_restart(tmp_path):
+    trail = AuditTrail(tmp_path)
+    _record(trail, "APP001", "Approved")
+    _record(trail, "APP002", "Rejected")
+    assert trail.discard_after(1) == 1
+    assert not len(trail.history("APP002"))
+    _record(trail, "APP003", "Rejected")
+    trail.close()
+
+    trail = AuditTrail(tmp_path)
+    assert list(trail.between()["Applicant ID"]) == ["APP001", "APP003"]
+    trail.close()
+
+
+def test_trail_from_before_sequence_numbers_is_numbered(tmp_path):
+    import pandas as pd
+
+    def records(applicant_ids, hour):
+        return [{"Timestamp": datetime(2024, 11, 1, hour, minute).isoformat(), "Applicant ID": applicant_id, "Status": "Approved"}
+                for minute, applicant_id in enumerate(applicant_ids)]
+
+    sealed = pd.DataFrame(records(["APP002", "APP001"], 9))
+    sealed["Timestamp"] = pd.to_datetime(sealed["Timestamp"])
+    sealed.sort_values("Applicant ID").to_parquet(tmp_path / "segment-000001.parquet", index=False)
+    (tmp_path / "active.jsonl").write_text("".join(json.dumps(record) + "\n" for record in records(["APP003"], 10)))
+
+    reader = AuditTrail(tmp_path, read_only=True)
+    assert len(reader) == 3 and list(reader.history("APP003")["Sequence"]) == [3]
+    reader.close()
+    trail = AuditTrail(tmp_path)
+    assert list(trail.between()["Sequence"]) == [1, 2, 3]
+    assert list(trail.between()["Applicant ID"]) == ["APP002", "APP001", "APP003"]
+    assert trail.record(["APP004"], ["In Progress"], [""], "Approved", "", "reviewer") == 4
+    trail.close()
+    assert list(AuditTrail(tmp_path, read_only=True).between()["Sequence"]) == [1, 2, 3, 4]
+
+
+def test_read_only_trail_writes_nothing(tmp_path):
+    trail = AuditTrail(tmp_path)
+    _record(trail, "APP001", "Approved")
+    trail.close()
+    with open(tmp_path / "active.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"Timestamp": "2024')
+    before = {path.name: path.read_bytes() for path in tmp_path.iterdir()}
+
+    reader = AuditTrail(tmp_path, read_only=True)
+    assert list(reader.history("APP001")["Status"]) == ["Approved"]
+    reader.close()
+    assert {path.name: path.read_bytes() for path in tmp_path.iterdir()} == before
+    assert not AuditTrail(tmp_path / "missing", read_only=True).history("APP001").size
+    assert not (tmp_path / "missing").exists()
+
+
+def test_decisions_are_audited(service):
+    service.record_decisions(["APP001", "APP002"], "Rejected", "batch", "reviewer")
+    history = service.audit.history("APP002")
+    assert list(history["Status"]) == ["Rejected"]
+    assert list(history["Reviewer"]) == ["reviewer"]
+
+
+def test_failed_journal_write_leaves_no_audit_record(service, monkeypatch):
+    def fail(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(service.journal, "append", fail)
+    with pytest.raises(OSError):
+        service.record_decision("APP001", "Approved", "never happened")
+    assert not len(service.audit.history("APP001"))
+    assert service.snapshot().applicant("APP001")["Details"] != "never happened"
+
+    monkeypatch.undo()
+    service.record_decision("APP002", "Rejected", "after")
+    assert list(service.audit.between()["Applicant ID"]) == ["APP002"]
+
+
+@pytest.mark.parametrize("compacted", [False, True])
+def test_audit_records_without_a_journal_entry_are_discarded(data_paths, compacted):
+    from data_service import ApplicantService
+
+    service = ApplicantService(*data_paths)
+    service.record_decision("APP001", "Approved", "committed")
+    if compacted:
+        compact(service.journal, service.write_lock, lambda: service.snapshot().frame, service.save)
+    # A crash between writing the audit record and the journal entry
+    service.audit.record(["APP002"], ["In Progress"], [""], "Rejected", "never journaled", "reviewer")
+    service.journal.close()
+    service.audit.close()
+
+    restarted = ApplicantService(*data_paths)
+    assert list(restarted.audit.between()["Applicant ID"]) == ["APP001"]
+    assert restarted.snapshot().applicant("APP001")["Details"] == "committed"
+    restarted.record_decision("APP003", "Rejected", "")
+    # Numbers are not reused
+    assert list(restarted.audit.between()["Sequence"]) == [1, 3]
+    restarted.journal.close()
+    restarted.audit.close()
+
+
+def test_first_decision_is_discarded_if_it_was_never_journaled(data_paths):
+    from data_service import ApplicantService
+
+    service = ApplicantService(*data_paths)
+    service.audit.record(["APP002"], ["In Progress"], [""], "Rejected", "never journaled", "reviewer")
+    service.journal.close()
+    service.audit.close()
+
+    restarted = ApplicantService(*data_paths)
+    assert not len(restarted.audit.between())
+    restarted.journal.close()
+    restarted.audit.close()
@@ -0,0 +1,170 @@
+import pandas as pd
+import pytest
+
+from conftest import assert_consistent, test_rows
+from ingest import Ingestor, drop_directory_sink, produce
+
+
+def _produce(sink, rows, start=10_000_000):
+    produce(sink, rows, batch_size=10, interval=0, start=start, seed=1)
+
+
+def test_produced_files_are_appended(service, tmp_path):
+    ingestor = Ingestor(service, tmp_path / "incoming")
+    _produce(drop_directory_sink(tmp_path / "incoming"), 30)
+
+    assert ingestor.run_once() == 30
+    assert ingestor.accepted == 30 and ingestor.rejected == 0
+    assert len(service.snapshot()) == test_rows + 30
+    assert len(list((tmp_path / "incoming" / "processed").iterdir())) == 3
+    assert service.snapshot().applicant("APP10000029")["Status"] is not None
+    assert len(service.snapshot().filter("app10000029", True)) == 1
+    assert_consistent(service)
+
+
+def test_queued_records_are_appended(service):
+    ingestor = Ingestor(service)
+    _produce(ingestor.submit, 25)
+
+    assert ingestor.run_once() == 25
+    assert len(service.snapshot()) == test_rows + 25
+    assert len(ingestor.latency_percentiles()) == 2
+    assert_consistent(service)
+
+
+def test_missing_and_duplicate_ids_are_rejected(service):
+    ingestor = Ingestor(service)
+    rows = []
+    _produce(rows.append, 3)
+    rows = rows[0].copy()
+    existing = service.snapshot().frame['Applicant ID'].iloc[0]
+    rows.loc[0, 'Applicant ID'] = existing
+    rows.loc[1, 'Applicant ID'] = None
+    rows = pd.concat([rows, rows.iloc[[2]]], ignore_index=True)
+    ingestor.submit(rows)
+
+    assert ingestor.run_once() == 1
+    assert ingestor.rejected == 3
+    assert len(service.snapshot()) == test_rows + 1
+    assert_consistent(service)
+
+
+def test_malformed_file_does_not_fail_the_batch(service, tmp_path):
+    directory = tmp_path / "incoming"
+    ingestor = Ingestor(service, directory)
+    _produce(drop_directory_sink(directory), 10)
+    bad = []
+    _produce(bad.append, 5, start=20_000_000)
+    bad[0]['Rating Score'] = "not a number"
+    bad[0].to_csv(directory / "bad.csv", index=False)
+    (directory / "broken.jsonl").write_text("{not json\n")
+    _produce(ingestor.submit, 5, start=30_000_000)
+
+    assert ingestor.run_once() == 15
+    assert sorted(path.name for path in (directory / "failed").iterdir()) == ["bad.csv", "broken.jsonl"]
+    assert len(list((directory / "processed").iterdir())) == 1
+    assert ingestor.rejected == 5
+    assert len(service.snapshot()) == test_rows + 15
+    assert_consistent(service)
+
+
+def test_failed_append_changes_nothing(service, monkeypatch):
+    before = service.snapshot()
+    rows = []
+    _produce(rows.append, 10)
+    bad = rows[0].copy()
+    bad['Rating Score'] = "not a number"
+
+    with pytest.raises(ValueError):
+        service.append_applicants(bad)
+    assert service.snapshot() is before
+    assert_consistent(service)
+
+    # A failure after the new version is built, such as a full disk, leaves it unpublished too
+    def fail(rows):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(service.journal, "append_rows", fail)
+    ingestor = Ingestor(service)
+    ingestor.submit(rows[0])
+    assert ingestor.run_once() == 0
+    assert ingestor.rejected == 10
+    assert service.snapshot() is before
+    assert_consistent(service)
+
+    monkeypatch.undo()
+    ingestor.submit(rows[0])
+    assert ingestor.run_once() == 10
+    assert_consistent(service)
+
+
+def test_appended_rows_survive_a_restart(data_paths):
+    from data_service import ApplicantService
+    from journal import compact
+
+    service = ApplicantService(*data_paths)
+    ingestor = Ingestor(service)
+    _produce(ingestor.submit, 20)
+    ingestor.run_once()
+    service.record_decision("APP10000003", "Approved", "checked")
+    service.journal.close()
+
+    restarted = ApplicantService(*data_paths)
+    assert len(restarted.snapshot()) == test_rows + 20
+    assert restarted.snapshot().applicant("APP10000003")["Status"] == "Approved"
+    assert restarted.snapshot().applicant("APP10000003")["Details"] == "checked"
+    assert len(restarted.activity_log.events_for("APP10000003")) > 0
+    assert_consistent(restarted)
+
+    # Once compacted the rows are in the snapshot, and are not appended twice
+    compact(restarted.journal, restarted.write_lock, lambda: restarted.snapshot().frame, restarted.save)
+    restarted.journal.close()
+    again = ApplicantService(*data_paths)
+    assert len(again.snapshot()) == test_rows + 20
+    assert again.snapshot().applicant("APP10000003")["Status"] == "Approved"
+    assert len(again.activity_log.events_for("APP10000003")) == len(restarted.activity_log.events_for("APP10000003"))
+    assert_consistent(again)
+    again.journal.close()
+
+
+def test_large_values_widen_compact_columns(data_paths):
+    from data_service import ApplicantService
+    from generate_data import generate_chunks
+    from journal import compact
+
+    service = ApplicantService(*data_paths, lazy_columns=True)
+    assert service.snapshot().frame["Rating Score"].dtype == "int8"
+    rows = next(generate_chunks(2, seed=1)).assign(**{"Applicant ID": ["BIG1", "BIG2"]})
+    rows.loc[0, ["Annual Income (RM)", "Rating Score"]] = [3_000_000_000, 200]
+    service.append_applicants(rows)
+    assert service.snapshot().applicant("BIG1")["Annual Income (RM)"] == 3_000_000_000
+    assert service.snapshot().applicant("BIG1")["Rating Score"] == 200
+    assert list(service.snapshot().filter("big", True, "Rating Score", False)[:1]) == [test_rows]
+    assert_consistent(service)
+    compact(service.journal, service.write_lock, lambda: service.snapshot().frame, service.save)
+    service.journal.close()
+    service.audit.close()
+
+    # The compacted snapshot is read in full by a non-lazy start
+    restarted = ApplicantService(*data_paths)
+    assert restarted.snapshot().applicant("BIG1")["Annual Income (RM)"] == 3_000_000_000
+    assert restarted.snapshot().applicant("BIG1")["Rating Score"] == 200
+    with pytest.raises(ValueError, match="Net Worth"):
+        restarted.append_applicants(rows.assign(**{"Applicant ID": ["BIG3", "BIG4"], "Net Worth (RM)": [10**20, 1]}))
+    restarted.journal.close()
+    restarted.audit.close()
+
+
+# A page read across the original and the appended chunks gives the frame's values
+def test_page_spans_appended_rows(service):
+    ingestor = Ingestor(service)
+    _produce(ingestor.submit, 25)
+    ingestor.run_once()
+    snapshot = service.snapshot()
+    positions = [test_rows + 3, 0, test_rows - 1, test_rows + 24, 7]
+    rows = snapshot.list_rows(positions)
+    for row, position in zip(rows, positions):
+        assert row["Applicant ID"] == snapshot.frame["Applicant ID"].iloc[position]
+        assert row["Full Name"] == snapshot.frame["Full Name"].iloc[position]
+        assert row["Status"] == snapshot.frame["Status"].iloc[position]
+    assert snapshot.list_rows([]) == []
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from conftest import assert_consistent
+from journal import DecisionJournal, compact
+
+
+def _frame():
+    return pd.DataFrame({
+        "Applicant ID": ["APP001", "APP002", "APP003"],
+        "Status": ["In Progress", "Alerts", "In Progress"],
+        "Details": ["", "", ""],
+    })
+
+
+def test_replay_applies_the_last_decision_per_applicant(tmp_path):
+    journal = DecisionJournal(tmp_path / "decisions.journal")
+    journal.append("APP001", "Approved", "first")
+    journal.append_batch(["APP001", "APP002"], "Rejected", "batch")
+    journal.append("APP002", "Approved", "second")
+    journal.append("APP999", "Approved", "not in the table")
+    journal.close()
+
+    frame = _frame()
+    assert DecisionJournal(tmp_path / "decisions.journal").replay(frame) == 4
+    assert list(frame["Status"]) == ["Rejected", "Approved", "In Progress"]
+    assert list(frame["Details"]) == ["batch", "second", ""]
+
+
+def test_replay_skips_a_torn_last_line(tmp_path):
+    path = tmp_path / "decisions.journal"
+    journal = DecisionJournal(path)
+    journal.append("APP001", "Approved", "kept")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"Applicant ID": "APP002", "Stat')
+
+    journal = DecisionJournal(path)
+    journal.append("APP003", "Rejected", "after the torn line")
+    frame = _frame()
+    assert journal.replay(frame) == 2
+    assert list(frame["Status"]) == ["Approved", "Alerts", "Rejected"]
+
+
+def test_entries_left_by_an_interrupted_compaction_come_first(tmp_path):
+    journal = DecisionJournal(tmp_path / "decisions.journal")
+    journal.append("APP001", "Rejected", "old")
+    journal.rotate()
+    journal.append("APP001", "Approved", "new")
+
+    frame = _frame()
+    journal.replay(frame)
+    assert frame.loc[0, "Status"] == "Approved"
+
+
+def test_compaction_folds_decisions_into_the_snapshot(data_paths):
+    from data_service import ApplicantService
+
+    service = ApplicantService(*data_paths)
+    service.record_decision("APP001", "Approved", "compacted")
+    service.record_decisions(["APP002", "APP003"], "Rejected", "batch")
+    assert compact(service.journal, service.write_lock, lambda: service.snapshot().frame, service.save)
+    assert service.journal.is_empty()
+    assert not service.journal.compacting_path.exists()
+    service.journal.close()
+
+    restarted = ApplicantService(*data_paths)
+    assert list(restarted.journal.entries()) == []
+    assert restarted.snapshot().applicant("APP001")["Details"] == "compacted"
+    assert restarted.snapshot().applicant("APP003")["Status"] == "Rejected"
+    assert_consistent(restarted)
+    restarted.journal.close()
+
+
+def test_compaction_is_skipped_when_nothing_changed(service):
+    saves = []
+    assert not compact(service.journal, service.write_lock, lambda: service.snapshot().frame, saves.append)
+    service.record_decision("APP001", "Approved", "")
+    assert compact(service.journal, service.write_lock, lambda: service.snapshot().frame, saves.append)
+    assert not compact(service.journal, service.write_lock, lambda: service.snapshot().frame, saves.append)
+    assert len(saves) == 1
+
+
+def test_failed_compaction_keeps_the_entries(data_paths):
+    from data_service import ApplicantService
+
+    service = ApplicantService(*data_paths)
+    service.record_decision("APP001", "Approved", "kept")
+
+    def fail(frame):
+        raise OSError("No space left on device")
+
+    try:
+        compact(service.journal, service.write_lock, lambda: service.snapshot().frame, fail)
+    except OSError:
+        pass
+    service.record_decision("APP002", "Rejected", "after")
+    assert not service.journal.is_empty()
+    service.journal.close()
+
+    restarted = ApplicantService(*data_paths)
+    assert restarted.snapshot().applicant("APP001")["Status"] == "Approved"
+    assert restarted.snapshot().applicant("APP002")["Status"] == "Rejected"
+    restarted.journal.close()
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from data_service import sortable_columns
+from indexes import SortedOrder
+from ingest import Ingestor, produce
+from search_index import searchable_columns
+
+queries = ["t", "ta", "tan", "Tan", "app0", "app001", "zain mala", "rejected", "pending approval", "n", "zz", "qqq", "app999999"]
+
+
+# What the search box should match: a case-insensitive substring of any searchable column
+def _expected(frame, text):
+    mask = np.zeros(len(frame), dtype=bool)
+    for column in searchable_columns:
+        mask |= frame[column].astype(str).str.lower().str.contains(text.lower(), regex=False).to_numpy()
+    return mask
+
+
+def _assert_search_matches(service):
+    snapshot = service.snapshot()
+    for text in queries:
+        assert np.array_equal(snapshot.search.match(text), _expected(snapshot.frame, text)), text
+
+
+@pytest.mark.parametrize("text", queries)
+def test_search_matches_substring_scan(service, text):
+    snapshot = service.snapshot()
+    assert np.array_equal(snapshot.search.match(text), _expected(snapshot.frame, text))
+    assert np.array_equal(snapshot.search.match_rows(text, np.arange(0, len(snapshot), 7)), _expected(snapshot.frame, text)[::7])
+
+
+def test_search_follows_decisions(service):
+    applicant_ids = ["APP003", "APP004", "APP005"]
+    for status in ["Pending Approval", "Rejected", "Approved"]:
+        version = service.snapshot().version
+        service.record_decisions(applicant_ids, status, "checked", "tester")
+        service.wait_for_version(version, 5)
+        _assert_search_matches(service)
+
+
+def test_search_covers_appended_rows(service):
+    ingestor = Ingestor(service)
+    produce(ingestor.submit, 30, batch_size=10, interval=0, start=10_000_000, seed=1)
+    ingestor.run_once()
+    _assert_search_matches(service)
+    assert len(service.snapshot().filter("app10000", True)) == 30
+
+
+# Filter results come in the presorted order, whichever way the rows are picked out of it
+@pytest.mark.parametrize("ascending", [True, False])
+def test_filter_keeps_sort_order(service, ascending):
+    snapshot = service.snapshot()
+    approved = (snapshot.frame["Status"] == "Approved").to_numpy()
+    for column in sortable_columns:
+        everyone = SortedOrder(snapshot.frame[column]).positions(None, ascending)
+        for text in queries:
+            for include_approved in (True, False):
+                mask = _expected(snapshot.frame, text) & (include_approved | ~approved)
+                result = snapshot.filter(text, include_approved, column, ascending)
+                assert np.array_equal(result, everyone[mask[everyone]]), (column, text, include_approved)
+
+
+@pytest.mark.parametrize("share", [0.0, 0.005, 0.3, 1.0])
+def test_positions_put_missing_values_last(share):
+    rng = np.random.default_rng(3)
+    keys = rng.integers(0, 50, 2000).astype(float)
+    keys[rng.random(2000) < 0.1] = np.nan
+    order = SortedOrder(keys)
+    mask = rng.random(2000) < share
+    rows = np.flatnonzero(mask)
+    valid = rows[~np.isnan(keys[rows])]
+    valid = valid[np.argsort(keys[valid], kind="stable")]
+    missing = rows[np.isnan(keys[rows])]
+    assert np.array_equal(order.positions(mask, True), np.concatenate([valid, missing]))
+    assert np.array_equal(order.positions(mask, False), np.concatenate([valid[::-1], missing]))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from data_server import DataServer, RemoteSnapshot, _RemoteOrders
+from data_service import sortable_columns
+from ingest import Ingestor, produce
+
+
+# A worker's view of `service`, calling the data server in this process
+def _remote(server, orders):
+    return RemoteSnapshot(server, server.latest(), orders)
+
+
+def _decide(service, applicant_ids, status):
+    version = service.snapshot().version
+    service.record_decisions(applicant_ids, status, "checked", "tester")
+    return service.wait_for_version(version, 5)
+
+
+@pytest.mark.parametrize("sort_by", sortable_columns)
+@pytest.mark.parametrize("ascending", [True, False])
+def test_patched_filter_matches_a_fresh_one(service, sort_by, ascending):
+    server = DataServer(service)
+    orders = _RemoteOrders(server)
+    before = _remote(server, orders)
+    positions = before.filter("", False, sort_by, ascending)
+    applicant_ids = list(before.applicant_ids(positions[:3])) + list(service.snapshot().frame["Applicant ID"][:2])
+
+    _decide(service, applicant_ids[:3], "Approved")
+    _decide(service, applicant_ids[3:], "Alerts")
+    after = _remote(server, orders)
+    changes = service.changes_since(before.version)
+    patched = after.patch_filter(positions, changes, "", False, sort_by, ascending)
+    assert np.array_equal(patched, after.filter("", False, sort_by, ascending))
+
+
+def test_worker_orders_cover_appended_rows(service):
+    server = DataServer(service)
+    orders = _RemoteOrders(server)
+    before = _remote(server, orders)
+    positions = before.filter("", False)
+    # Build the worker's order before the table grows
+    _decide(service, list(before.applicant_ids(positions[:1])), "Approved")
+    _remote(server, orders).patch_filter(positions, service.changes_since(before.version), "", False)
+
+    ingestor = Ingestor(service)
+    produce(ingestor.submit, 20, batch_size=10, interval=0, start=10_000_000, seed=1)
+    ingestor.run_once()
+    grown = _remote(server, orders)
+    positions = grown.filter("", False)
+    _decide(service, ["APP10000003", "APP10000011"], "Approved")
+    after = _remote(server, orders)
+    patched = after.patch_filter(positions, service.changes_since(grown.version), "", False)
+    assert np.array_equal(patched, after.filter("", False))
+    assert len(orders.get("Application Date", after.version, len(after))) == len(after)
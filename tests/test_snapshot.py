@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pandas as pd
+
+from generate_data import generate_chunks, write_chunks
+from journal import compact
+
+
+def _service(workbook):
+    from data_service import ApplicantService
+
+    return ApplicantService(workbook, workbook.with_name("decisions.journal"))
+
+
+def _compact_and_close(service):
+    compact(service.journal, service.write_lock, lambda: service.snapshot().frame, service.save)
+    service.journal.close()
+    service.audit.close()
+
+
+def test_snapshot_is_rebuilt_when_the_workbook_changes(tmp_path):
+    workbook = tmp_path / "applicants.xlsx"
+    write_chunks(generate_chunks(20, seed=7, as_of=datetime(2024, 11, 1, 12, 0)), "xlsx", workbook)
+    service = _service(workbook)
+    assert len(service.snapshot()) == 20
+    service.journal.close()
+
+    rows = pd.read_excel(workbook)
+    rows.loc[0, "Full Name"] = "Renamed Applicant"
+    rows.to_excel(workbook, index=False)
+    service = _service(workbook)
+    assert service.snapshot().applicant("APP001")["Full Name"] == "Renamed Applicant"
+    service.journal.close()
+
+
+def test_rebuild_keeps_compacted_decisions(tmp_path, capsys):
+    workbook = tmp_path / "applicants.xlsx"
+    write_chunks(generate_chunks(20, seed=7, as_of=datetime(2024, 11, 1, 12, 0)), "xlsx", workbook)
+    service = _service(workbook)
+    service.record_decision("APP001", "Rejected", "first")
+    service.record_decision("APP001", "Approved", "second")
+    service.record_decisions(["APP002", "APP003"], "Rejected", "batch")
+    service.append_applicants(pd.DataFrame(list(generate_chunks(2, seed=1))[0].assign(**{"Applicant ID": ["NEW1", "NEW2"]})))
+    _compact_and_close(service)
+
+    # The workbook is edited after the decisions were folded into the snapshot
+    rows = pd.read_excel(workbook)
+    rows.loc[5, "Full Name"] = "Renamed Applicant"
+    rows.to_excel(workbook, index=False)
+
+    service = _service(workbook)
+    snapshot = service.snapshot()
+    assert snapshot.applicant("APP001")["Status"] == "Approved"
+    assert snapshot.applicant("APP001")["Details"] == "second"
+    assert snapshot.applicant("APP003")["Status"] == "Rejected"
+    assert snapshot.applicant("APP006")["Full Name"] == "Renamed Applicant"
+    output = capsys.readouterr().out
+    assert "reapplied the latest decision of 3 applicants" in output
+    assert "2 applicants in the previous snapshot" in output and "NEW1, NEW2" in output
+    service.journal.close()
+
+
+def test_regenerated_workbook_does_not_inherit_decisions(tmp_path, capsys):
+    workbook = tmp_path / "applicants.xlsx"
+    write_chunks(generate_chunks(20, seed=7, as_of=datetime(2024, 11, 1, 12, 0)), "xlsx", workbook)
+    service = _service(workbook)
+    service.record_decisions(["APP001", "APP002"], "Rejected", "old dataset")
+    _compact_and_close(service)
+
+    # generate_data.py run again with another seed reuses the IDs for other people
+    write_chunks(generate_chunks(20, seed=8, as_of=datetime(2024, 11, 1, 12, 0)), "xlsx", workbook)
+    expected = pd.read_excel(workbook).set_index("Applicant ID")
+    service = _service(workbook)
+    assert service.snapshot().applicant("APP001")["Details"] == expected.loc["APP001", "Details"]
+    assert "reapplied" not in capsys.readouterr().out
+    service.journal.close()
+    service.audit.close()
+
+    # Nor on a later rebuild, where the previous snapshot has the new people under those IDs
+    rows = pd.read_excel(workbook)
+    rows.loc[5, "Full Name"] = "Renamed Applicant"
+    rows.to_excel(workbook, index=False)
+    service = _service(workbook)
+    assert service.snapshot().applicant("APP002")["Details"] == expected.loc["APP002", "Details"]
+    assert "reapplied" not in capsys.readouterr().out
+    service.journal.close()
+    service.audit.close()
@@ -0,0 +1,117 @@
+import json
+import operator
+
+import numpy as np
+import pandas as pd
+
+# Statuses set by a reviewer. Triage never changes an applicant that has one.
+final_statuses = ["Approved", "Rejected"]
+
+# Triage rules, checked in order; the first rule an applicant matches decides
+# their status and queue. Each condition is [column, operator, value], and all
+# conditions of a rule must hold. The same structure can be loaded from JSON.
+triage_rules = [
+    {
+        "name": "Verified and compliant",
+        "when": [["PHOTO MATCHED", "==", 1], ["IC VERIFIED", "==", 1], ["Compliance Probability", ">", 90]],
+        "status": "Pending Approval",
+        "queue": "Fast Track",
+    },
+    {
+        "name": "High risk with repeated attempts",
+        "when": [["Risk Level", "==", "High"], ["Attempt of Application", ">=", 4]],
+        "status": "Alerts",
+        "queue": "Investigation",
+    },
+    {
+        "name": "Verification failed",
+        "when": [["PHOTO MATCHED", "==", 0], ["IC VERIFIED", "==", 0]],
+        "status": "Alerts",
+        "queue": "Identity Check",
+    },
+]
+
+_operators = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": lambda values, options: values.isin(options),
+    "not in": lambda values, options: ~values.isin(options),
+}
+
+
+def load_rules(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Turn one rule's conditions into a function from a frame to a row mask
+def _compile_conditions(rule):
+    conditions = []
+    for column, op, value in rule["when"]:
+        if op not in _operators:
+            raise ValueError(f"Triage rule '{rule['name']}' uses an unknown operator: {op}")
+        conditions.append((column, _operators[op], value))
+
+    def mask(frame):
+        result = np.ones(len(frame), dtype=bool)
+        for column, compare, value in conditions:
+            # Missing values never satisfy a condition
+            result &= np.asarray(compare(frame[column], value).fillna(False), dtype=bool)
+        return result
+
+    return mask
+
+
+# A compiled rule set. Evaluating it is one vectorized mask per condition, so
+# re-triaging the whole table costs a few column comparisons.
+class TriageRules:
+    def __init__(self, rules=None):
+        self.rules = list(triage_rules if rules is None else rules)
+        for rule in self.rules:
+            missing = {"name", "when", "status"} - set(rule)
+            if missing:
+                raise ValueError(f"Triage rule is missing {sorted(missing)}: {rule}")
+        self._masks = [_compile_conditions(rule) for rule in self.rules]
+        self.columns = sorted({column for rule in self.rules for column, _, _ in rule["when"]})
+
+    # Index of the first rule each row matches, or -1
+    def evaluate(self, frame):
+        matched = np.full(len(frame), -1, dtype=np.int16)
+        for i, mask in enumerate(self._masks):
+            matched[(matched < 0) & mask(frame)] = i
+        return matched
+
+    # Evaluate the rules and give every matched row without a final status the
+    # status of its rule, in place. Returns the matched rule per row.
+    def apply(self, frame):
+        matched = self.evaluate(frame)
+        routable = (matched >= 0) & ~frame['Status'].isin(final_statuses).to_numpy()
+        for i, rule in enumerate(self.rules):
+            rows = routable & (matched == i)
+            if not rows.any():
+                continue
+            statuses = frame['Status']
+            if isinstance(statuses.dtype, pd.CategoricalDtype) and rule["status"] not in statuses.cat.categories:
+                frame['Status'] = statuses.cat.add_categories([rule["status"]])
+            frame.loc[rows, 'Status'] = rule["status"]
+        return matched
+
+    def rule_name(self, index):
+        return self.rules[index]["name"] if index >= 0 else None
+
+    def queue(self, index):
+        return self.rules[index].get("queue", self.rules[index]["status"]) if index >= 0 else None
+
+    # Applicants matched by each rule, with the status and queue it routes to
+    def summary(self, matched):
+        counts = np.bincount(matched[matched >= 0], minlength=len(self.rules))
+        return pd.DataFrame({
+            "Rule": [rule["name"] for rule in self.rules],
+            "Status": [rule["status"] for rule in self.rules],
+            "Queue": [self.queue(i) for i in range(len(self.rules))],
+            "Applicants": counts,
+        }).set_index("Rule")